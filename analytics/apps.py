@@ -1,6 +1,9 @@
 from tendo.singleton import SingleInstanceException
 from django.apps import AppConfig
 from django.conf import settings
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -11,7 +14,21 @@ class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.AutoField'
     
     def ready(self):
-        if not settings.TESTING:
+        from analytics.utils.income_facts import payment_handler
+        from analytics.utils.income_facts import rate_handler
+        from analytics.utils.income_facts import rates_loaded_handler
+        from common.utils.helpers import remember_deal_handler
+        from crm.models import Payment
+        from crm.models import Rate
+        from crm.utils.rates_loader import rates_loaded
+
+        pre_save.connect(remember_deal_handler, sender=Payment)
+        for signal in (post_save, post_delete):
+            signal.connect(payment_handler, sender=Payment)
+            signal.connect(rate_handler, sender=Rate)
+        rates_loaded.connect(rates_loaded_handler, sender=Rate)
+
+        if settings.BACKGROUND_THREADS and not settings.TESTING:
             from analytics.utils.monthly_snapshot_saving import MonthlySnapshotSaving
             try:
                 self.mss = MonthlySnapshotSaving()      # NOQA
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from analytics.settings import INCOME_SNAPSHOT_WORKERS
+from analytics.utils.income_snapshots import save_income_snapshots
+
+
+class Command(BaseCommand):
+    help = "Save Income Summary snapshots of the departments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--department', action='append', type=int, dest='departments',
+            help="Department (group) id. By default, all departments with managers."
+        )
+        parser.add_argument(
+            '--workers', type=int, default=INCOME_SNAPSHOT_WORKERS,
+            help="Number of processes rendering the snapshots."
+        )
+
+    def handle(self, *args, **options):
+        snapshot_ids = save_income_snapshots(
+            options['departments'], options['workers']
+        )
+        saved = [i for i in snapshot_ids if i]
+        self.stdout.write(f"Saved snapshots: {len(saved)}")
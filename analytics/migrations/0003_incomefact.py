@@ -0,0 +1,83 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from django.db.models import Case
+from django.db.models import DecimalField
+from django.db.models import Exists
+from django.db.models import F
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Trunc
+
+
+def fill_income_facts(apps, schema_editor):
+    IncomeFact = apps.get_model('analytics', 'IncomeFact')
+    Payment = apps.get_model('crm', 'Payment')
+    Rate = apps.get_model('crm', 'Rate')
+    rate = Rate.objects.filter(
+        currency=OuterRef('currency'),
+        payment_date=OuterRef('payment_date')
+    )
+    has_rate = Exists(rate)
+    zero = Value(0, output_field=DecimalField())
+
+    def rated_amount(rate_field_name):
+        return Sum(Case(
+            When(has_rate, then=F('amount') * Subquery(
+                rate.values(rate_field_name)[:1]
+            )),
+            default=zero,
+            output_field=DecimalField()
+        ))
+
+    values = Payment.objects.annotate(
+        month=Trunc('payment_date', 'month')
+    ).values(
+        'deal_id', 'currency_id', 'month', 'status'
+    ).annotate(
+        amount_state=rated_amount('rate_to_state_currency'),
+        amount_marketing=rated_amount('rate_to_marketing_currency'),
+        unrated_amount=Sum(Case(
+            When(has_rate, then=zero),
+            default=F('amount'),
+            output_field=DecimalField()
+        ))
+    ).order_by()
+    IncomeFact.objects.bulk_create(
+        [IncomeFact(**v) for v in values], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_initial'),
+        ('crm', '0011_matchkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncomeFact',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('status', models.CharField(choices=[('r', 'received'), ('g', 'guaranteed'), ('h', 'high probability'), ('l', 'low probability')], max_length=1)),
+                ('amount_state', models.DecimalField(decimal_places=4, default=0, help_text='Amount of payments in the state currency at the rates of the payment dates.', max_digits=20)),
+                ('amount_marketing', models.DecimalField(decimal_places=4, default=0, help_text='Amount of payments in the marketing currency at the rates of the payment dates.', max_digits=20)),
+                ('unrated_amount', models.DecimalField(decimal_places=2, default=0, help_text='Amount of payments that have no rate of the payment date. It is converted at the current currency rate.', max_digits=14)),
+                ('currency', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='crm.currency')),
+                ('deal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='income_facts', to='crm.deal')),
+            ],
+            options={
+                'verbose_name': 'Income fact',
+                'verbose_name_plural': 'Income facts',
+                'indexes': [models.Index(fields=['status', 'month'], name='analytics_i_status_2c22e8_idx')],
+            },
+        ),
+        migrations.RunPython(fill_income_facts, migrations.RunPython.noop),
+    ]
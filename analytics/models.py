@@ -3,12 +3,53 @@ from django.utils.translation import gettext_lazy as _
 
 from common.models import Base1
 from crm.models import ClosingReason
+from crm.models import Currency
 from crm.models import Deal
 from crm.models import LeadSource
 from crm.models import Payment
 from crm.models import Request
 
 
+class IncomeFact(models.Model):
+    """
+    Monthly sum of the payments of a deal by status and currency.
+    Updated when a Payment or a Rate is changed.
+    """
+    class Meta:
+        verbose_name = _('Income fact')
+        verbose_name_plural = _('Income facts')
+        indexes = [
+            models.Index(fields=['status', 'month']),
+        ]
+
+    deal = models.ForeignKey(
+        Deal, on_delete=models.CASCADE,
+        related_name='income_facts'
+    )
+    currency = models.ForeignKey(
+        Currency, null=True, on_delete=models.CASCADE
+    )
+    month = models.DateField()
+    status = models.CharField(
+        max_length=1, choices=Payment.STATUS_CHOICES
+    )
+    amount_state = models.DecimalField(
+        max_digits=20, decimal_places=4, default=0,
+        help_text=_("Amount of payments in the state currency "
+                    "at the rates of the payment dates.")
+    )
+    amount_marketing = models.DecimalField(
+        max_digits=20, decimal_places=4, default=0,
+        help_text=_("Amount of payments in the marketing currency "
+                    "at the rates of the payment dates.")
+    )
+    unrated_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0,
+        help_text=_("Amount of payments that have no rate of the payment date. "
+                    "It is converted at the current currency rate.")
+    )
+
+
 class IncomeStatSnapshot(Base1):
     
     class Meta:
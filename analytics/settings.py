@@ -0,0 +1,4 @@
+
+# Number of processes rendering the monthly Income Summary snapshots
+# of the departments in parallel.
+INCOME_SNAPSHOT_WORKERS = 4
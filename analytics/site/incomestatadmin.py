@@ -1,33 +1,34 @@
+from copy import copy
 from dateutil.relativedelta import relativedelta
+from urllib.parse import urlsplit
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.core.handlers.wsgi import WSGIRequest
 from django.db import connection
-from django.db.models import Case
-from django.db.models import DecimalField
 from django.db.models import Exists
-from django.db.models import F
 from django.db.models import FloatField
 from django.db.models import Subquery
 from django.db.models import Sum
 from django.db.models import Q
 from django.db.models import OuterRef
 from django.db.models import Value as V  # NOQA
-from django.db.models import When
 from django.db.models.functions import Coalesce
 from django.db.models.query import QuerySet
 from django.template.response import TemplateResponse
 from django.http.response import HttpResponseRedirect
 from django.http.response import HttpResponse
+from django.http import QueryDict
 from django.utils.translation import gettext_lazy as _
 from django.utils.safestring import mark_safe
 from django.utils.dateformat import DateFormat
 from django.urls import path
 from django.urls import reverse
 
+from analytics.models import IncomeFact
 from analytics.models import IncomeStatSnapshot
 from analytics.site.anlmodeladmin import AnlModelAdmin
 from analytics.utils.helpers import get_current_currency_amount
+from analytics.utils.helpers import get_fact_amount
 from analytics.utils.helpers import get_income_over_time
 from analytics.utils.helpers import get_currency_info
 from analytics.utils.helpers import GroupConcat
@@ -35,7 +36,6 @@ from common.utils.helpers import get_today
 from common.utils.helpers import LEADERS
 from crm.models import Output
 from crm.models import Payment
-from crm.models import Rate
 from crm.utils.admfilters import ByOwnerFilter
 from crm.utils.admfilters import USER_MODEL
 from crm.utils.helpers import get_products_header
@@ -76,13 +76,6 @@ class IncomeStatAdmin(AnlModelAdmin):
         extra_context['today'] = get_today()
         extra_context['username'] = username
         extra_context['next'] = request.build_absolute_uri()
-        snapshot = super().changelist_view(
-            request, extra_context=extra_context,
-        )
-        if hasattr(snapshot, 'render'):
-            snapshot = snapshot.render()
-            snapshot = snapshot.content.decode()
-            extra_context['snapshot'] = snapshot
         return super().changelist_view(
             request, extra_context=extra_context,
         )
@@ -112,10 +105,29 @@ class IncomeStatAdmin(AnlModelAdmin):
         data = snapshot.webpage.split('<head>')
         return HttpResponse(data[0] + style + data[1])
 
-    @staticmethod
-    def save_snapshot(request):
+    def render_snapshot(self, request: WSGIRequest, url: str) -> str:
+        """
+        Render the page at the url as the user sees it.
+        The page is rendered only when the snapshot is being saved.
+        """
+        url = urlsplit(url)
+        page_request = copy(request)
+        page_request.method = 'GET'
+        page_request.path = page_request.path_info = url.path
+        page_request.GET = QueryDict(url.query)
+        page_request.POST = QueryDict()
+        response = self.changelist_view(page_request)
+        if not hasattr(response, 'render'):
+            return ''
+        return response.render().content.decode()
+
+    def save_snapshot(self, request):
         department_id = request.user.department_id
-        webpage = request.POST.get('snapshot')
+        url = request.POST.get('next')
+        webpage = self.render_snapshot(request, url)
+        if not webpage:
+            messages.error(request, _('The snapshot was not saved.'))
+            return HttpResponseRedirect(url)
         username = request.POST.get('username')
         if username in ('all', 'None'):
             owner = None
@@ -134,7 +146,6 @@ class IncomeStatAdmin(AnlModelAdmin):
             request,
             _('The snapshot has been saved successfully.')
         )
-        url = request.POST.get('next')
         return HttpResponseRedirect(url)
 
     def create_context_data(self, request: WSGIRequest,
@@ -144,31 +155,24 @@ class IncomeStatAdmin(AnlModelAdmin):
             request)
         response.context_data['button_title'] = button_title
 
-        payment_received_qs = Payment.objects.filter(
+        received_facts = IncomeFact.objects.filter(
             deal__in=queryset,
             status=Payment.RECEIVED,
-            payment_date__gt=self.year_ago_date,
         )
+        first_month = self.today.date().replace(day=1) + relativedelta(months=-11)
         income_over_time, income_max = get_income_over_time(
-            payment_received_qs,
-            'payment_date',
+            received_facts.filter(month__gte=first_month),
             rate_field_name
         )
         current_period_total = round(
             sum(x['total'] or 0 for x in income_over_time), 2)
 
-        year_ago_date = self.year_ago_date
-        payment_received_previous_period_qs = Payment.objects.filter(
-            deal__in=queryset,
-            status=Payment.RECEIVED,
-            payment_date__lt=year_ago_date.replace(
-                day=1) + relativedelta(months=1),
-            payment_date__gte=self.year_ago_date +
-            relativedelta(months=-12, days=+1),
-        )
+        year_ago_month = self.year_ago_date.date().replace(day=1)
         income_previous_period_over_time, income_previous_max = get_income_over_time(
-            payment_received_previous_period_qs,
-            'payment_date',
+            received_facts.filter(
+                month__gte=year_ago_month + relativedelta(months=-11),
+                month__lte=year_ago_month
+            ),
             rate_field_name,
             self.year_ago_date.date()
         )
@@ -191,7 +195,9 @@ class IncomeStatAdmin(AnlModelAdmin):
             response, title, income_previous_period_over_time, income_max
         )
         title = _("Payments received")
-        payment_this_month_qs = payment_received_qs.filter(
+        payment_this_month_qs = Payment.objects.filter(
+            deal__in=queryset,
+            status=Payment.RECEIVED,
             payment_date__month=self.current_month,
             payment_date__year=self.today.year,
         ).order_by("payment_date")
@@ -258,36 +264,15 @@ class IncomeStatAdmin(AnlModelAdmin):
         )
 
         # income averaged over the year --------
+        # (sum of the twelve months up to each month of the current period)
+        monthly_totals = [
+            x['total'] or 0
+            for x in income_previous_period_over_time + income_over_time
+        ]
         totals, income_over_year = [], []
-        for item in income_over_time:
+        for i, item in enumerate(income_over_time, start=1):
             item = item.copy()
-            earliest_date = item['period'] + relativedelta(months=+1)
-            latest_date = earliest_date + relativedelta(months=-12, days=+1)
-            payment_queryset = Payment.objects.filter(
-                deal__in=queryset,
-                status=Payment.RECEIVED,
-                payment_date__lt=earliest_date,
-                payment_date__gte=latest_date,
-            )
-            rate = Rate.objects.filter(
-                currency=OuterRef('currency'),
-                payment_date=OuterRef('payment_date')
-            )
-            total = payment_queryset.aggregate(
-                total=Sum(
-                    Case(
-                        When(
-                            Exists(rate),
-                            then=F('amount') *
-                            Subquery(rate.values(rate_field_name)[:1]),
-                        ),
-                        default=F('amount') *
-                        F(f'currency__{rate_field_name}'),
-                        output_field=DecimalField()
-                    )
-                )
-            )['total']
-            item['total'] = total or 0
+            item['total'] = sum(monthly_totals[i:i + 12])
             income_over_year.append(item)
             totals.append(item['total'])
         max_value = max(*totals)
@@ -316,64 +301,47 @@ class IncomeStatAdmin(AnlModelAdmin):
             response, currency_code, rate_field_name,
             rep_title, icon
     ):
-        next_month = (self.today + relativedelta(months=+1)).month
         next_month_date = (self.today + relativedelta(months=+1)
                            ).date().replace(day=1)
-        next2_month = (self.today + relativedelta(months=+2)).month
-        next3_month_date = (
-            self.today + relativedelta(months=+3)
-        ).date().replace(day=1)
+        next2_month_date = next_month_date + relativedelta(months=+1)
+        next3_month_date = next_month_date + relativedelta(months=+2)
 
         deals_qs = queryset.filter(
-            payment__payment_date__lt=next3_month_date,
-            payment__status=status
+            income_facts__month__lt=next3_month_date,
+            income_facts__status=status
         ).distinct()
 
         payments = Payment.objects.filter(
             deal=OuterRef('pk'),
             status=status
         ).order_by().values('deal')
+        facts = IncomeFact.objects.filter(
+            deal=OuterRef('pk'),
+            status=status
+        ).order_by().values('deal')
+        amount = get_fact_amount(rate_field_name)
 
-        rate = Rate.objects.filter(
-            currency=OuterRef('currency'),
-            payment_date=OuterRef('payment_date')
-        )
-        current_month_sum = payments.annotate(
-            value=Sum(
-                Case(
-                    When(
-                        Exists(rate),
-                        then=F('amount') *
-                        Subquery(rate.values(rate_field_name)[:1]),
-                    ),
-                    default=F('amount') * F(f'currency__{rate_field_name}'),
-                    output_field=DecimalField()
-                ),
-                filter=Q(payment_date__lt=next_month_date)
-            ),
+        current_month_sum = facts.annotate(
+            value=Sum(amount, filter=Q(month__lt=next_month_date))
         )
         current_month_through_rep = payments.filter(
             payment_date__lt=next_month_date,
             through_representation=True
         )
-        next_month_sum = payments.annotate(
-            value=Sum(
-                F('amount') * F(f'currency__{rate_field_name}'),
-                filter=Q(payment_date__month=next_month),
-            ),
+        next_month_sum = facts.annotate(
+            value=Sum(amount, filter=Q(month=next_month_date))
         )
         next_month_through_rep = payments.filter(
-            payment_date__month=next_month,
+            payment_date__gte=next_month_date,
+            payment_date__lt=next2_month_date,
             through_representation=True
         )
-        next2_month_sum = payments.annotate(
-            value=Sum(
-                F('amount') * F(f'currency__{rate_field_name}'),
-                filter=Q(payment_date__month=next2_month),
-            ),
+        next2_month_sum = facts.annotate(
+            value=Sum(amount, filter=Q(month=next2_month_date))
         )
         next2_month_through_rep = payments.filter(
-            payment_date__month=next2_month,
+            payment_date__gte=next2_month_date,
+            payment_date__lt=next3_month_date,
             through_representation=True
         )
         annotate_params = {
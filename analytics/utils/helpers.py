@@ -13,6 +13,7 @@ from django.db.models import F
 from django.db.models import Max
 from django.db.models import OuterRef
 from django.db.models import Q
+from django.db.models.expressions import CombinedExpression
 from django.db.models.query import QuerySet
 from django.db.models import Subquery
 from django.db.models import Sum
@@ -88,18 +89,10 @@ def get_values_over_time(queryset: QuerySet, field: str) -> tuple:
     return check_time_periods(values), get_maximum(values)
 
 
-def get_income_over_time(payment_queryset: QuerySet, field: str,
-                         rate_field_name: str, earliest_date=None) -> tuple:
-    rate = Rate.objects.filter(
-        currency=OuterRef('currency'),
-        payment_date=OuterRef('payment_date')
-    )
-    values = payment_queryset.annotate(
-        period=Trunc(field, 'month')
-    ).values('period').annotate(
-        total=Sum(
-            get_amount_in_currency(rate, rate_field_name)
-        )
+def get_income_over_time(fact_queryset: QuerySet, rate_field_name: str,
+                         earliest_date=None) -> tuple:
+    values = fact_queryset.values(period=F('month')).annotate(
+        total=Sum(get_fact_amount(rate_field_name))
     ).order_by('period')
     return check_time_periods(values, earliest_date), get_maximum(values)
 
@@ -113,6 +106,15 @@ def get_amount_in_currency(rate, rate_field_name):
     )
 
 
+def get_fact_amount(rate_field_name: str) -> CombinedExpression:
+    """IncomeFact amount in the currency of the rate field."""
+    if rate_field_name == 'rate_to_state_currency':
+        amount = F('amount_state')
+    else:
+        amount = F('amount_marketing')
+    return amount + F('unrated_amount') * F(f'currency__{rate_field_name}')
+
+
 def get_maximum(values):
     value = values.aggregate(
         high=Max('total'),
@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import DecimalField
+from django.db.models import Exists
+from django.db.models import F
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Trunc
+
+from analytics.models import IncomeFact
+from crm.models import Payment
+from crm.models import Rate
+
+
+def get_income_fact_values(payments, rates) -> list:
+    """
+    Sum the payments by deal, currency, month and status.
+    The payments with a rate of the payment date are converted
+    at this rate, the rest are summed in the payment currency.
+    """
+    rate = rates.filter(
+        currency=OuterRef('currency'),
+        payment_date=OuterRef('payment_date')
+    )
+    has_rate = Exists(rate)
+    zero = Value(0, output_field=DecimalField())
+
+    def rated_amount(rate_field_name):
+        return Sum(Case(
+            When(has_rate, then=F('amount') * Subquery(
+                rate.values(rate_field_name)[:1]
+            )),
+            default=zero,
+            output_field=DecimalField()
+        ))
+
+    return list(payments.annotate(
+        month=Trunc('payment_date', 'month')
+    ).values(
+        'deal_id', 'currency_id', 'month', 'status'
+    ).annotate(
+        amount_state=rated_amount('rate_to_state_currency'),
+        amount_marketing=rated_amount('rate_to_marketing_currency'),
+        unrated_amount=Sum(Case(
+            When(has_rate, then=zero),
+            default=F('amount'),
+            output_field=DecimalField()
+        ))
+    ).order_by())
+
+
+def update_income_facts(deal_ids) -> None:
+    """Recalculate the income facts of the deals."""
+    deal_ids = {i for i in deal_ids if i}
+    if not deal_ids:
+        return
+    values = get_income_fact_values(
+        Payment.objects.filter(deal_id__in=deal_ids),
+        Rate.objects.all()
+    )
+    with transaction.atomic():
+        IncomeFact.objects.filter(deal_id__in=deal_ids).delete()
+        IncomeFact.objects.bulk_create([IncomeFact(**v) for v in values])
+
+
+def payment_handler(sender, instance, **kwargs) -> None:
+    """
+    Update the income facts of the deal of the payment
+    and of the deal it was moved from.
+    """
+    update_income_facts([
+        instance.deal_id, getattr(instance, '_previous_deal_id', None)
+    ])
+
+
+def rate_handler(sender, instance, **kwargs) -> None:
+    update_income_facts(
+        Payment.objects.filter(
+            currency_id=instance.currency_id,
+            payment_date=instance.payment_date
+        ).values_list('deal_id', flat=True)
+    )
+
+
+def rates_loaded_handler(sender, keys: list, **kwargs) -> None:
+    """Update the income facts once for the rates saved in bulk."""
+    keys = set(keys)
+    update_income_facts(
+        deal_id for deal_id, currency_id, payment_date in Payment.objects.filter(
+            currency_id__in={currency_id for currency_id, _ in keys},
+            payment_date__in={payment_date for _, payment_date in keys}
+        ).values_list('deal_id', 'currency_id', 'payment_date')
+        if (currency_id, payment_date) in keys
+    )
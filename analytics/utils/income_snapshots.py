@@ -0,0 +1,104 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from typing import Optional
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.http import HttpRequest
+from django.http.request import split_domain_port
+from django.http.request import validate_host
+from django.urls import reverse
+from django.utils import translation
+
+from analytics.models import IncomeStat
+from analytics.models import IncomeStatSnapshot
+from analytics.settings import INCOME_SNAPSHOT_WORKERS
+from analytics.utils.snapshot_worker import init_worker
+from analytics.utils.snapshot_worker import save_snapshot
+from common.utils.helpers import get_manager_departments
+from common.utils.helpers import USER_MODEL
+from common.utils.usermiddleware import set_group_flags
+from crm.site.crmadminsite import crm_site
+
+
+def get_snapshot_host() -> str:
+    """Get the site domain or, if it is not allowed, an allowed host."""
+    host = Site.objects.get_current().domain
+    if not validate_host(split_domain_port(host)[0], settings.ALLOWED_HOSTS):
+        host = next(
+            (h for h in settings.ALLOWED_HOSTS if h[0] not in '.*'), host
+        )
+    return host
+
+
+def get_snapshot_request(user, department_id: int) -> HttpRequest:
+    """
+    Get a request of the user to the Income Summary of the department
+    as the user middleware would prepare it.
+    """
+    request = HttpRequest()
+    request.META = {
+        'HTTP_HOST': get_snapshot_host(),
+        'SCRIPT_NAME': '',
+    }
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+    set_group_flags(user, [], 0)
+    user.department_id = department_id
+    request.user = user
+    return request
+
+
+def save_department_snapshot(department_id: int, user_id: int) -> Optional[int]:
+    """
+    Render the Income Summary of the department as the user sees it
+    and save it as a snapshot. Returns the snapshot id.
+    """
+    user = USER_MODEL.objects.get(id=user_id)
+    with translation.override(settings.LANGUAGE_CODE):
+        url = reverse('site:analytics_incomestat_changelist')
+        request = get_snapshot_request(user, department_id)
+        webpage = crm_site._registry[IncomeStat].render_snapshot(   # NOQA
+            request, f'{url}?department={department_id}'
+        )
+    if not webpage:
+        return None
+    snapshot = IncomeStatSnapshot.objects.create(
+        department_id=department_id,
+        webpage=webpage,
+    )
+    return snapshot.id
+
+
+def save_income_snapshots(department_ids=None,
+                          workers: int = INCOME_SNAPSHOT_WORKERS) -> list:
+    """
+    Save Income Summary snapshots of the departments
+    (by default, of all departments with managers).
+    The departments are rendered in parallel by the spawned worker processes.
+    Returns the ids of the saved snapshots.
+    """
+    user = USER_MODEL.objects.filter(is_superuser=True).first()
+    if department_ids is None:
+        department_ids = list(
+            get_manager_departments().values_list('id', flat=True)
+        )
+    if not user or not department_ids:
+        return []
+    if workers <= 1 or len(department_ids) == 1:
+        return [
+            save_department_snapshot(department_id, user.id)
+            for department_id in department_ids
+        ]
+    # The processes are spawned, not forked: forking a multi-threaded
+    # server process is unsafe, and a forked child would share
+    # the database connections of the parent threads.
+    with ProcessPoolExecutor(
+            max_workers=min(workers, len(department_ids)),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker
+    ) as executor:
+        return list(executor.map(
+            save_snapshot,
+            department_ids,
+            [user.id] * len(department_ids)
+        ))
@@ -0,0 +1,25 @@
+"""
+Entry points of the processes rendering the Income Summary snapshots.
+
+The processes are spawned, so this module must be importable before
+Django is set up: it does not import models at the top level.
+"""
+import os
+from typing import Optional
+import django
+from django.apps import apps
+
+
+def init_worker() -> None:
+    """
+    Set up Django in the spawned worker process
+    without starting the background threads of the apps.
+    """
+    if not apps.ready:
+        os.environ['CRM_BACKGROUND_THREADS'] = '0'
+        django.setup()
+
+
+def save_snapshot(department_id: int, user_id: int) -> Optional[int]:
+    from analytics.utils.income_snapshots import save_department_snapshot
+    return save_department_snapshot(department_id, user_id)
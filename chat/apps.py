@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
 from django.utils.translation import gettext_lazy as _
 
 
@@ -7,3 +9,13 @@ class ChatConfig(AppConfig):
     label = 'chat'
     verbose_name = _('Chat')
     default_auto_field = 'django.db.models.AutoField'
+
+    def ready(self):
+        from chat.models import ChatMessage
+        from chat.utils.unread_chat import chat_message_handler
+        from chat.utils.unread_chat import recipients_handler
+
+        m2m_changed.connect(
+            recipients_handler, sender=ChatMessage.recipients.through
+        )
+        post_delete.connect(chat_message_handler, sender=ChatMessage)
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_unread_chats(apps, schema_editor):
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+    UnreadChat = apps.get_model('chat', 'UnreadChat')
+    values = ChatMessage.recipients.through.objects.values(
+        'user_id',
+        'chatmessage__content_type_id',
+        'chatmessage__object_id'
+    ).annotate(count=Count('id')).order_by()
+    UnreadChat.objects.bulk_create([
+        UnreadChat(
+            user_id=v['user_id'],
+            content_type_id=v['chatmessage__content_type_id'],
+            object_id=v['chatmessage__object_id'],
+            count=v['count']
+        ) for v in values
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadChat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_chats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'unread chat',
+                'verbose_name_plural': 'unread chats',
+                'constraints': [models.UniqueConstraint(fields=('user', 'content_type', 'object_id'), name='unique_unread_chat')],
+            },
+        ),
+        migrations.RunPython(fill_unread_chats, migrations.RunPython.noop),
+    ]
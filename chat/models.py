@@ -58,3 +58,31 @@ class ChatMessage(models.Model):
 
     def get_absolute_url(self):
         return reverse(f'admin:chat_{self._meta.model_name}_change', args=[str(self.id)])
+
+
+class UnreadChat(models.Model):
+    """
+    Number of the unread messages of the user in the chat of an object.
+    It is kept in sync with ChatMessage.recipients, so unread marks
+    are read from this table instead of scanning the messages.
+    """
+    class Meta:
+        verbose_name = _("unread chat")
+        verbose_name_plural = _("unread chats")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'content_type', 'object_id'],
+                name='unique_unread_chat'
+            )
+        ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='unread_chats',
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.content_type_id}:{self.object_id} - {self.count}'
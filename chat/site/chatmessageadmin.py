@@ -90,10 +90,15 @@ class ChatMessageAdmin(admin.ModelAdmin):
 
     def get_changelist_instance(self, request):
         cl = super().get_changelist_instance(request)
-        id_list = []
-        for msg in cl.result_list.filter(recipients=request.user):
-            msg.recipients.remove(request.user.id)
-            id_list.append(msg.id)
+        id_list = list(ChatMessage.objects.filter(
+            id__in=[msg.id for msg in cl.result_list],
+            recipients=request.user
+        ).values_list('id', flat=True))
+        if id_list:
+            # one query; the unread chats are recounted by the signal
+            getattr(
+                request.user, 'chat_chatmessage_recipients_related'
+            ).remove(*id_list)
         cl.result_list = cl.result_list.annotate(
             top_id=Coalesce('topic_id', 'id'),
             date=Least(
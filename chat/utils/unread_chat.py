@@ -0,0 +1,99 @@
+from collections import defaultdict
+from django.db.models import Count
+from django.db.models import Q
+
+from chat.models import ChatMessage
+from chat.models import UnreadChat
+from common.utils.helpers import bulk_upsert
+from common.utils.helpers import is_deleted_directly
+
+Recipient = ChatMessage.recipients.through
+
+
+def update_unread_chats(keys, user_ids=None) -> None:
+    """
+    Recount the unread messages in the chats of the objects
+    keys - {(content_type_id, object_id)}, of the users (by default, of all).
+    The counters are upserted, so concurrent recounts do not conflict.
+    """
+    object_ids = defaultdict(set)
+    for content_type_id, object_id in keys:
+        object_ids[content_type_id].add(object_id)
+    for content_type_id, ids in object_ids.items():
+        chats = Q(content_type_id=content_type_id, object_id__in=ids)
+        recipients = Recipient.objects.filter(
+            chatmessage__content_type_id=content_type_id,
+            chatmessage__object_id__in=ids
+        )
+        if user_ids is not None:
+            chats &= Q(user_id__in=user_ids)
+            recipients = recipients.filter(user_id__in=user_ids)
+        counts = {
+            (v['user_id'], v['chatmessage__object_id']): v['count']
+            for v in recipients.values(
+                'user_id', 'chatmessage__object_id'
+            ).annotate(count=Count('id')).order_by()
+        }
+        existing_ids = {
+            (user_id, object_id): pk
+            for pk, user_id, object_id in UnreadChat.objects.filter(
+                chats
+            ).values_list('id', 'user_id', 'object_id')
+        }
+        # the chats without unread messages
+        read_ids = [
+            pk for key, pk in existing_ids.items() if key not in counts
+        ]
+        if read_ids:
+            UnreadChat.objects.filter(id__in=read_ids).delete()
+        bulk_upsert(
+            UnreadChat,
+            [
+                UnreadChat(
+                    id=existing_ids.get((user_id, object_id)),
+                    user_id=user_id,
+                    content_type_id=content_type_id,
+                    object_id=object_id,
+                    count=count
+                ) for (user_id, object_id), count in counts.items()
+            ],
+            unique_fields=['user', 'content_type', 'object_id'],
+            update_fields=['count']
+        )
+
+
+def recipients_handler(sender, instance, action: str, reverse: bool,
+                       pk_set, **kwargs) -> None:
+    """Recount the unread messages on changes of the message recipients."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # the messages of the user (instance) are changed
+        if action == 'post_clear':
+            UnreadChat.objects.filter(user=instance).delete()
+            return
+        keys = ChatMessage.objects.filter(id__in=pk_set).values_list(
+            'content_type_id', 'object_id'
+        ).distinct()
+        update_unread_chats(keys, [instance.id])
+    else:
+        update_unread_chats(
+            [(instance.content_type_id, instance.object_id)],
+            None if action == 'post_clear' else pk_set
+        )
+
+
+def chat_message_handler(sender, instance, origin=None, **kwargs) -> None:
+    """Recount the unread messages of the chat of the deleted message."""
+    if is_deleted_directly(instance, origin):
+        update_unread_chats([(instance.content_type_id, instance.object_id)])
+
+
+def get_unread_counts(user, content_type, object_ids) -> dict:
+    """Get numbers of the user's unread messages by object id in one query."""
+    return dict(UnreadChat.objects.filter(
+        user=user,
+        content_type=content_type,
+        object_id__in=object_ids
+    ).values_list('object_id', 'count'))
+
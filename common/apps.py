@@ -16,6 +16,8 @@ class CommonConfig(AppConfig):
         from common.utils.notif_email_sender import NotifEmailSender
 
         self.nes = NotifEmailSender()       # NOQA
+        if not settings.BACKGROUND_THREADS:
+            return
         self.nes.start()
         if not settings.TESTING:
             from common.utils.reminders_sender import RemindersSender
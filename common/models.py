@@ -143,6 +143,9 @@ class Reminder(models.Model):
     class Meta:
         verbose_name = _("Reminder")
         verbose_name_plural = _("Reminders")
+        indexes = [
+            models.Index(fields=['active', 'reminder_date']),
+        ]
 
     content_type = models.ForeignKey(
         ContentType,
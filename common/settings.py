@@ -1,3 +1,12 @@
 
 # TODO: The "REMAINDER_CHECK_INTERVAL" setting is deprecated and will be removed in the future.
 REMAINDER_CHECK_INTERVAL = 60 * 5
+
+# Time (in seconds) to keep the user context (groups, department, time zone,
+# language) in the cache. It is also cleared when the user groups or profile change.
+# With the default per-process cache, other processes see changes after this time.
+USER_CONTEXT_CACHE_TIMEOUT = 60
+
+# Larger exports to the Excel file are made in the background.
+# The user gets a message with a link to the file.
+EXPORT_BACKGROUND_ROWS = 20000
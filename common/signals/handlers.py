@@ -1,9 +1,14 @@
 from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 
+from common.models import Department
 from common.models import UserProfile
 from common.utils.helpers import USER_MODEL
+from common.utils.user_context import delete_user_context
 
 
 @receiver(post_save, sender=USER_MODEL)
@@ -12,3 +17,35 @@ def user_creation_handler(sender, instance, created, **kwargs):
         co_workers = Group.objects.get(name='co-workers')
         instance.groups.add(co_workers)
         UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=USER_MODEL)
+def user_change_handler(sender, instance, **kwargs):
+    # the id of a deleted user may be reused
+    delete_user_context(instance.id)
+
+
+@receiver(m2m_changed, sender=USER_MODEL.groups.through)
+def user_groups_change_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        delete_user_context(instance.id)
+    elif action == 'pre_clear':
+        delete_user_context(*instance.user_set.values_list('id', flat=True))
+    else:
+        delete_user_context(*pk_set)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=Department)
+@receiver(pre_delete, sender=Group)
+@receiver(pre_delete, sender=Department)
+def group_change_handler(sender, instance, **kwargs):
+    delete_user_context(*instance.user_set.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def user_profile_change_handler(sender, instance, **kwargs):
+    delete_user_context(instance.user_id)
@@ -7,6 +7,7 @@ from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.core.handlers.wsgi import WSGIRequest
 from django.core.mail import mail_admins
+from django.db import connection
 from django.db.models import Exists
 from django.db.models import OuterRef
 from django.db.models import Q
@@ -23,6 +24,7 @@ from django.utils.translation import gettext_lazy
 from django.utils.translation import override
 
 from chat.models import ChatMessage
+from chat.models import UnreadChat
 
 COPY_STR = gettext_lazy("Copy")
 CONTENT_COPY_ICON = '<i class="material-icons"style="font-size: 17px;vertical-align: middle;">content_copy</i>'
@@ -48,23 +50,13 @@ def add_chat_context(request, extra_context, object_id, content_type):
     )
     extra_context['is_chat'] = chat.exists()
     if extra_context['is_chat']:
-        extra_context['is_unread_chat'] = chat.filter(
-            recipients=request.user
+        extra_context['is_unread_chat'] = UnreadChat.objects.filter(
+            user=request.user,
+            object_id=object_id,
+            content_type=content_type
         ).exists()
 
 
-def add_phone_q_params(phone: str, q_params: Q = None) -> Q:
-    q_params = q_params or Q()
-    digits = [i for i in phone if i.isdigit()]
-    if len(digits) > 4:
-        digits_re = ''.join((f'[^0-9]*[{i}]{{1}}' for i in digits))
-        phone_re = fr"{digits_re}"
-        q_params |= Q(phone__iregex=phone_re)
-        q_params |= Q(other_phone__iregex=phone_re)
-        q_params |= Q(mobile__iregex=phone_re)
-    return q_params
-
-
 def annotate_chat(request: WSGIRequest, queryset: QuerySet) -> QuerySet:
     content_type = ContentType.objects.get_for_model(queryset.model)
     chat = ChatMessage.objects.filter(
@@ -78,7 +70,11 @@ def annotate_chat(request: WSGIRequest, queryset: QuerySet) -> QuerySet:
         ).distinct()
     qs = queryset.annotate(
         is_chat=Exists(chat),
-        is_unread_chat=Exists(chat.filter(recipients=request.user))
+        is_unread_chat=Exists(UnreadChat.objects.filter(
+            user=request.user,
+            object_id=OuterRef('pk'),
+            content_type=content_type
+        ))
     )
     return qs
 
@@ -208,10 +204,53 @@ def compose_subject(obj, message: str, user: User =None) -> str:
     return subject
 
 
+def bulk_upsert(model, objs: list, unique_fields: list,
+                update_fields: list) -> None:
+    """
+    Insert the objects or update the rows with the same unique fields.
+    Backends that cannot upsert on the given fields (MySQL) update
+    the existing rows by primary key, so the objects of such rows
+    must have their primary key, and then insert the rest.
+    """
+    manager = model._default_manager      # NOQA
+    if connection.features.supports_update_conflicts_with_target:
+        manager.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields
+        )
+        return
+    manager.bulk_update([obj for obj in objs if obj.pk is not None], update_fields)
+    manager.bulk_create(objs, ignore_conflicts=True)
+
+
 def get_today():
     return get_now().date()
 
 
+def is_deleted_directly(instance, origin) -> bool:
+    """
+    Whether the object is deleted by itself, not along with an object
+    it depends on (a deal, a user), which may be being deleted too.
+    Helps the signal handlers not to recreate data of such an object.
+    """
+    model = instance._meta.concrete_model     # NOQA
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, model)
+    return origin is None or isinstance(origin, model)
+
+
+def remember_deal_handler(sender, instance, **kwargs) -> None:
+    """
+    Signal receiver (pre_save): keep the deal the object belonged to,
+    so the data of both deals can be updated if the object is moved.
+    """
+    instance._previous_deal_id = sender._default_manager.filter(   # NOQA
+        pk=instance.pk
+    ).values_list('deal_id', flat=True).first() if instance.pk else None
+
+
 def save_message(user, msg: str, level: str = 'INFO'):
     """Save message to not current user."""
     profile = user.profile
@@ -1,9 +1,15 @@
+import heapq
 import time
 import threading
+from collections import defaultdict
+from datetime import timedelta
 from tendo.singleton import SingleInstance
 from django.conf import settings
 from django.core.mail import mail_admins
+from django.db import transaction
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
+from django.db.models.signals import post_save
 from django.template import loader
 from django.urls import reverse
 from django.utils import timezone
@@ -11,11 +17,13 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.translation import override
 
 from common.models import Reminder
+from common.models import UserProfile
 from common.utils.helpers import get_trans_for_user
-from common.utils.helpers import save_message
 from common.utils.helpers import send_crm_email
+from common.utils.user_context import delete_user_context
 from settings.models import Reminders
 
+BATCH_SIZE = 500
 regarding_str = _('Regarding')
 
 
@@ -24,6 +32,8 @@ class RemindersSender(threading.Thread, SingleInstance):
     def __init__(self, *args, **kwargs):
         threading.Thread.__init__(self, *args, **kwargs)
         self.daemon = True
+        self.condition = threading.Condition()
+        self.queue = []     # heap of reminder dates saved in this process
         if settings.TESTING:
             SingleInstance.__init__(self, flavor_id='Reminder_test')
         else:
@@ -33,72 +43,160 @@ class RemindersSender(threading.Thread, SingleInstance):
         if not settings.TESTING:
             # To prevent hitting the db until the apps.ready() is completed.
             time.sleep(1)
+            post_save.connect(self.reminder_handler, sender=Reminder)
 
             while True:
                 if settings.DEBUG:
                     break
                 send_remainders()
-                try:
-                    interval = Reminders.objects.get(id=1).check_interval
-                except Reminders.DoesNotExist:
-                    # TODO: The "REMAINDER_CHECK_INTERVAL" setting is deprecated and should be removed in the future.
-                    interval = getattr(settings, 'REMAINDER_CHECK_INTERVAL', None) or 300
-                    Reminders.objects.create(id=1, check_interval=interval)
+                self.wait(get_check_interval())
 
-                time.sleep(interval)
+    def reminder_handler(self, sender, instance, **kwargs) -> None:
+        """
+        Wake the sender up if the saved reminder is due before the next check.
+        The signal only comes from the process running the sender, so
+        the reminders saved in other processes (web workers) are found
+        by the check interval and the wait for the next due date.
+        """
+        if instance.active:
+            with self.condition:
+                heapq.heappush(self.queue, instance.reminder_date)
+                self.condition.notify()
+
+    def wait(self, interval: int) -> None:
+        """
+        Sleep until the next due reminder, but no longer than the interval,
+        so the reminders saved in other processes are not missed.
+        """
+        next_dates = [
+            timezone.now() + timedelta(seconds=interval),
+            get_next_reminder_date()
+        ]
+        with self.condition:
+            now = timezone.now()
+            while self.queue and self.queue[0] <= now:
+                heapq.heappop(self.queue)
+            if self.queue:
+                next_dates.append(self.queue[0])
+            timeout = (min(filter(None, next_dates)) - now).total_seconds()
+            if timeout > 0:
+                self.condition.wait(timeout)
+
+
+def get_check_interval() -> int:
+    try:
+        return Reminders.objects.get(id=1).check_interval
+    except Reminders.DoesNotExist:
+        # TODO: The "REMAINDER_CHECK_INTERVAL" setting is deprecated and should be removed in the future.
+        interval = getattr(settings, 'REMAINDER_CHECK_INTERVAL', None) or 300
+        Reminders.objects.create(id=1, check_interval=interval)
+        return interval
+
+
+def get_next_reminder_date():
+    return Reminder.objects.filter(active=True).order_by(
+        'reminder_date'
+    ).values_list('reminder_date', flat=True).first()
+
+
+def get_content_objects(reminders: list) -> dict:
+    """Get content objects of the reminders {(content_type_id, object_id): obj}."""
+    object_ids = defaultdict(set)
+    for r in reminders:
+        object_ids[r.content_type_id].add(r.object_id)
+    content_objects = {}
+    for content_type_id, ids in object_ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        for obj_id, obj in model._default_manager.in_bulk(ids).items():    # NOQA
+            content_objects[(content_type_id, obj_id)] = obj
+    return content_objects
 
 
 def send_remainders() -> None:
-    now = timezone.now()
-    reminders = Reminder.objects.filter(active=True, reminder_date__lte=now)
-    if reminders:
-        site = Site.objects.get_current()
-        template = loader.get_template("common/reminder_message.html")
-        for r in reminders:
-            content_obj = r.content_object
-            r_url = reverse('site:common_reminder_change', args=(r.id,))
-            obj_url = reverse(
-                f'site:{content_obj._meta.app_label}_{content_obj._meta.model_name}_change',    # NOQA
-                args=(content_obj.id,)
-            )
-            model_name = Reminder._meta.object_name     # NOQA
-            user = r.owner
-            trans_name = get_trans_for_user(model_name, user)
-            subject = f'CRM {trans_name}: ' + " ".join(r.subject.splitlines())
-            trans_regarding = get_trans_for_user(regarding_str, user)
-            content_obj_name = get_trans_for_user(content_obj._meta.object_name, user)  # NOQA
-            save_message(
-                r.owner,
-                '<i class ="material-icons" style="font-size: 17px;vertical-align: middle;">alarm_on</i>'
-                f'<a href="{r_url}"> {subject}</a> {trans_regarding} - {content_obj_name}: {content_obj}',
-                'INFO'
-            )
-            if r.send_notification_email:
-                content_obj_url = f'https://{site.domain}{obj_url}'
-                context = {
-                    'content_obj': content_obj,
-                    'content_obj_name': content_obj_name,
-                    'content_obj_url': content_obj_url,
-                    'content': r.description if r.description else subject
-                }
-                if user.email:
-                    code = user.profile.language_code  # NOQA
-                    with override(code):
-                        body = template.render(context)
-                    send_crm_email(
-                        subject,
-                        body,
-                        [user.email]
-                    )
-                    r.send_notification_email = False
-                else:
-                    mail_admins(
-                        'No email address for User - %s.' % user,
-                        'CRM reminder can not send him messages',
-                        fail_silently=False,
-                    )
-            if getattr(content_obj, 'remind_me', None):
-                content_obj.remind_me = False
-                content_obj.save(update_fields=['remind_me'])
-            r.active = False
-            r.save(update_fields=['send_notification_email', 'active'])
+    """Send the due reminders in batches."""
+    while True:
+        reminders = list(Reminder.objects.filter(
+            active=True, reminder_date__lte=timezone.now()
+        ).select_related('owner__profile').order_by('reminder_date')[:BATCH_SIZE])
+        if not reminders:
+            break
+        send_reminders_batch(reminders)
+
+
+def send_reminders_batch(reminders: list) -> None:
+    site = Site.objects.get_current()
+    template = loader.get_template("common/reminder_message.html")
+    content_objects = get_content_objects(reminders)
+    model_name = Reminder._meta.object_name     # NOQA
+    messages = defaultdict(list)    # {user_id: [msg, level, ...]}
+    emailed_ids = []
+    remind_me_ids = defaultdict(list)
+    for r in reminders:
+        content_obj = content_objects.get((r.content_type_id, r.object_id))
+        user = r.owner
+        if not content_obj or not user:
+            continue
+        r_url = reverse('site:common_reminder_change', args=(r.id,))
+        obj_url = reverse(
+            f'site:{content_obj._meta.app_label}_{content_obj._meta.model_name}_change',    # NOQA
+            args=(content_obj.id,)
+        )
+        trans_name = get_trans_for_user(model_name, user)
+        subject = f'CRM {trans_name}: ' + " ".join(r.subject.splitlines())
+        trans_regarding = get_trans_for_user(regarding_str, user)
+        content_obj_name = get_trans_for_user(content_obj._meta.object_name, user)  # NOQA
+        messages[user.id].extend([
+            '<i class ="material-icons" style="font-size: 17px;vertical-align: middle;">alarm_on</i>'
+            f'<a href="{r_url}"> {subject}</a> {trans_regarding} - {content_obj_name}: {content_obj}',
+            'INFO'
+        ])
+        if r.send_notification_email:
+            content_obj_url = f'https://{site.domain}{obj_url}'
+            context = {
+                'content_obj': content_obj,
+                'content_obj_name': content_obj_name,
+                'content_obj_url': content_obj_url,
+                'content': r.description if r.description else subject
+            }
+            if user.email:
+                code = user.profile.language_code  # NOQA
+                with override(code):
+                    body = template.render(context)
+                send_crm_email(
+                    subject,
+                    body,
+                    [user.email]
+                )
+                emailed_ids.append(r.id)
+            else:
+                mail_admins(
+                    'No email address for User - %s.' % user,
+                    'CRM reminder can not send him messages',
+                    # the state of the batch must be saved anyway
+                    fail_silently=True,
+                )
+        if getattr(content_obj, 'remind_me', None):
+            remind_me_ids[type(content_obj)].append(content_obj.id)
+
+    save_messages(messages)
+    delete_user_context(*messages)
+    for model, ids in remind_me_ids.items():
+        model._default_manager.filter(id__in=ids).update(remind_me=False)   # NOQA
+    Reminder.objects.filter(id__in=emailed_ids).update(
+        send_notification_email=False
+    )
+    Reminder.objects.filter(
+        id__in=[r.id for r in reminders]
+    ).update(active=False)
+
+
+def save_messages(messages: dict) -> None:
+    """
+    Append the messages to the profiles read right before the write,
+    so the messages shown or added meanwhile are not lost or repeated.
+    """
+    for user_id, user_messages in messages.items():
+        with transaction.atomic():
+            profile = UserProfile.objects.select_for_update().get(user_id=user_id)
+            profile.messages.extend(user_messages)
+            profile.save(update_fields=['messages'])
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+
+from common.settings import USER_CONTEXT_CACHE_TIMEOUT
+from common.utils.helpers import USER_MODEL
+
+KEY_PREFIX = 'user_context'
+
+
+def delete_user_context(*user_ids) -> None:
+    cache.delete_many([f'{KEY_PREFIX}_{user_id}' for user_id in user_ids])
+
+
+def get_user_context(user) -> dict:
+    """
+    Get the user groups, departments and profile settings
+    from the cache or from the database in one query.
+    """
+    key = f'{KEY_PREFIX}_{user.id}'
+    context = cache.get(key)
+    if context is None:
+        context = load_user_context(user)
+        cache.set(key, context, USER_CONTEXT_CACHE_TIMEOUT)
+    return context
+
+
+def load_user_context(user) -> dict:
+    rows = USER_MODEL.objects.filter(id=user.id).values_list(
+        'groups__name', 'groups__department__id',
+        'profile__utc_timezone', 'profile__activate_timezone',
+        'profile__language_code', 'profile__messages',
+    )
+    context = {
+        'group_names': [],
+        'department_ids': [],
+        'utc_timezone': '',
+        'activate_timezone': False,
+        'language_code': None,
+        'has_messages': False,
+    }
+    for name, department_id, utc_timezone, activate_timezone, \
+            language_code, messages in rows:
+        if name:
+            context['group_names'].append(name)
+        if department_id:
+            context['department_ids'].append(department_id)
+        context['utc_timezone'] = utc_timezone or ''
+        context['activate_timezone'] = bool(activate_timezone)
+        context['language_code'] = language_code
+        context['has_messages'] = bool(messages)
+    context['department_ids'].sort()
+    return context
+
+
+def update_user_context(user, **kwargs) -> None:
+    key = f'{KEY_PREFIX}_{user.id}'
+    context = cache.get(key)
+    if context is not None:
+        context.update(kwargs)
+        cache.set(key, context, USER_CONTEXT_CACHE_TIMEOUT)
@@ -0,0 +1,198 @@
+from collections import defaultdict
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import QuerySet
+from django.db.models import Value
+from django.db.models import When
+
+from crm.models import Company
+from crm.models import Contact
+from crm.models import ClientType
+from crm.models import Deal
+from crm.models import Industry
+from crm.models import Lead
+from crm.models import CrmEmail
+from crm.models import Product
+from crm.models import ClosingReason
+from crm.models import Request
+from crm.models import Stage
+from crm.models import Tag
+from massmail.models import EmailAccount
+from massmail.models import EmlMessage
+from massmail.models import MailingOut
+from massmail.models import Signature
+
+BATCH_SIZE = 500
+
+objects = (
+    {
+        'model': Request,
+        # 'fk': (('lead_source', LeadSource),),
+        'm2m': (('products', Product),)
+    },
+    {
+        'model': Deal,
+        'fk': (('stage', Stage), ('closing_reason', ClosingReason)),
+        'm2m': (('tags', Tag),)
+    },
+    {
+        'model': Company,
+        'fk': (('type', ClientType),),
+        'm2m': (('industry', Industry), ('tags', Tag))
+    },
+    {
+        'model': Contact,
+        'm2m': (('tags', Tag),)
+    },
+    {
+        'model': Lead,
+        'fk': (('type', ClientType),),
+        'm2m': (('industry', Industry), ('tags', Tag))
+    },
+    {'model': CrmEmail},
+    {'model': EmailAccount},
+    {'model': MailingOut},
+    {'model': Signature},
+    {'model': EmlMessage}
+)
+
+
+def transfer_user(owner, new_department: Group, dry_run: bool = False) -> list:
+    """
+    Move the user and the user's documents to the new department
+    in one transaction. Foreign keys and many-to-many relations
+    to department data are remapped to the data of the new department
+    with the same names. Tags are moved to the new department.
+    With dry_run the changes are rolled back.
+    Returns a report: a list of (model, {field: number of changes}).
+    """
+    report = []
+    with transaction.atomic():
+        old_department = owner.groups.filter(
+            department__isnull=False
+        ).first()
+        if old_department:
+            owner.groups.remove(old_department)
+        owner.groups.add(new_department)
+        for item in objects:
+            model = item['model']
+            queryset = model.objects.filter(owner=owner)
+            changes = {
+                'department': queryset.update(department=new_department)
+            }
+            if changes['department']:
+                for attr, related_model in item.get('fk', ()):
+                    changes[attr] = remap_fk(
+                        queryset, attr, related_model, new_department
+                    )
+                for attr, related_model in item.get('m2m', ()):
+                    changes[attr] = remap_m2m(
+                        queryset, attr, related_model, new_department
+                    )
+            report.append((model, changes))
+        if dry_run:
+            transaction.set_rollback(True)
+    return report
+
+
+def get_new_ids(related_model, old_ids, new_department: Group) -> dict:
+    """
+    Get ids of the new department data with the names
+    of the old data {old id: [new ids]}.
+    """
+    names = dict(
+        related_model.objects.filter(id__in=old_ids).values_list('id', 'name')
+    )
+    name_ids = defaultdict(list)
+    for new_id, name in related_model.objects.filter(
+            department=new_department,
+            name__in=set(names.values())
+    ).values_list('id', 'name'):
+        name_ids[name].append(new_id)
+    return {
+        old_id: name_ids[name]
+        for old_id, name in names.items()
+        if name_ids[name]
+    }
+
+
+def remap_fk(queryset: QuerySet, attr: str, related_model,
+             new_department: Group) -> int:
+    """
+    Point the foreign key to the new department data with the same name,
+    keep the old value if there is no such data.
+    """
+    old_ids = set(
+        queryset.filter(**{f'{attr}__isnull': False}).values_list(attr, flat=True)
+    )
+    new_ids = {
+        old_id: ids[0]
+        for old_id, ids in get_new_ids(related_model, old_ids, new_department).items()
+        if old_id not in ids
+    }
+    if not new_ids:
+        return 0
+    return queryset.filter(**{f'{attr}__in': new_ids}).update(**{
+        attr: Case(*(
+            When(**{attr: old_id}, then=Value(new_id))
+            for old_id, new_id in new_ids.items()
+        ))
+    })
+
+
+def remap_m2m(queryset: QuerySet, attr: str, related_model,
+              new_department: Group) -> int:
+    """
+    Move the tags to the new department.
+    Replace other related data with the new department data
+    with the same names, remove the relation if there is no such data.
+    """
+    field = queryset.model._meta.get_field(attr)     # NOQA
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    rows = through.objects.filter(**{f'{source}__in': queryset.values('id')})
+    if related_model == Tag:
+        return related_model.objects.filter(
+            id__in=rows.values(target)
+        ).exclude(department=new_department).update(department=new_department)
+
+    old_pairs = {
+        (obj_id, related_id): row_id
+        for row_id, obj_id, related_id in rows.values_list(
+            'id', f'{source}_id', f'{target}_id'
+        )
+    }
+    new_ids = get_new_ids(
+        related_model, {related_id for _, related_id in old_pairs}, new_department
+    )
+    new_pairs = {
+        (obj_id, new_id)
+        for obj_id, related_id in old_pairs
+        for new_id in new_ids.get(related_id, ())
+    }
+    deleted_ids = [
+        row_id for pair, row_id in old_pairs.items() if pair not in new_pairs
+    ]
+    for i in range(0, len(deleted_ids), BATCH_SIZE):
+        through.objects.filter(id__in=deleted_ids[i:i + BATCH_SIZE]).delete()
+    through.objects.bulk_create([
+        through(**{f'{source}_id': obj_id, f'{target}_id': related_id})
+        for obj_id, related_id in new_pairs
+        if (obj_id, related_id) not in old_pairs
+    ], batch_size=BATCH_SIZE)
+    return len(deleted_ids)
+
+
+def get_report_lines(report: list) -> list:
+    """Get lines of the transfer report for the user."""
+    lines = []
+    for model, changes in report:
+        if changes['department']:
+            opts = model._meta     # NOQA
+            lines.append(f'{opts.verbose_name_plural}: ' + ', '.join(
+                f'{opts.get_field(attr).verbose_name} - {num}'
+                for attr, num in changes.items()
+            ))
+    return lines
@@ -8,6 +8,8 @@ from django.utils.safestring import mark_safe
 from django.utils.translation import get_language
 
 from common.models import UserProfile
+from common.utils.user_context import get_user_context
+from common.utils.user_context import update_user_context
 
 
 class UserMiddleware:
@@ -16,15 +18,18 @@ class UserMiddleware:
 
     def __call__(self, request):
         if request.user.is_authenticated:
-            profile = getattr(request.user, 'profile', None)
-            groups = request.user.groups.all()      
-            set_user_timezone(profile)
-            set_user_groups(request, groups)
-            set_user_department(request, groups)
+            context = get_user_context(request.user)
+            set_user_timezone(context)
+            set_group_flags(
+                request.user, context['group_names'],
+                len(context['department_ids'])
+            )
+            set_user_department(request, context['department_ids'])
             iem = apps.get_app_config('crm')
             iem.import_emails(request.user)
-            activate_stored_messages_to_user(request, profile)
-            check_user_language(profile)
+            if context['has_messages']:
+                activate_stored_messages_to_user(request, request.user.profile)
+            check_user_language(request.user, context)
         return self.get_response(request)
 
 
@@ -37,14 +42,15 @@ def activate_stored_messages_to_user(request: WSGIRequest, profile: UserProfile)
         profile.save(update_fields=['messages'])
 
 
-def check_user_language(profile: UserProfile) -> None:
+def check_user_language(user, context: dict) -> None:
     cur_language = get_language()
-    if cur_language != profile.language_code:
-        profile.language_code = cur_language
-        profile.save(update_fields=['language_code'])
+    if context['language_code'] is not None \
+            and cur_language != context['language_code']:
+        UserProfile.objects.filter(user=user).update(language_code=cur_language)
+        update_user_context(user, language_code=cur_language)
 
 
-def set_user_department(request: WSGIRequest, groups) -> None:
+def set_user_department(request: WSGIRequest, department_ids: list) -> None:
     if request.headers.get('x-requested-with') != 'XMLHttpRequest':
         if any((
             request.user.is_superuser,
@@ -64,36 +70,30 @@ def set_user_department(request: WSGIRequest, groups) -> None:
                 request.user.department_id = None
                 request.session['department_id'] = None
         else:
-            department = groups.filter(
-                department__isnull=False
-            ).first()
-            request.user.department_id = department.id if department else None
+            request.user.department_id = department_ids[0] if department_ids else None
             request.user.is_chief = False
 
 
-def set_user_groups(request: WSGIRequest, groups) -> None:
-    group_names = groups.values_list('name', flat=True)
-    request.user.is_superoperator = 'superoperators' in group_names
-    request.user.is_operator = 'operators' in group_names
-    request.user.is_chief = 'chiefs' in group_names
-    request.user.is_manager = 'managers' in group_names
-    request.user.is_accountant = 'accountants' in group_names
-    request.user.is_task_operator = 'task_operators' in group_names
-    request.user.is_department_head = 'department heads' in group_names
+def set_group_flags(user, group_names: list, departments: int) -> None:
+    user.is_superoperator = 'superoperators' in group_names
+    user.is_operator = 'operators' in group_names
+    user.is_chief = 'chiefs' in group_names
+    user.is_manager = 'managers' in group_names
+    user.is_accountant = 'accountants' in group_names
+    user.is_task_operator = 'task_operators' in group_names
+    user.is_department_head = 'department heads' in group_names
+
+    if user.is_operator and departments > 1:
+        user.is_superoperator = True
+        user.is_operator = False
 
-    if request.user.is_operator:
-        departments = groups.filter(department__isnull=False).count()
-        if departments > 1:
-            request.user.is_superoperator = True
-            request.user.is_operator = False
-    
 
-def set_user_timezone(profile: UserProfile) -> None:
-    utc_timezone = getattr(profile, 'utc_timezone', None)  
+def set_user_timezone(context: dict) -> None:
+    utc_timezone = context['utc_timezone']
     if settings.USE_TZ and utc_timezone:
-        if profile.activate_timezone:
+        if context['activate_timezone']:
             timezone.activate(
-                zoneinfo.ZoneInfo(profile.utc_timezone)
+                zoneinfo.ZoneInfo(utc_timezone)
             )
         else:
             timezone.deactivate()
@@ -1,28 +1,50 @@
-import pandas as pd
+import csv
+import re
+import threading
+import xlsxwriter
+from datetime import date
+from datetime import time
+from datetime import timedelta
+from itertools import chain
+from itertools import islice
 from pathlib import Path
+from typing import Iterator
+from typing import Optional
 from typing import Union
+from django.http import FileResponse
 from django.http import HttpResponse
 from django.http import HttpResponseNotFound
+from django.http import HttpResponseRedirect
+from django.http import StreamingHttpResponse
 from django.conf import settings
+from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
 from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection
 from django.db.models.query import QuerySet
+from django.urls import reverse
 from django.utils.encoding import escape_uri_path
 from django.utils.formats import date_format
+from django.utils.translation import gettext as _
 
+from common.settings import EXPORT_BACKGROUND_ROWS
 from common.utils.helpers import get_today
 from common.utils.helpers import get_verbose_name
+from common.utils.helpers import save_message
 from crm.models import Company
 from crm.models import Contact
 from crm.models import Deal
 from crm.models import Lead
 from tasks.models import Task
 
+EXPORT_CHUNK_SIZE = 2000
+STR_COLUMNS = ('birth_date', 'was_in_touch', 'lead_time')
+
 
 def get_file_path(username: str, queryset: QuerySet = None, model=None) -> Path:
     today = get_today()
     file_path = settings.MEDIA_ROOT / 'exported'
-    if queryset:
+    if queryset is not None:
         file_name = f"{queryset.model.__name__}_db_{username}_{today}.xlsx"
     else:
         if not model:
@@ -32,6 +54,14 @@ def get_file_path(username: str, queryset: QuerySet = None, model=None) -> Path:
     return file_path / escape_uri_path(file_name)
 
 
+def get_exported_file_path(username: str, file_name: str) -> Optional[Path]:
+    """Return the path of the file exported by the user in the background."""
+    pattern = rf"\w+_db_{re.escape(escape_uri_path(username))}_\d{{4}}-\d{{2}}-\d{{2}}\.xlsx"
+    if re.fullmatch(pattern, file_name):
+        return settings.MEDIA_ROOT / 'exported' / file_name
+    return None
+
+
 def get_columns_data() -> dict:
     return {
         ContentType.objects.get_for_model(Company).id: settings.COMPANY_COLUMNS,
@@ -43,6 +73,13 @@ def get_columns_data() -> dict:
 
 
 def export_objects_view(request: WSGIRequest) -> Union[HttpResponse, HttpResponseNotFound]:
+    file_name = request.GET.get("file")
+    if file_name:
+        file_path = get_exported_file_path(request.user.username, file_name)
+        if not file_path:
+            return HttpResponseNotFound()
+        return get_export_response(file_path)
+
     content_type_id = request.GET.get("content_type")
     content_type = ContentType.objects.get(id=content_type_id)
     queryset = content_type.model_class().objects.filter(
@@ -54,99 +91,172 @@ def export_objects_view(request: WSGIRequest) -> Union[HttpResponse, HttpRespons
 def export_selected_objects(request: WSGIRequest,
                             queryset: QuerySet) -> Union[HttpResponse, HttpResponseNotFound]:
     content_type = ContentType.objects.get_for_model(queryset.model)
-
-    file_path = get_file_path(request.user.username, queryset)
     columns_data = get_columns_data()
-    datadict = get_datadict(
-        request,
-        columns_data[content_type.id],
-        queryset=queryset
-    )
-    save_to_excel(datadict, file_path)
+    plan = ExportPlan(queryset.model, columns_data[content_type.id])
+    file_path = get_file_path(request.user.username, queryset)
+
+    if request.GET.get("format") == "csv":
+        return get_csv_response(plan, queryset, file_path.with_suffix('.csv').name)
+
+    if not settings.TESTING and queryset.count() > EXPORT_BACKGROUND_ROWS:
+        url = reverse('export_objects') + f"?file={file_path.name}"
+        export_in_background(request.user, plan, queryset, file_path, url)
+        messages.info(
+            request,
+            _("The export has started. You will get a message with a link to the file.")
+        )
+        return HttpResponseRedirect(
+            request.META.get('HTTP_REFERER') or reverse('site:index')
+        )
+
+    save_to_excel(plan, queryset, file_path)
     return get_export_response(file_path)
 
 
-def save_to_excel(datadict: dict, file_path: Path) -> None:
-    df = pd.DataFrame(datadict)
-    df = df.replace('nan', '')
-    df = df.replace('None', '')
-    writer = pd.ExcelWriter(file_path, engine='xlsxwriter')
-    df.to_excel(writer, 'Sheet1', index=False, na_rep=' ')
-    writer.close()
+def export_in_background(user, plan, queryset: QuerySet,
+                         file_path: Path, url: str) -> None:
+    def run():
+        try:
+            save_to_excel(plan, queryset, file_path)
+            msg = _("The exported file is ready")
+            save_message(user, f'{msg}: <a href="{url}">{file_path.name}</a>')
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def save_to_excel(plan, queryset: QuerySet, file_path: Path) -> None:
+    """Write the rows to the xlsx file one by one, in constant memory."""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    workbook = xlsxwriter.Workbook(file_path, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Sheet1')
+    header_format = workbook.add_format({'bold': True, 'border': 1})
+    worksheet.write_row(0, 0, plan.get_headers(), header_format)
+    for row_num, row in enumerate(plan.iter_rows(queryset), start=1):
+        worksheet.write_row(row_num, 0, row)
+    workbook.close()
+
+
+class Echo:
+    """An object that implements just the write method of the file-like interface."""
+
+    def write(self, value):
+        return value
+
+
+def get_csv_response(plan, queryset: QuerySet, file_name: str) -> StreamingHttpResponse:
+    writer = csv.writer(Echo())
+    rows = chain([plan.get_headers()], plan.iter_rows(queryset))
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in rows),
+        content_type="text/csv"
+    )
+    response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+    return response
 
 
 def get_export_response(file_path: Path) -> Union[HttpResponse, HttpResponseNotFound]:
     if file_path.exists():
-        with open(file_path, 'rb') as fh:
-            response = HttpResponse(fh.read(), content_type="application/vnd.ms-excel")
-            response['Content-Disposition'] = 'inline; filename=' + file_path.name
-            return response
+        response = FileResponse(
+            open(file_path, 'rb'), content_type="application/vnd.ms-excel"
+        )
+        response['Content-Disposition'] = 'inline; filename=' + file_path.name
+        return response
 
     return HttpResponseNotFound()
 
 
-def get_datadict(request: WSGIRequest, columns,
-                 obj=None, queryset: QuerySet = None) -> dict:
-    datadict = dict()
-    model = _get_model(obj, queryset)
-    for attr in columns:
-        objects = _get_object_iterator(request, obj, queryset)
-    
-        value_list = []
-        for o in objects:
-            if attr == 'industry':
-                name_list = []
-                for ind in o.industry.all():
-                    name_list.append(ind.name)
-                value = ",".join(name_list)
-            else:
-                if '__' in attr:
-                    attrs = attr.split('__')
-                    rel_o = getattr(o, attrs[0])
-                    if rel_o:
-                        value = getattr(rel_o, attrs[1])
-                    else:
-                        value =''
-                else:
-                    value = getattr(o, attr)
-
-            if attr in ('birth_date', 'was_in_touch', 'lead_time'):
-                value = str(value)
-            elif attr == 'creation_date':
-                if model == Task:
-                    value = date_format(
-                        o.creation_date.date(),
-                        format="SHORT_DATE_FORMAT",
-                        use_l10n=True
-                    )
-                else:
-                    value = str(o.creation_date.date()) if value else ''
-
-            value_list.append(value)
-        
-        if model == Task:
-            attr = get_verbose_name(model, attr)
-        datadict[attr] = value_list
-    return datadict
-
-
-def _get_object_iterator(request: WSGIRequest, obj,
-                         queryset: QuerySet) -> QuerySet:
-    if obj:
-        if request.user.is_superuser:
-            objects = obj.objects.all().iterator()
-        else:
-            objects = obj.objects.filter(owner=request.user).iterator()
-    elif queryset:
-        objects = queryset.iterator()
-    else:
-        raise RuntimeError('Error: either object or queryset does not received')
-    return objects
+class ExportPlan:
+    """
+    Plan one values() query for the export columns.
+    Related objects (FK columns) are exported by their names, which are
+    loaded once per chunk of rows, as well as the names of M2M objects.
+    """
+
+    def __init__(self, model, columns: list):
+        self.columns = columns
+        self.fk_columns = {}        # column: related model
+        self.m2m_columns = {}       # column: (related model, query name)
+        self.model = model
+        self.value_fields = ['pk']
+        for attr in columns:
+            field = model._meta.get_field(attr.split('__')[0])
+            if '__' not in attr and field.many_to_many:
+                self.m2m_columns[attr] = (
+                    field.related_model, field.related_query_name()
+                )
+                continue
+            if '__' not in attr and field.is_relation:
+                self.fk_columns[attr] = field.related_model
+            self.value_fields.append(attr)
+        self.names = {attr: {} for attr in self.fk_columns}
+
+    def get_headers(self) -> list:
+        if self.model == Task:
+            return [get_verbose_name(self.model, attr) for attr in self.columns]
+        return list(self.columns)
+
+    def iter_rows(self, queryset: QuerySet) -> Iterator[list]:
+        rows = queryset.values(*self.value_fields).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE
+        )
+        while True:
+            chunk = list(islice(rows, EXPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            self._load_names(chunk)
+            m2m_names = self._get_m2m_names(chunk)
+            for row in chunk:
+                yield [self._get_value(attr, row, m2m_names) for attr in self.columns]
+
+    def _get_m2m_names(self, chunk: list) -> dict:
+        pks = [row['pk'] for row in chunk]
+        m2m_names = {}
+        for attr, (related_model, query_name) in self.m2m_columns.items():
+            names = m2m_names[attr] = {}
+            pairs = related_model._default_manager.filter(
+                **{f'{query_name}__in': pks}
+            ).values_list(query_name, 'name')
+            for pk, name in pairs:
+                names.setdefault(pk, []).append(name)
+        return m2m_names
 
+    def _get_value(self, attr: str, row: dict, m2m_names: dict):
+        if attr in self.m2m_columns:
+            return ",".join(m2m_names[attr].get(row['pk'], []))
+        value = row[attr]
+        if attr in self.fk_columns:
+            return self.names[attr].get(value, '')
+        if attr in STR_COLUMNS:
+            return '' if value is None else str(value)
+        if attr == 'creation_date':
+            if not value:
+                return ''
+            if self.model == Task:
+                return date_format(
+                    value.date(),
+                    format="SHORT_DATE_FORMAT",
+                    use_l10n=True
+                )
+            return str(value.date())
+        if value is None:
+            return ''
+        if isinstance(value, (date, time, timedelta)):
+            return str(value)
+        return value
 
-def _get_model(obj, queryset: QuerySet):
-    if obj and obj.__class__ == Task:
-        model = obj.__class__
-    elif queryset:
-        model = queryset.model
-    return model    # NOQA
+    def _load_names(self, chunk: list) -> None:
+        for attr, related_model in self.fk_columns.items():
+            names = self.names[attr]
+            ids = {row[attr] for row in chunk} - names.keys() - {None}
+            if not ids:
+                continue
+            relations = [
+                f.name for f in related_model._meta.concrete_fields
+                if f.is_relation
+            ]
+            objects = related_model._default_manager.select_related(
+                *relations
+            ).in_bulk(ids)
+            names.update((pk, str(obj)) for pk, obj in objects.items())
@@ -18,6 +18,7 @@ from django.urls import reverse
 from crm.models import Deal
 from crm.models import CrmEmail
 from crm.models import Request
+from crm.utils.helpers import crmimap_connection
 from crm.utils.helpers import get_crmimap
 from crm.utils.import_emails import get_email_headers_page
 from crm.utils.import_emails import parse_message_bytes
@@ -42,15 +43,14 @@ def select_emails_import(request: WSGIRequest):
         ]
         if uids:
             uids_str = ','.join(uids)
-            crmimap = get_crmimap(ea, 'INBOX')
-            if crmimap:
-                if action == 'delete':
-                    crmimap.delete_emails(uids_str)
-                elif action == 'spam':
-                    crmimap.move_emails_to_spam(uids_str)
-                elif action == 'seen':
-                    crmimap.mark_emails_as_read(uids_str)
-                crmimap.release()
+            with crmimap_connection(ea, 'INBOX') as crmimap:
+                if crmimap:
+                    if action == 'delete':
+                        crmimap.delete_emails(uids_str)
+                    elif action == 'spam':
+                        crmimap.move_emails_to_spam(uids_str)
+                    elif action == 'seen':
+                        crmimap.mark_emails_as_read(uids_str)
         url = request.get_full_path()
         return HttpResponseRedirect(url)
 
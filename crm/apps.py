@@ -2,6 +2,9 @@ from queue import Queue
 from tendo.singleton import SingleInstanceException
 from django.apps import AppConfig
 from django.conf import settings
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
 
 
 class CrmConfig(AppConfig):
@@ -10,22 +13,60 @@ class CrmConfig(AppConfig):
     default_auto_field = 'django.db.models.AutoField'
     
     def ready(self):
+        from crm.models import City
+        from crm.models import ClosingReason
+        from crm.models import Company
+        from crm.models import Contact
+        from crm.models import Country
+        from crm.models import CrmEmail
+        from crm.models import Deal
+        from crm.models import Industry
+        from crm.models import Lead
+        from crm.models import Output
+        from crm.models import Payment
+        from crm.models import Product
+        from crm.models import Request
+        from crm.models import Shipment
+        from crm.models import Stage
+        from crm.models.product import ProductCategory
+        from common.utils.helpers import remember_deal_handler
         from crm.utils.create_email_request import CreateEmailInquiry
+        from crm.utils.deal_status import deal_handler
+        from crm.utils.deal_status import deal_status_handler
+        from crm.utils.deal_status import request_handler
+        from crm.utils.facet_cache import bump_facet_version
+        from crm.utils.imap_idle import ImapIdleListener
         from crm.utils.import_emails import ImportEmails
         from crm.utils.manage_imaps import CrmImapManager
+        from crm.utils.match_keys import match_keys_handler
         from crm.utils.restore_imap_emails import RestoreImapEmails
 
+        for model in (Company, Contact, Lead):
+            post_save.connect(match_keys_handler, sender=model)
+        for model in (CrmEmail, Payment, Output, Shipment):
+            pre_save.connect(remember_deal_handler, sender=model)
+            for signal in (post_save, post_delete):
+                signal.connect(deal_status_handler, sender=model)
+        post_save.connect(deal_handler, sender=Deal)
+        post_save.connect(request_handler, sender=Request)
+        for model in (City, ClosingReason, Company, Contact, Country, Deal,
+                      Industry, Lead, Output, Product, ProductCategory,
+                      Request, Shipment, Stage):
+            for signal in (post_save, post_delete):
+                signal.connect(bump_facet_version, sender=model)
+
         ea_queue = Queue()
         self.inq_eml_queue = Queue(2)
         self.eml_queue = Queue(4)                           # NOQA
         self.mci = CrmImapManager(ea_queue)                 # NOQA
-        self.mci.start()
         self.im = ImportEmails(ea_queue, self.eml_queue)    # NOQA
-        self.im.start()
+        self.iil = ImapIdleListener(ea_queue)               # NOQA
         rim = RestoreImapEmails(self.eml_queue, self.inq_eml_queue)
-        rim.start()
         cei = CreateEmailInquiry(self.inq_eml_queue)
-        cei.start()
+        if not settings.BACKGROUND_THREADS:
+            return
+        for thread in (self.mci, self.im, self.iil, rim, cei):
+            thread.start()
         if not settings.TESTING:
             from crm.utils.rates_loader import RatesLoader
             try:
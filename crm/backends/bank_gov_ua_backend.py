@@ -24,16 +24,27 @@ class BankGovUaBackend(BaseBackend):
         self.currency = currency
         self.marketing_currency = marketing_currency
         self.rate_date = rate_date if rate_date else date.today()
-        self.data = self.get_data(marketing_currency)
+        self.data = self.get_data()
         self.marketing_currency_rate = self.get_marketing_currency_rate()
 
-    def get_data(self, currency: str = 'USD') -> list:
+    def get_data(self, currency: str = '') -> list:
+        """
+        Get the rates of the date. Without the currency, the API returns
+        the rates of all currencies, so the date table is fetched once.
+        """
+        data = self.load_cached_data(currency)
+        if data is not None:
+            return data
         date_str = date_format(self.rate_date, format=self.date_format, use_l10n=False)
-        params = {'date': date_str, 'valcode': currency, 'json': ''}
+        params = {'date': date_str, 'json': ''}
+        if currency:
+            params['valcode'] = currency
         try:
             response = requests.get(self.url, params=params)
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            self.save_cached_data(data, currency)
+            return data
         except JSONDecodeError:
             self.error = f"Failed to decode JSON response from API. Status: {response.status_code}. Response text: {response.text[:100]}"
             return []
@@ -41,23 +52,33 @@ class BankGovUaBackend(BaseBackend):
             self.error = f"API request failed: {e}"
             return []
 
+    def is_complete_data(self, data, name: str = '') -> bool:
+        """
+        The table must have the rate of the currency or,
+        if it is the table of all currencies, of the marketing currency.
+        """
+        currency_code = name or self.marketing_currency
+        if currency_code == self.state_currency:
+            return bool(data)
+        return isinstance(data, list) and any(
+            isinstance(row, dict) and row.get('cc') == currency_code
+            for row in data
+        )
+
     def extract_rate_from_data(self, data: list, currency_code: str):
         """Extracts rate from API data list, handles errors, returns 1 on failure."""
         if self.error:
             return 1
         try:
-            return data[0]['rate']
-        except (IndexError, KeyError, TypeError) as e:
-            self.error = f"Error processing API data for {currency_code}: {e}. Data received: {data}"
+            return next(
+                row['rate'] for row in data if row.get('cc') == currency_code
+            )
+        except (StopIteration, AttributeError, KeyError, TypeError) as e:
+            self.error = f"Error processing API data for {currency_code}: {e!r}. Data received: {str(data)[:100]}"
             return 1
 
     def get_marketing_currency_rate(self):
         return self.extract_rate_from_data(self.data, self.marketing_currency)
 
     def get_rate_to_state_currency(self, currency: str = 'USD'):
-        if self.error:
-            return 1
-
-
-        currency_data = self.get_data(currency)
-        return self.extract_rate_from_data(currency_data, currency)
+        return self.extract_rate_from_data(self.data, currency)
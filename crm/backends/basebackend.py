@@ -1,13 +1,17 @@
+import json
 from abc import ABC, abstractmethod
 from datetime import date
+from pathlib import Path
 from typing import Tuple
+from django.conf import settings
 from django.core.mail import mail_admins
 
 STATE_CURRENCY = 'EUR'
 
 
 class BaseBackend(ABC):
-    
+    from_cache = False
+
     @classmethod
     def get_state_currency(cls):
         return STATE_CURRENCY
@@ -37,23 +41,65 @@ class BaseBackend(ABC):
     def get_rate_to_state_currency(self, currency: str = 'USD'):
         pass
 
-    def get_rates(self) -> Tuple[float, float, str]:
+    def get_cache_file(self, name: str) -> Path:
+        return Path(settings.RATES_CACHE_PATH) / type(self).__name__ / \
+            f'{self.rate_date.isoformat()}{"-" + name if name else ""}.json'
+
+    def is_complete_data(self, data, name: str = '') -> bool:
+        """Check that the data can be cached: it has the rates needed."""
+        return bool(data)
+
+    def load_cached_data(self, name: str = ''):
+        """Get the data saved for the past rate date or None."""
+        if not self.rate_date or self.rate_date >= date.today():
+            return None
+        try:
+            data = json.loads(self.get_cache_file(name).read_text())
+        except (OSError, ValueError):
+            return None
+        if not self.is_complete_data(data, name):
+            return None
+        self.from_cache = True
+        return data
+
+    def save_cached_data(self, data, name: str = '') -> None:
+        """Save the data of the past rate date, it will not change."""
+        if not self.rate_date or self.rate_date >= date.today():
+            return
+        if not self.is_complete_data(data, name):
+            return
+        file = self.get_cache_file(name)
+        try:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_text(json.dumps(data))
+        except OSError:
+            pass
+
+    def get_rates(self, currency: str = '',
+                  notify: bool = True) -> Tuple[float, float, str]:
+        """
+        Get the rates of the currency (by default, of the backend currency)
+        to the state and marketing currencies.
+        The error is mailed to the admins unless notify is False.
+        """
+        currency = currency or self.currency
         if not self.error:
-            if self.currency == self.state_currency:
+            if currency == self.state_currency:
                 rate_to_state_currency = 1
                 rate_to_marketing_currency_rate = 1 / self.marketing_currency_rate
-            elif self.currency == self.marketing_currency:
+            elif currency == self.marketing_currency:
                 rate_to_state_currency = self.marketing_currency_rate
                 rate_to_marketing_currency_rate = 1
             else:
-                rate_to_state_currency = self.get_rate_to_state_currency(self.currency)
+                rate_to_state_currency = self.get_rate_to_state_currency(currency)
                 rate_to_marketing_currency_rate = rate_to_state_currency / self.marketing_currency_rate
             if not self.error:
                 return rate_to_state_currency, rate_to_marketing_currency_rate, self.error
 
-        mail_admins(
-            "Error getting currency rates",
-            f"self.currency {self.currency}. Error: {self.error}",
-            fail_silently=False,
-        )
+        if notify:
+            mail_admins(
+                "Error getting currency rates",
+                f"self.currency {currency}. Error: {self.error}",
+                fail_silently=True,
+            )
         return 1, 1, self.error
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from crm.models import Deal
+from crm.utils.deal_status import update_deal_statuses
+
+
+class Command(BaseCommand):
+    help = "Recalculate the status flags shown in the deal list"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--deal', action='append', type=int, dest='deals',
+            help="Deal id. By default, all deals."
+        )
+
+    def handle(self, *args, **options):
+        deal_ids = options['deals'] or list(
+            Deal.objects.values_list('id', flat=True)
+        )
+        update_deal_statuses(deal_ids)
+        self.stdout.write(f"Updated deals: {len(deal_ids)}")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0009_request_case'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crmemail',
+            name='message_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=40),
+        ),
+    ]
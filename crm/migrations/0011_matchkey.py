@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:20
+
+import re
+from email.utils import getaddresses
+import django.db.models.deletion
+from django.db import migrations, models
+
+PHONE_MATCH_DIGITS = 9
+phone_separators = re.compile(r'[,;]')
+
+
+def get_match_keys(obj) -> set:
+    """Get (kind, value) pairs of the match keys of an object."""
+    keys = set()
+    for field in ('email', 'secondary_email'):
+        value = getattr(obj, field, '') or ''
+        for _, addr in getaddresses([value.replace(';', ',')]):
+            if '@' in addr:
+                email = addr.strip().lower()
+                keys.add(('email', email))
+                keys.add(('domain', email.split('@')[-1]))
+    for field in ('phone', 'other_phone', 'mobile'):
+        for phone in phone_separators.split(getattr(obj, field, '') or ''):
+            digits = ''.join(i for i in phone if i.isdigit())
+            if len(digits) > 4:
+                keys.add(('phone', digits[-PHONE_MATCH_DIGITS:]))
+    return keys
+
+
+def fill_match_keys(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    MatchKey = apps.get_model('crm', 'MatchKey')
+    for model_name in ('Company', 'Contact', 'Lead'):
+        model = apps.get_model('crm', model_name)
+        content_type, _ = ContentType.objects.get_or_create(
+            app_label='crm', model=model_name.lower()
+        )
+        fields = [
+            f.name for f in model._meta.concrete_fields
+            if f.name in ('email', 'secondary_email', 'phone', 'other_phone', 'mobile')
+        ]
+        batch = []
+        for obj in model.objects.only('id', *fields).iterator(chunk_size=1000):
+            batch.extend(
+                MatchKey(
+                    content_type=content_type, object_id=obj.id,
+                    kind=kind, value=value
+                )
+                for kind, value in get_match_keys(obj)
+            )
+            if len(batch) >= 1000:
+                MatchKey.objects.bulk_create(batch)
+                batch = []
+        MatchKey.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('crm', '0010_crmemail_message_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(db_index=True)),
+                ('kind', models.CharField(choices=[('domain', 'Email domain'), ('email', 'Email'), ('phone', 'Phone')], max_length=6)),
+                ('value', models.CharField(help_text='Lowercased email address or domain, last digits of phone number', max_length=200)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Match key',
+                'verbose_name_plural': 'Match keys',
+                'indexes': [models.Index(fields=['content_type', 'kind', 'value'], name='crm_matchke_content_6dbf3d_idx')],
+            },
+        ),
+        migrations.RunPython(fill_match_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def fill_deal_statuses(apps, schema_editor):
+    CrmEmail = apps.get_model('crm', 'CrmEmail')
+    Deal = apps.get_model('crm', 'Deal')
+    DealStatus = apps.get_model('crm', 'DealStatus')
+    Output = apps.get_model('crm', 'Output')
+    Payment = apps.get_model('crm', 'Payment')
+    newest = CrmEmail.objects.filter(
+        deal=OuterRef('pk'),
+        trash=False
+    ).order_by('-creation_date')
+    newest_inquiry = newest.filter(inquiry=True)
+    outputs = Output.objects.filter(deal=OuterRef('pk'))
+    deals = Deal.objects.annotate(
+        unanswered_email=Coalesce(
+            Subquery(newest.values('incoming')[:1]), Value(False)
+        ),
+        unanswered_inquiry=Coalesce(
+            Subquery(newest.values('inquiry')[:1]), Value(False)
+        ),
+        inquiry_date=Subquery(newest_inquiry.values('creation_date')[:1]),
+        inquiry_subsequent=Coalesce(
+            Subquery(newest_inquiry.values('request__subsequent')[:1]),
+            Value(False)
+        ),
+        received_payment=Exists(Payment.objects.filter(
+            deal=OuterRef('pk'),
+            status='r'      # received
+        )),
+        has_product=Exists(outputs),
+        empty_shipping_date=Exists(outputs.filter(shipping_date__isnull=True)),
+        first_shipping_date=Subquery(outputs.filter(
+            shipping_date__isnull=False
+        ).order_by('shipping_date').values('shipping_date')[:1]),
+    )
+    deal_ids = list(Deal.objects.values_list('id', flat=True))
+    for i in range(0, len(deal_ids), BATCH_SIZE):
+        values = deals.filter(id__in=deal_ids[i:i + BATCH_SIZE]).values(
+            'id', 'unanswered_email', 'unanswered_inquiry', 'inquiry_date',
+            'inquiry_subsequent', 'received_payment', 'has_product',
+            'empty_shipping_date', 'first_shipping_date'
+        )
+        DealStatus.objects.bulk_create(
+            [DealStatus(deal_id=v.pop('id'), **v) for v in values]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0011_matchkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DealStatus',
+            fields=[
+                ('deal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='status', serialize=False, to='crm.deal')),
+                ('unanswered_email', models.BooleanField(default=False, help_text='The newest email is incoming')),
+                ('unanswered_inquiry', models.BooleanField(default=False, help_text='The newest email is an inquiry')),
+                ('inquiry_date', models.DateTimeField(blank=True, null=True)),
+                ('inquiry_subsequent', models.BooleanField(default=False)),
+                ('received_payment', models.BooleanField(default=False)),
+                ('has_product', models.BooleanField(default=False)),
+                ('empty_shipping_date', models.BooleanField(default=False)),
+                ('first_shipping_date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Deal status',
+                'verbose_name_plural': 'Deal statuses',
+            },
+        ),
+        migrations.RunPython(fill_deal_statuses, migrations.RunPython.noop),
+    ]
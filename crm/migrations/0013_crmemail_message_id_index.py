@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0012_dealstatus'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='crmemail',
+            name='message_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=200),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:54
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0013_crmemail_message_id_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='crmemail',
+            name='message_hash',
+        ),
+    ]
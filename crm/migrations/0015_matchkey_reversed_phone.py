@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:59
+
+from django.db import migrations, models
+from django.db.models.functions import Reverse
+
+
+def reverse_phone_keys(apps, schema_editor):
+    MatchKey = apps.get_model('crm', 'MatchKey')
+    MatchKey.objects.filter(kind='phone').update(value=Reverse('value'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('crm', '0014_remove_crmemail_message_hash'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='matchkey',
+            name='crm_matchke_content_6dbf3d_idx',
+        ),
+        migrations.AlterField(
+            model_name='matchkey',
+            name='value',
+            field=models.CharField(help_text='Lowercased email address or domain, reversed last digits of phone number', max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='matchkey',
+            index=models.Index(fields=['content_type', 'kind', 'value'], name='crm_matchkey_value_idx', opclasses=['int4_ops', 'varchar_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.RunPython(reverse_phone_keys, reverse_phone_keys),
+    ]
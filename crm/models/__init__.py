@@ -10,10 +10,12 @@ from crm.models.payment import Rate
 from crm.models.lead import Lead
 from crm.models.contact import Contact
 from crm.models.deal import Deal
+from crm.models.deal_status import DealStatus
 from crm.models.crmemail import CrmEmail
 from crm.models.company import Company
 from crm.models.request import Request
 from crm.models.tag import Tag
+from crm.models.match_key import MatchKey
 from crm.models.product import Product
 from crm.models.output import Output
 from crm.models.output import Shipment
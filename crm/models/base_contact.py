@@ -1,3 +1,4 @@
+from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
 from django.db import models
@@ -173,6 +174,7 @@ class BaseCounterparty(models.Model):
         verbose_name=_("Assigned to"),
         related_name="%(app_label)s_%(class)s_owner_related",
     )
+    match_keys = GenericRelation('MatchKey')
 
     def delete(self, *args, **kwargs):
         content_type = ContentType.objects.get_for_model(self)
@@ -77,7 +77,7 @@ class CrmEmail(BaseEml):
     )
     message_id = models.CharField(
         max_length=200, null=False, blank=True,
-        default='',
+        default='', db_index=True,
     )
     files = GenericRelation('common.TheFile')
 
@@ -91,3 +91,14 @@ class CrmEmail(BaseEml):
         if self.contact and not self.company:
             self.company_id = self.contact.company_id
         super().save(*args, **kwargs)
+
+    @staticmethod
+    def get_existing_message_ids(email_host_user: str, message_ids) -> set:
+        """Return those of message_ids that are already saved for the mailbox."""
+        message_ids = {x for x in message_ids if x}
+        if not message_ids:
+            return set()
+        return set(CrmEmail.objects.filter(
+            message_id__in=message_ids,
+            email_host_user=email_host_user
+        ).values_list('message_id', flat=True))
@@ -0,0 +1,35 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class DealStatus(models.Model):
+    """
+    Flags of a deal shown in the deal list.
+    They are kept up to date on changes of the deal emails,
+    payments and products, so the list does not compute them.
+    """
+    class Meta:
+        verbose_name = _("Deal status")
+        verbose_name_plural = _("Deal statuses")
+
+    deal = models.OneToOneField(
+        'crm.Deal', on_delete=models.CASCADE,
+        primary_key=True, related_name='status'
+    )
+    unanswered_email = models.BooleanField(
+        default=False,
+        help_text=_("The newest email is incoming")
+    )
+    unanswered_inquiry = models.BooleanField(
+        default=False,
+        help_text=_("The newest email is an inquiry")
+    )
+    inquiry_date = models.DateTimeField(blank=True, null=True)
+    inquiry_subsequent = models.BooleanField(default=False)
+    received_payment = models.BooleanField(default=False)
+    has_product = models.BooleanField(default=False)
+    empty_shipping_date = models.BooleanField(default=False)
+    first_shipping_date = models.DateField(blank=True, null=True)
+
+    def __str__(self):
+        return str(self.deal_id)
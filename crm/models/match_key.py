@@ -0,0 +1,44 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class MatchKey(models.Model):
+    """
+    Normalized email address, email domain or phone number
+    of Company, Contact or Lead.
+    Allows finding them by exact values instead of scanning the tables.
+    """
+    class Meta:
+        verbose_name = _("Match key")
+        verbose_name_plural = _("Match keys")
+        indexes = [
+            # the pattern operator class lets PostgreSQL use the index
+            # for the prefix lookups of short phone numbers
+            models.Index(
+                fields=['content_type', 'kind', 'value'],
+                name='crm_matchkey_value_idx',
+                opclasses=['int4_ops', 'varchar_ops', 'varchar_pattern_ops']
+            ),
+        ]
+
+    DOMAIN = 'domain'
+    EMAIL = 'email'
+    PHONE = 'phone'
+    KIND_CHOICES = (
+        (DOMAIN, 'Email domain'),
+        (EMAIL, 'Email'),
+        (PHONE, 'Phone'),
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField(db_index=True)
+    content_object = GenericForeignKey('content_type', 'object_id')
+    kind = models.CharField(max_length=6, choices=KIND_CHOICES)
+    value = models.CharField(
+        max_length=200,
+        help_text=_("Lowercased email address or domain, reversed last digits of phone number")
+    )
+
+    def __str__(self):
+        return f'{self.kind}: {self.value}'
@@ -1,4 +1,3 @@
-from email.utils import parseaddr
 from django.apps import apps
 from django.db import models
 from django.conf import settings
@@ -8,9 +7,9 @@ from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 
 from common.models import Base1
-from common.utils.helpers import add_phone_q_params
 from common.utils.helpers import get_department_id
 from crm.utils.helpers import get_email_domain
+from crm.utils.match_keys import get_match_q_params
 from crm.utils.ticketproc import new_ticket
 
 
@@ -170,17 +169,12 @@ class Request(Base1):
         return f"{self.first_name} {self.middle_name} {self.last_name}"
 
     def find_contact_or_lead(self) -> bool:
-        phone_params = email_params = models.Q()
         contacts1 = contacts2 = contacts3 = None
-        if self.phone:
-            phone_params = add_phone_q_params(self.phone)
-        if self.email:
-            _, email = parseaddr(self.email)
-            email_params = models.Q(email__icontains=email)
-            email_params |= models.Q(secondary_email__icontains=email)
         contact_model = apps.get_model('crm', 'Contact')
         lead_model = apps.get_model('crm', 'Lead')
         for model, attr in ((contact_model, 'contact'), (lead_model, 'lead')):
+            email_params = get_match_q_params(model, email=self.email)
+            phone_params = get_match_q_params(model, phone=self.phone)
             args = []
             contacts1_len = contacts2_len = contacts3_len = 0
             kwargs = {"first_name__iexact": self.first_name}
@@ -276,10 +270,8 @@ class Request(Base1):
             companies1_len = companies2_len = companies3_len = companies4_len = 0
             company_model = apps.get_model('crm', 'Company')
             contact_model = apps.get_model('crm', 'Contact')
-            if self.email:
-                realname, email = parseaddr(self.email)  # NOQA
-                contact_email_param = models.Q(email__icontains=email)
-                contact_email_param |= models.Q(secondary_email__icontains=email)
+            contact_email_param = get_match_q_params(contact_model, email=self.email)
+            if contact_email_param:
                 companies1 = contact_model.objects.filter(
                     contact_email_param
                 ).values_list('company_id', flat=True)
@@ -290,8 +282,8 @@ class Request(Base1):
                         self.verification_required = True
                     return
 
-            if self.phone:
-                contact_phone_param = add_phone_q_params(self.phone)
+            contact_phone_param = get_match_q_params(contact_model, phone=self.phone)
+            if contact_phone_param:
                 if companies1_len > 1:
                     companies2 = contact_model.objects.filter(
                         contact_phone_param, company_id__in=companies1
@@ -352,7 +344,7 @@ class Request(Base1):
                     email_domain = get_email_domain(self.email)
                     if email_domain:
                         self.company = company_model.objects.filter(
-                            email__icontains=f"@{email_domain}"
+                            get_match_q_params(company_model, domain=email_domain)
                         ).first()
                         if self.company:
                             self.verification_required = True
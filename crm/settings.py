@@ -46,6 +46,19 @@ DEAL_COLUMNS = [
 FIRST_STEP = _('Establish the first contact with the client.')
 
 
+# Import of objects from Excel file
+IMPORT_BATCH_SIZE = 500            # objects per bulk INSERT (and transaction)
+IMPORT_PROGRESS_TIMEOUT = 24 * 60 * 60   # seconds the import result is kept in cache
+
+# Time (in seconds) to keep the lookups of the list filters (cities, countries,
+# related objects) in the cache. They are also dropped when these objects change.
+FACET_CACHE_TIMEOUT = 60
+
+
+# Phone numbers match if their last digits are equal
+PHONE_MATCH_DIGITS = 9
+
+
 CONVERT_REQUIRED_FIELDS = (
     'first_name', 'email',      # 'last_name'
     'company_name', 'company_email'
@@ -60,5 +73,10 @@ KEEP_TICKET = mark_safe(
 # For IMAP connection
 REUSE_IMAP_CONNECTION = False   # True - a little faster but less stable (with some IMAP servers)
 IMAP_CONNECTION_IDLE = 4320     # minutes (3 days)
+IMAP_POOL_SIZE = 2              # maximum of connections per email account
 IMAP_NOOP_PERIOD = 4 * 60       # seconds
+IMAP_IDLE = False               # True - import emails when the server reports them (IMAP IDLE)
+IMAP_SENT_IMPORT_PERIOD = 20 * 60   # seconds, with IMAP_IDLE the Sent box is imported periodically
 IMAP_DEBUG_LEVEL = 0
+IMAP_IMPORT_BATCH_SIZE = 50     # UIDs per FETCH command
+IMAP_IMPORT_WORKERS = 4         # threads importing emails, each serves its own accounts
@@ -15,6 +15,7 @@ from crm.models import Company
 from crm.models import Contact
 from crm.models import Lead
 from crm.utils.create_objects import create_objects
+from crm.utils.create_objects import get_import_result
 from common.site.crmsite import BaseSite
 
 
@@ -95,7 +96,8 @@ class CrmAdminSite(BaseSite):
             crm_site.each_context(request),
             opts=kwargs['object']._meta,    # NOQA
             form=form,
-            field_list=kwargs['columns']
+            field_list=kwargs['columns'],
+            import_result=get_import_result(request.user.id)
         )
         return TemplateResponse(
             request, "crm/import_objects.html", extra_context
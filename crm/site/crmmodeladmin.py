@@ -52,6 +52,7 @@ from crm.utils.make_massmail_form import get_massmail_form
 from massmail.admin_actions import BAD_RESULT_MSG
 from massmail.admin_actions import have_massmail_accounts
 from massmail.models import MailingOut
+from massmail.models import MailingOutRecipient
 
 _thread_local = threading.local()
 _fields = {
@@ -389,11 +390,11 @@ class CrmModelAdmin(BaseModelAdmin):
         if obj.massmail:
             if not obj.disqualified:
                 content_type = ContentType.objects.get_for_model(obj.__class__)
-                id_str = str(obj.id)
-                is_mcs = MailingOut.objects.filter(
-                    content_type=content_type,
-                    successful_ids__regex=fr"(^|,){id_str}(,|$)"
-                )
+                is_mcs = MailingOutRecipient.objects.filter(
+                    mailing_out__content_type=content_type,
+                    object_id=obj.id,
+                    status=MailingOutRecipient.SUCCESSFUL
+                ).exists()
                 if not is_mcs:
                     return mark_safe(
                         did_not_receive_icon.format(did_not_receive_title)
@@ -3,12 +3,14 @@ from django.conf import settings
 from django.contrib import admin
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case
 from django.db.models import Q
 from django.db.models import OuterRef
-from django.db.models import Subquery
 from django.db.models import Sum
 from django.db.models import Exists
 from django.db.models import F
+from django.db.models import Value
+from django.db.models import When
 from django.http import HttpResponseRedirect
 from django.template.defaultfilters import truncatechars
 from django.utils import timezone
@@ -18,7 +20,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.translation import gettext
 from django.urls import reverse
 
-from chat.models import ChatMessage
+from chat.models import UnreadChat
 from common.admin import FileInline
 from common.models import Department
 from common.utils.helpers import add_chat_context
@@ -30,7 +32,6 @@ from common.utils.helpers import popup_window
 from common.utils.remind_me import remind_me
 from crm.forms.admin_forms import DealForm
 from crm.models import ClosingReason
-from crm.models import CrmEmail
 from crm.models import Deal
 from crm.models import Output
 from crm.models import Payment
@@ -213,46 +214,29 @@ class DealAdmin(CrmModelAdmin):
 
     def get_changelist_instance(self, request):
         cl = super().get_changelist_instance(request)
-        newest = CrmEmail.objects.filter(
-            deal=OuterRef('pk'),
-            trash=False
-        ).order_by('-creation_date')
-        unread = ChatMessage.objects.filter(
+        unread = UnreadChat.objects.filter(
+            user=request.user,
             content_type=ContentType.objects.get_for_model(Deal),
-            object_id=OuterRef('pk'),
-            recipients=request.user
-        ).values('id')
-        received_payments = Payment.objects.filter(
-            deal=OuterRef('pk'),
-            status=Payment.RECEIVED,
-        ).values('id')
-        product = Output.objects.filter(
-            deal=OuterRef('pk')
-        ).values('id')
+            object_id=OuterRef('pk')
+        )
         kwargs = {
-            'is_unanswered_email': Subquery(
-                newest.values('incoming')[:1]
-            ),
-            'is_unanswered_inquiry': Subquery(
-                newest.values('inquiry')[:1]
-            ),
+            'is_unanswered_email': F('status__unanswered_email'),
+            'is_unanswered_inquiry': F('status__unanswered_inquiry'),
+            'inquiry_date': F('status__inquiry_date'),
+            'inquiry_subsequent': F('status__inquiry_subsequent'),
             'is_unread_chat': Exists(unread),
-            'is_received_payment': Exists(received_payments),
-            'is_no_product': ~Exists(product),
+            'is_received_payment': F('status__received_payment'),
+            'is_no_product': Case(
+                When(status__has_product=True, then=Value(False)),
+                default=Value(True)
+            ),
         }
         if settings.SHIPMENT_DATE_CHECK:
             today = get_today()
-            expired_shipment_date = Output.objects.filter(
-                deal=OuterRef('pk'),
-                shipping_date__lt=today
-            ).values('id')
-            empty_date = Output.objects.filter(
-                deal=OuterRef('pk'),
-                shipping_date__isnull=True
-            ).values('id')
-            kwargs['is_empty_shipping_date'] = Exists(empty_date)
-            kwargs['is_expired_shipment_date'] = Exists(
-                expired_shipment_date
+            kwargs['is_empty_shipping_date'] = F('status__empty_shipping_date')
+            kwargs['is_expired_shipment_date'] = Case(
+                When(status__first_shipping_date__lt=today, then=Value(True)),
+                default=Value(False)
             )
             kwargs['is_goods_shipped'] = F('stage__goods_shipped')
 
@@ -605,15 +589,8 @@ class DealAdmin(CrmModelAdmin):
     def marks(self, instance):
         icons, icon, days = '', '', 0
         if getattr(instance, 'is_unanswered_inquiry', False):
-            inquiry = CrmEmail.objects.filter(
-                deal=instance,
-                inquiry=True,
-                trash=False
-            ).order_by('-creation_date').annotate(
-                subsequent=F('request__subsequent')
-            ).values('creation_date', 'subsequent').first()
-            if not inquiry['subsequent']:
-                days = (timezone.now() - inquiry['creation_date']).days
+            if not instance.inquiry_subsequent and instance.inquiry_date:
+                days = (timezone.now() - instance.inquiry_date).days
             title = _(
                 'I have been waiting for an answer to my request for %d days') % days
             if days == 2:
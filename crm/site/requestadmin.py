@@ -33,6 +33,7 @@ from crm.settings import FIRST_STEP
 from crm.site.crmmodeladmin import CrmModelAdmin
 from crm.site.dealadmin import add_shopping_cart_icon
 from crm.utils.check_city import check_city
+from crm.utils.deal_status import update_deal_statuses
 from crm.utils.admfilters import ByOwnerFilter
 from crm.utils.admfilters import ScrollRelatedOnlyFieldListFilter
 from crm.utils.helpers import get_counterparty_header
@@ -343,6 +344,7 @@ class RequestAdmin(CrmModelAdmin):
                 CrmEmail.objects.filter(
                     ticket=obj.ticket, deal__isnull=True
                 ).update(deal=d)
+                update_deal_statuses([d.id])
                 if obj.deal:
                     _notify_deal_owners(request, obj)
 
@@ -2,8 +2,6 @@ from dateutil.relativedelta import relativedelta
 from django.contrib import admin
 from django.contrib.admin import SimpleListFilter
 from django.contrib.admin.filters import DateFieldListFilter
-from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import CharField
 from django.db.models import Exists
 from django.db.models import OuterRef
@@ -24,7 +22,9 @@ from crm.models import Product
 from crm.models import Tag
 from crm.models import Output
 from crm.models.country import City
-from massmail.models import MassContact
+from crm.models.country import Country
+from crm.utils.facet_cache import get_cached_facet
+from massmail.utils.helpers import vip_status_exists
 
 # Lookup parameters must be removed from the querystring when
 # the corresponding filter is executed!
@@ -37,24 +37,27 @@ class ByCityFilter(SimpleListFilter):
 
     def lookups(self, request, model_admin):
         result = []
-        qs = model_admin.get_queryset(request)
         country_id = request.GET.get("country__id__exact")
-        if country_id:
-            qs = qs.filter(country_id=country_id)
-        is_null = qs.filter(city_id=None).exists()
-        if is_null:
-            qs = qs.exclude(city_id=None)
+        params = {'country_id': country_id} if country_id else {}
+
+        def get_cities():
+            qs = model_admin.get_queryset(request).filter(**params)
+            return list(qs.values_list(
+                'city_id', 'city__name'
+            ).order_by('city__name').distinct())
 
-        cities = qs.values_list(
-            'city_id', 'city__name'
-        ).order_by('city__name').distinct()
+        cities = get_cached_facet(
+            request, 'city', (model_admin.model, City), get_cities, params
+        )
+        is_null = any(c[0] is None for c in cities)
+        cities = [c for c in cities if c[0] is not None]
         city_id = request.GET.get(self.parameter_name)
 
         if city_id and city_id != 'IsNull':
-            try:
-                city = cities.get(city_id=city_id)
-                cities = cities.exclude(city_id=city_id)
-            except ObjectDoesNotExist:
+            city = next((c for c in cities if str(c[0]) == city_id), None)
+            if city:
+                cities.remove(city)
+            else:
                 city = City.objects.filter(
                     id=city_id
                 ).values_list('id', 'name').first()
@@ -63,7 +66,7 @@ class ByCityFilter(SimpleListFilter):
         elif city_id == 'IsNull':
             result.append(('IsNull', LEADERS))
 
-        result.extend([*cities])
+        result.extend(cities)
         if is_null:
             result.append(('IsNull', LEADERS))
 
@@ -91,23 +94,10 @@ class ByVIPStatus(SimpleListFilter):
         )
 
     def queryset(self, request, queryset):
-        if self.value():
-            content_type = ContentType.objects.get_for_model(queryset.model)
-            ids = queryset.values_list('id', flat=True)
-            mcs = MassContact.objects.filter(
-                object_id__in=ids,
-                content_type=content_type,
-            )
         if self.value() == 'yes':
-            vip_ids = mcs.filter(
-                email_account__main=True
-            ).values_list('object_id', flat=True)
-            return queryset.filter(id__in=list(vip_ids))
+            return queryset.filter(vip_status_exists(queryset.model))
         if self.value() == 'no':
-            non_vip_ids = mcs.filter(
-                email_account__main=False
-            ).values_list('object_id', flat=True)
-            return queryset.filter(id__in=list(non_vip_ids))
+            return queryset.filter(vip_status_exists(queryset.model, False))
         return queryset
 
 
@@ -149,35 +139,37 @@ class ByCountryFilter(ChoicesSimpleListFilter):
 
     def lookups(self, request, model_admin):
         result = [('all', _('All'))]
-        department_id = request.user.department_id
-        default_country = None
-        if department_id:
-            default_country = Department.objects.get(
-                id=department_id).default_country
-        qs = model_admin.get_queryset(request)
+        default_country = self.get_default_country(request)
         country_id = request.GET.get(self.parameter_name)
-        is_null = qs.filter(country_id=None).exists()
-        if is_null:
-            qs = qs.exclude(country_id=None)
 
-        countries = qs.distinct().annotate(
-            str_id=Cast('country_id', output_field=CharField())
-        ).values_list(
-            'str_id', 'country__name'
-        ).order_by('country__name')
+        def get_countries():
+            qs = model_admin.get_queryset(request)
+            return [
+                (None if pk is None else str(pk), name)
+                for pk, name in qs.values_list(
+                    'country_id', 'country__name'
+                ).order_by('country__name').distinct()
+            ]
+
+        countries = get_cached_facet(
+            request, 'country', (model_admin.model, Country), get_countries
+        )
+        is_null = any(c[0] is None for c in countries)
+        countries = [c for c in countries if c[0] is not None]
 
         if country_id not in (None, 'all', 'IsNull'):
-            country = countries.get(country_id=country_id)
-            countries = countries.exclude(country_id=country_id)
-            result.append(country)
+            country = next((c for c in countries if c[0] == country_id), None)
+            if country:
+                countries.remove(country)
+                result.append(country)
 
         elif country_id is None:
             if default_country:
-                result.append((None, default_country.name))
+                result.append((None, default_country[1]))
             else:
                 result = [(None, _('All'))]
 
-        result.extend([*countries])
+        result.extend(countries)
         if is_null or country_id == 'IsNull':
             result.append(('IsNull', LEADERS))
 
@@ -185,14 +177,10 @@ class ByCountryFilter(ChoicesSimpleListFilter):
 
     def queryset(self, request, queryset):
         value = self.value()
-        department_id = request.user.department_id
-        default_country_id = None
         if not value:
-            if department_id:
-                default_country_id = Department.objects.get(
-                    id=department_id).default_country_id
-            if default_country_id:
-                return queryset.filter(country_id=default_country_id)
+            default_country = self.get_default_country(request)
+            if default_country:
+                return queryset.filter(country_id=default_country[0])
             return queryset
 
         if value == 'all':
@@ -203,6 +191,18 @@ class ByCountryFilter(ChoicesSimpleListFilter):
 
         return queryset.filter(country_id=int(self.value()))
 
+    def get_default_country(self, request):
+        """Get (id, name) of the default country of the user department once."""
+        if not hasattr(self, '_default_country'):
+            department_id = request.user.department_id
+            self._default_country = Department.objects.filter(
+                id=department_id,
+                default_country__isnull=False
+            ).values_list(
+                'default_country_id', 'default_country__name'
+            ).first() if department_id else None
+        return self._default_country
+
 
 class CrmDateFieldListFilter(DateFieldListFilter):
 
@@ -261,6 +261,16 @@ class CrmDateFieldListFilter(DateFieldListFilter):
 class ScrollRelatedOnlyFieldListFilter(admin.RelatedOnlyFieldListFilter):
     template = "crm/filter_scroll.html"
 
+    def field_choices(self, field, request, model_admin):
+        return get_cached_facet(
+            request,
+            self.field_path,
+            (model_admin.model, field.related_model),
+            lambda: super(
+                ScrollRelatedOnlyFieldListFilter, self
+            ).field_choices(field, request, model_admin)
+        )
+
 
 class TagFilter(SimpleListFilter):
     title = _('Tag')
@@ -1,6 +1,5 @@
 from email.utils import parseaddr
 from django.db.models import CharField
-from django.db.models import Q
 from django.db.models import Subquery
 from django.db.models import Value
 from django.db.models.functions import Coalesce
@@ -10,6 +9,7 @@ from crm.models import Contact
 from crm.models import Company
 from crm.models import CrmEmail
 from crm.models import Lead
+from crm.utils.match_keys import get_match_q_params
 
 
 def get_counterparty_name(email: CrmEmail) -> str:
@@ -26,21 +26,21 @@ def get_counterparty_name(email: CrmEmail) -> str:
     address_list = addresses.split(",")
     name, email_addr = parseaddr(address_list.pop(0))
     if not name:
-        email_params = Q(email__icontains=email_addr)
-        email_params |= Q(secondary_email__icontains=email_addr)
         func = Concat(
             "first_name", 
             Value(" "),
             "last_name",
             output_field=CharField()
         )
-        contact = Contact.objects.filter(email_params).annotate(
-            full_name=func
+        contact = Contact.objects.filter(
+            get_match_q_params(Contact, email=email_addr)
+        ).annotate(full_name=func)
+        lead = Lead.objects.filter(
+            get_match_q_params(Lead, email=email_addr)
+        ).annotate(full_name=func)
+        company = Company.objects.filter(
+            get_match_q_params(Company, email=email_addr)
         )
-        lead = Lead.objects.filter(email_params).annotate(
-            full_name=func
-        )
-        company = Company.objects.filter(email__icontains=email)
         name = CrmEmail.objects.filter(id=email.id).annotate(
             contact_name=Subquery(contact.values(
                 "full_name")[:1],
@@ -1,136 +1,282 @@
 import re
 from email.utils import parseaddr
 from django.contrib.auth.models import Group
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.mail import mail_admins
 from django.db import connection
-from django.db.utils import IntegrityError
+from django.db import DatabaseError
+from django.db import transaction
+from django.utils.html import escape
 from crm.models import Company
 from crm.models import ClientType
 from crm.models import Country
 from crm.models import Industry
 from crm.models import LeadSource
+from crm.settings import IMPORT_BATCH_SIZE
+from crm.settings import IMPORT_PROGRESS_TIMEOUT
 from crm.utils.helpers import DateForm
 from crm.utils.helpers import get_owner
+from crm.utils.match_keys import update_match_keys
 from common.utils.helpers import save_message
+from common.utils.helpers import USER_MODEL
 
+KEY_PREFIX = 'import_objects'
+LOOKUPS = {     # column: (model, field of the name)
+    'country': (Country, 'name'),
+    'department': (Group, 'name'),
+    'lead_source': (LeadSource, 'name'),
+    'owner': (USER_MODEL, 'username'),
+    'type': (ClientType, 'name'),
+}
+DATE_COLUMNS = ('birth_date', 'was_in_touch')
+REPORTED_ROWS = 100     # maximum of rows listed in the final message
+SAVE_ERRORS = (DatabaseError, ValidationError, ValueError)
 
-class HashMyAttr:
 
-    def __init__(self, obj):
-        self.obj = obj
-        self.industry_list = []
+class ImportResult:
+    """Progress and per-row outcome of an import of objects."""
 
-    def __hash__(self):
-        data = self.get_data(self)
-        return data.__hash__()
+    def __init__(self, user_id: int, total: int):
+        self.created = 0
+        self.finished = False
+        self.processed = 0
+        self.rows = []          # (row number in the file, level, message)
+        self.total = total
+        self.user_id = user_id
 
-    def __eq__(self, other):
-        return self.get_data(self) == self.get_data(other)
+    def add_row(self, row: int, level: str, msg: str) -> None:
+        self.rows.append((row, level, msg))
 
-    @staticmethod
-    def get_data(value):
-        data = value.obj.full_name
-        if value.obj.email:
-            data = data + value.obj.email
-        if value.obj.country:
-            country_name = value.obj.country.name
-            return data + country_name
-        else:
-            return data
+    def save(self) -> None:
+        cache.set(
+            f'{KEY_PREFIX}_{self.user_id}', self, IMPORT_PROGRESS_TIMEOUT
+        )
 
+    def get_message(self, verbose_name: str) -> tuple:
+        """Return the final message and its level."""
+        lines = [
+            f'Import of {verbose_name}: {self.created} of {self.total} created.'
+        ]
+        lines.extend(
+            escape(f'Row {row}: {msg}')
+            for row, _, msg in self.rows[:REPORTED_ROWS]
+        )
+        if len(self.rows) > REPORTED_ROWS:
+            lines.append(f'... and {len(self.rows) - REPORTED_ROWS} more.')
+        error = any(level == 'ERROR' for _, level, _ in self.rows)
+        return '<br>'.join(lines), 'ERROR' if error else 'INFO'
 
-def create_objects(request, df1, **kwargs):
-    obj = kwargs['object']
-    objs = [HashMyAttr(obj()) for _ in range(len(df1.index))]
 
-    try:
-        for column in kwargs['columns']:
-            if column in df1.columns:
-                for obj, value in zip(objs, df1[column]):
-                    value = str(value).strip(' ')
-                    value = re.sub(r"[\r\n]", '', value)
-                    if column == 'industry':
-                        industry_list = []
-                        if value:
-                            for name in [v for v in value.split(',')]:
-                                name = name.strip()
-                                try:
-                                    ind = Industry.objects.get(name=name)
-                                    industry_list.append(ind)
-                                except ObjectDoesNotExist:
-                                    pass
-                        obj.industry_list = industry_list
-                    else:
-                        if column == 'country':
-                            value = Country.objects.filter(name=value).first()
-                        elif column == 'company':
-                            try:
-                                if obj.obj.owner:
-                                    value = Company.objects.get(
-                                        full_name=value, owner=obj.obj.owner)
-                                elif obj.obj.country:
-                                    value = Company.objects.get(
-                                        full_name=value, country=obj.obj.country)
-                            except Exception as e:  # ObjectDoesNotExist, MultipleObjectsReturned
-                                save_message(
-                                    request.user, f"Error with: {value} - {e}.", 'ERROR')
-                                value = None
-                        elif column == 'owner':
-                            value = get_owner(request, value)
-                        elif column == 'type':
-                            value = ClientType.objects.filter(name=value).first()
-                        elif column == 'department':
-                            value = Group.objects.filter(name=value).first()
-                        elif column == 'birth_date' or column == 'was_in_touch':
-                            try:
-                                form = DateForm({'birth_date': value})
-                                if form.is_valid():
-                                    value = form.cleaned_data['birth_date']
-                                else:
-                                    value = None
-                            except ValidationError:
-                                value = None
-                        elif column == 'lead_source':
-                            value = LeadSource.objects.filter(name=value).first()
-                        setattr(obj.obj, column, value)
-        # objs = list(set(objs))
-        for obj in objs:
-            msg = lev = ''
-            # if 'uniq1' in kwargs and 'uniq1' in kwargs:
-            kw = {
-                f'{kwargs["uniq1"]}': getattr(obj.obj, kwargs['uniq1']),
-                f'{kwargs["uniq2"]}': getattr(obj.obj, kwargs['uniq2']),
-            }
-            o = kwargs['object'].objects.filter(**kw)
-            if o:
-                msg, lev = f'Already exists: {obj.obj.full_name} ({obj.obj.country})', 'INFO'
-            elif kwargs["attr"] == 'contact':
-                try:
-                    _ = obj.obj.company
-                except obj.obj.DoesNotExist:
-                    msg = f"Error with: {obj.obj.full_name} ({obj.obj.country}). Company was not assigned"
-                    lev = 'ERROR'
-            elif parseaddr(obj.obj.email)[1] == '':
-                msg = f"Invalid email address: {obj.obj.full_name} ({obj.obj.country})."
-                lev = 'ERROR'
+class ObjectImporter:
+    """
+    Create objects from the rows of a DataFrame.
+    The names in the cells are resolved with lookup dictionaries
+    loaded once per import, the duplicates are found with one query
+    per chunk of names and the objects are saved with bulk_create.
+    """
+
+    def __init__(self, request, **kwargs):
+        self.attr = kwargs['attr']
+        self.columns = list(dict.fromkeys(kwargs['columns']))
+        self.companies = {}
+        self.dates = {}
+        self.industries = {}
+        self.lookups = {}
+        self.model = kwargs['object']
+        self.request = request
+        self.uniq = (kwargs['uniq1'], kwargs['uniq2'])
+        self.uniq_attnames = tuple(
+            self.model._meta.get_field(name).attname for name in self.uniq   # NOQA
+        )
+
+    def run(self, df) -> ImportResult:
+        columns = [c for c in self.columns if c in df.columns]
+        rows = [
+            dict(zip(columns, map(clean_value, values)))
+            for values in df[columns].itertuples(index=False, name=None)
+        ]
+        result = ImportResult(self.request.user.id, len(rows))
+        result.save()
+        self.load_lookups(rows, columns)
+        objs = [self.build_object(row, columns) for row in rows]
+        keys = self.get_existing_keys(objs)
+
+        batch = []
+        for i, obj in enumerate(objs):
+            key = tuple(getattr(obj, attname) for attname in self.uniq_attnames)
+            msg = self.check_object(obj, key, keys)
             if msg:
-                save_message(request.user, msg, lev)
-                continue
-            if obj.obj.owner:
-                setattr(obj.obj, 'created_by', obj.obj.owner)
-                setattr(obj.obj, 'modified_by', obj.obj.owner)
+                result.add_row(i + 2, *msg)     # the first row is the header
             else:
-                setattr(obj.obj, 'created_by', request.user)
-                setattr(obj.obj, 'modified_by', request.user)
-            try:
-                obj.obj.save()
-                if hasattr(obj.obj, 'industry'):
-                    obj.obj.industry.set(obj.industry_list, clear=True)
-            except IntegrityError:
-                msg = f'IntegrityError: {obj.obj.full_name}'
-                save_message(request.user, msg, 'ERROR')
+                keys.add(key)
+                batch.append((i + 2, obj))
+            if len(batch) == IMPORT_BATCH_SIZE:
+                self.save_batch(batch, result)
+                batch = []
+                result.processed = i + 1
+                result.save()
+        if batch:
+            self.save_batch(batch, result)
+        result.processed = len(objs)
+        result.finished = True
+        result.save()
+        return result
+
+    def build_object(self, row: dict, columns: list):
+        obj = self.model()
+        obj.industry_ids = []
+        for column in columns:
+            value = row[column]
+            if column == 'industry':
+                obj.industry_ids = [
+                    self.industries[name] for name in split_names(value)
+                    if name in self.industries
+                ]
+                continue
+            if column in LOOKUPS:
+                if column == 'owner' and not value:
+                    value = self.lookups['owner'][None]
+                else:
+                    value = self.lookups[column].get(value)
+            elif column == 'company':
+                value = self.get_company(obj, value)
+            elif column in DATE_COLUMNS:
+                value = self.get_date(value)
+            setattr(obj, column, value)
+        obj.modified_by = obj.owner or self.request.user
+        return obj
+
+    def check_object(self, obj, key: tuple, keys: set):
+        """Return the level and message if the object can not be created."""
+        if key in keys:
+            return 'INFO', f'Already exists: {obj.full_name} ({obj.country})'
+        if self.attr == 'contact':
+            if not obj.company_id:
+                return 'ERROR', (f'Error with: {obj.full_name} ({obj.country}).'
+                                 ' Company was not assigned')
+        elif parseaddr(obj.email)[1] == '':
+            return 'ERROR', f'Invalid email address: {obj.full_name} ({obj.country}).'
+
+    def get_company(self, obj, name: str):
+        if not name:
+            return None
+        if obj.owner:
+            companies = self.companies.get((name, 'owner', obj.owner.id), ())
+        elif obj.country:
+            companies = self.companies.get((name, 'country', obj.country.id), ())
+        else:
+            return None
+        return companies[0] if len(companies) == 1 else None
+
+    def get_date(self, value: str):
+        if value not in self.dates:
+            form = DateForm({'birth_date': value})
+            self.dates[value] = form.cleaned_data['birth_date'] if form.is_valid() else None
+        return self.dates[value]
+
+    def get_existing_keys(self, objs: list) -> set:
+        """Get the unique values of already existing objects."""
+        keys = set()
+        values = list({getattr(obj, self.uniq_attnames[0]) for obj in objs})
+        for i in range(0, len(values), IMPORT_BATCH_SIZE):
+            keys.update(
+                self.model.objects.filter(**{
+                    f'{self.uniq[0]}__in': values[i:i + IMPORT_BATCH_SIZE]
+                }).values_list(*self.uniq)
+            )
+        return keys
+
+    def load_lookups(self, rows: list, columns: list) -> None:
+        for column in columns:
+            names = {row[column] for row in rows}
+            if column in LOOKUPS:
+                model, field = LOOKUPS[column]
+                lookup = {}
+                for obj in model.objects.filter(**{f'{field}__in': names}):
+                    lookup.setdefault(getattr(obj, field), obj)
+                if column == 'owner':
+                    lookup[None] = get_owner(self.request, '')
+                self.lookups[column] = lookup
+            elif column == 'industry':
+                names = {name for value in names for name in split_names(value)}
+                self.industries = dict(
+                    Industry.objects.filter(
+                        name__in=names
+                    ).values_list('name', 'id')
+                )
+            elif column == 'company':
+                companies = Company.objects.filter(
+                    full_name__in=names
+                ).only('id', 'full_name', 'owner_id', 'country_id')
+                for company in companies:
+                    name = company.full_name
+                    for attr in ('owner', 'country'):
+                        key = (name, attr, getattr(company, f'{attr}_id'))
+                        self.companies.setdefault(key, []).append(company)
+
+    def save_batch(self, batch: list, result: ImportResult) -> None:
+        objs = [obj for _, obj in batch]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(objs)
+                self.set_ids(objs)
+                self.set_industries(objs)
+                update_match_keys(objs, created=True)
+            result.created += len(objs)
+        except SAVE_ERRORS:
+            # find out the rows that can not be saved
+            for row, obj in batch:
+                obj.pk = None
+                obj._state.adding = True     # NOQA
+                try:
+                    with transaction.atomic():
+                        obj.save()
+                        self.set_industries([obj])
+                    result.created += 1
+                except SAVE_ERRORS as e:
+                    result.add_row(row, 'ERROR', f'{e.__class__.__name__}: {obj.full_name}')
+
+    def set_ids(self, objs: list) -> None:
+        """
+        Get the ids of the created objects by their unique values
+        with one query if the backend (MySQL) does not return them.
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            return
+        values = list({getattr(obj, self.uniq_attnames[0]) for obj in objs})
+        ids = {
+            tuple(key): pk for pk, *key in self.model.objects.filter(**{
+                f'{self.uniq[0]}__in': values
+            }).values_list('id', *self.uniq).order_by('id')
+        }
+        for obj in objs:
+            obj.id = ids.get(
+                tuple(getattr(obj, attname) for attname in self.uniq_attnames)
+            )
+
+    def set_industries(self, objs: list) -> None:
+        if not hasattr(self.model, 'industry'):
+            return
+        through = self.model.industry.through
+        through.objects.bulk_create([
+            through(**{f'{self.attr}_id': obj.id, 'industry_id': industry_id})
+            for obj in objs for industry_id in obj.industry_ids
+        ])
+
+
+def clean_value(value) -> str:
+    return re.sub(r"[\r\n]", '', str(value).strip(' '))
+
+
+def create_objects(request, df1, **kwargs):
+    importer = ObjectImporter(request, **kwargs)
+    try:
+        result = importer.run(df1)
+        msg, level = result.get_message(
+            importer.model._meta.verbose_name_plural   # NOQA
+        )
+        save_message(request.user, msg, level)
     except Exception as e:
         mail_admins(
             "Exception in create_objects",
@@ -140,3 +286,12 @@ def create_objects(request, df1, **kwargs):
             fail_silently=True,
         )
     connection.close()
+
+
+def get_import_result(user_id: int):
+    """Get the result of the last import of the user if it is still cached."""
+    return cache.get(f'{KEY_PREFIX}_{user_id}')
+
+
+def split_names(value: str) -> list:
+    return [name.strip() for name in value.split(',') if name.strip()]
@@ -17,8 +17,6 @@ if sys.platform != "win32":
     import fcntl
 
 path = settings.MEDIA_ROOT / 'locks'
-sleep_time_sec = 0.03
-release_limit = int(60 / sleep_time_sec)    # 60 sec
 sleep_time_sec2 = 0.01
 lockfile_limit = int(20 / sleep_time_sec2)    # 20 sec
 
@@ -27,8 +25,9 @@ class CrmIMAP:
 
     def __init__(self, email_host_user: str):
         # quick initialization
+        self.checked_out = False
         self.email_host_user = email_host_user
-        self.locked = True
+        self.pool = None
 
     def check_box_status(self, box: str, upd_fields: list) -> tuple:
         """Return (changed, uid_validity)"""
@@ -106,32 +105,6 @@ class CrmIMAP:
             return False
         return True
 
-    def lock(self) -> None:
-        """Lock this instance for other customers."""
-        if self.locked:
-            counter = release_limit
-            while self.locked:
-                sleep(sleep_time_sec)
-                counter -= 1
-                if not counter:
-                    n = release_limit * sleep_time_sec
-                    msg = f"The CrmIMAP.{self} was not released within {n} seconds"
-                    site = Site.objects.get_current()
-                    mail_admins(
-                        msg,
-                        f'''{msg}\n
-                        \nSite {site.domain}
-                        \nEmail account:_____{self.ea}
-                        \ncreate_time:_______{self.create_time}
-                        \nLast_Noop_time:___{self.noop_time}
-                        \nLast_request_time:_{self.last_request_time}
-                        \nException time:____{dt.now()}
-                        \nLog: \n{self._parse_log()}
-                        ''',
-                    )
-                    raise RuntimeError(msg)
-        self.locked = True
-
     def mark_emails_as_read(self, uids_str) -> None:
         result = self.select_box('INBOX')
         if result != 'OK':
@@ -156,9 +129,9 @@ class CrmIMAP:
         return result
 
     def release(self) -> None:
-        """Unlock this instance for other customers."""
-        if settings.REUSE_IMAP_CONNECTION:
-            self.locked = False
+        """Return this instance to its pool for other customers."""
+        if self.pool:
+            self.pool.checkin(self)
         else:
             self.close_and_logout()
 
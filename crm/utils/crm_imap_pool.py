@@ -0,0 +1,133 @@
+import threading
+from datetime import datetime as dt
+from datetime import timedelta
+from time import monotonic
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.mail import mail_admins
+
+from crm.settings import IMAP_CONNECTION_IDLE
+from crm.settings import IMAP_POOL_SIZE
+from crm.utils.crm_imap import CrmIMAP
+from massmail.models import EmailAccount
+
+checkout_timeout = 60               # seconds
+delta_period = timedelta(seconds=30)
+idle_period = timedelta(minutes=IMAP_CONNECTION_IDLE)
+
+
+class CrmImapPool:
+    """Bounded pool of CrmIMAP connections of one email account."""
+
+    def __init__(self, ea: EmailAccount, size: int = IMAP_POOL_SIZE):
+        self.boxes = None
+        self.condition = threading.Condition()
+        self.ea = ea
+        self.idle = []
+        self.size = max(size, 1)
+        self.total = 0          # connections checked out or idle
+
+    def checkin(self, crmimap: CrmIMAP) -> None:
+        """Return the connection to the pool."""
+        with self.condition:
+            if not crmimap.checked_out:
+                return
+            crmimap.checked_out = False
+            keep = settings.REUSE_IMAP_CONNECTION and not crmimap.error
+            if keep:
+                self.idle.append(crmimap)
+            else:
+                self.total -= 1
+            self.condition.notify()
+        if not keep:
+            crmimap.close_and_logout()
+
+    def checkout(self, ea: EmailAccount) -> CrmIMAP:
+        """
+        Get an idle connection or open a new one if the pool is not full.
+        Otherwise wait until another thread returns a connection.
+        """
+        deadline = monotonic() + checkout_timeout
+        with self.condition:
+            while not self.idle and self.total >= self.size:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    self._mail_timeout()
+                self.condition.wait(remaining)
+            crmimap = self.idle.pop() if self.idle else None
+            if not crmimap:
+                self.total += 1
+            self.ea = ea
+
+        if crmimap and not self._is_healthy(crmimap):
+            crmimap.close_and_logout()
+            crmimap = None
+        if not crmimap:
+            try:
+                crmimap = self._create_crmimap(ea)
+            except Exception:
+                with self.condition:
+                    self.total -= 1
+                    self.condition.notify()
+                raise
+        crmimap.checked_out = True
+        crmimap.pool = self
+        crmimap.last_request_time = dt.now()
+        return crmimap
+
+    def keep_alive(self) -> bool:
+        """
+        Check the idle connections with NOOP and close the broken ones
+        and those that have not been used for IMAP_CONNECTION_IDLE minutes.
+        Return True if the pool still has connections.
+        """
+        with self.condition:
+            crmimaps, self.idle = self.idle, []
+        now = dt.now()
+        alive = []
+        for crmimap in crmimaps:
+            if now - crmimap.last_request_time > idle_period \
+                    or not self._is_healthy(crmimap):
+                crmimap.close_and_logout()
+            else:
+                alive.append(crmimap)
+        with self.condition:
+            self.idle.extend(alive)
+            self.total -= len(crmimaps) - len(alive)
+            self.condition.notify_all()
+            return bool(self.total)
+
+    def _create_crmimap(self, ea: EmailAccount) -> CrmIMAP:
+        crmimap = CrmIMAP(ea.email_host_user)
+        crmimap.get_in(self.boxes, ea)
+        if not crmimap.error and not self.boxes:
+            self.boxes = crmimap.boxes
+        return crmimap
+
+    @staticmethod
+    def _is_healthy(crmimap: CrmIMAP) -> bool:
+        if crmimap.error:
+            return False
+        now = dt.now()
+        last_time = max(crmimap.noop_time or crmimap.last_request_time,
+                        crmimap.last_request_time)
+        if now - last_time > delta_period:
+            crmimap.noop_time = now
+            return crmimap.noop() == 'OK' and not crmimap.error
+        return True
+
+    def _mail_timeout(self) -> None:
+        msg = (f"The CrmIMAP pool of {self.ea.email_host_user} has no free "
+               f"connection within {checkout_timeout} seconds")
+        site = Site.objects.get_current()
+        mail_admins(
+            msg,
+            f'''{msg}\n
+            \nSite {site.domain}
+            \nEmail account:_____{self.ea}
+            \nPool size:_________{self.size}
+            \nException time:____{dt.now()}
+            ''',
+            fail_silently=True,
+        )
+        raise RuntimeError(msg)
@@ -0,0 +1,95 @@
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from common.utils.helpers import bulk_upsert
+from common.utils.helpers import is_deleted_directly
+from crm.models import CrmEmail
+from crm.models import Deal
+from crm.models import DealStatus
+from crm.models import Output
+from crm.models import Payment
+
+BATCH_SIZE = 1000
+STATUS_FIELDS = [
+    'unanswered_email', 'unanswered_inquiry', 'inquiry_date',
+    'inquiry_subsequent', 'received_payment', 'has_product',
+    'empty_shipping_date', 'first_shipping_date'
+]
+
+
+def get_deal_status_values(deal_ids) -> list:
+    """Compute the status flags of the deals in one query."""
+    newest = CrmEmail.objects.filter(
+        deal=OuterRef('pk'),
+        trash=False
+    ).order_by('-creation_date')
+    newest_inquiry = newest.filter(inquiry=True)
+    outputs = Output.objects.filter(deal=OuterRef('pk'))
+    return list(Deal.objects.filter(id__in=deal_ids).annotate(
+        unanswered_email=Coalesce(
+            Subquery(newest.values('incoming')[:1]), Value(False)
+        ),
+        unanswered_inquiry=Coalesce(
+            Subquery(newest.values('inquiry')[:1]), Value(False)
+        ),
+        inquiry_date=Subquery(newest_inquiry.values('creation_date')[:1]),
+        inquiry_subsequent=Coalesce(
+            Subquery(newest_inquiry.values('request__subsequent')[:1]),
+            Value(False)
+        ),
+        received_payment=Exists(Payment.objects.filter(
+            deal=OuterRef('pk'),
+            status=Payment.RECEIVED
+        )),
+        has_product=Exists(outputs),
+        empty_shipping_date=Exists(outputs.filter(shipping_date__isnull=True)),
+        first_shipping_date=Subquery(outputs.filter(
+            shipping_date__isnull=False
+        ).order_by('shipping_date').values('shipping_date')[:1]),
+    ).values('id', *STATUS_FIELDS))
+
+
+def update_deal_statuses(deal_ids) -> None:
+    """
+    Recalculate the status flags of the deals.
+    The statuses are upserted, so concurrent updates of a deal do not conflict.
+    """
+    deal_ids = [i for i in set(deal_ids) if i]
+    for i in range(0, len(deal_ids), BATCH_SIZE):
+        values = get_deal_status_values(deal_ids[i:i + BATCH_SIZE])
+        bulk_upsert(
+            DealStatus,
+            [DealStatus(deal_id=v.pop('id'), **v) for v in values],
+            unique_fields=['deal'],
+            update_fields=STATUS_FIELDS
+        )
+
+
+def deal_status_handler(sender, instance, origin=None, **kwargs) -> None:
+    """
+    Update the status of the deal of a saved or deleted email, payment
+    or output and of the deal it was moved from.
+    """
+    if is_deleted_directly(instance, origin):
+        update_deal_statuses([
+            instance.deal_id, getattr(instance, '_previous_deal_id', None)
+        ])
+
+
+def deal_handler(sender, instance, created: bool, **kwargs) -> None:
+    if created:
+        update_deal_statuses([instance.id])
+
+
+def request_handler(sender, instance, update_fields=None, **kwargs) -> None:
+    """The status shows whether the inquiry of the deal is subsequent."""
+    if update_fields and 'subsequent' not in update_fields:
+        return
+    update_deal_statuses(
+        CrmEmail.objects.filter(
+            request=instance, inquiry=True, deal__isnull=False
+        ).values_list('deal_id', flat=True)
+    )
@@ -0,0 +1,76 @@
+import hashlib
+from django.core.cache import cache
+
+from crm.settings import FACET_CACHE_TIMEOUT
+
+KEY_PREFIX = 'facets'
+ALL_DEPARTMENTS = 'all'
+
+
+def get_version_key(model, department_id) -> str:
+    return f'{KEY_PREFIX}_version_{model._meta.label_lower}_{department_id}'   # NOQA
+
+
+def get_version_keys(model, department_id) -> list:
+    """
+    Get the keys of the versions of the model objects visible in
+    the department: its own objects and those without a department.
+    Without a department the objects of all departments are visible.
+    """
+    if department_id is None:
+        return [get_version_key(model, ALL_DEPARTMENTS)]
+    return [get_version_key(model, None), get_version_key(model, department_id)]
+
+
+def bump_facet_version(sender, instance, **kwargs) -> None:
+    """
+    Signal receiver: an object of the model has changed,
+    drop the facets of its department.
+    """
+    department_id = getattr(instance, 'department_id', None)
+    for key in (get_version_key(sender, department_id),
+                get_version_key(sender, ALL_DEPARTMENTS)):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_facet_scope(request) -> tuple:
+    """
+    Get the part of the key on which the objects visible to the user depend:
+    the department and, unless the user sees all objects of the department,
+    the user.
+    """
+    user = request.user
+    owner_id = None if any((
+        user.is_superuser, getattr(user, 'is_chief', False)
+    )) else user.id
+    return getattr(user, 'department_id', None), owner_id
+
+
+def get_cached_facet(request, name: str, models: tuple, compute, *params):
+    """
+    Get the lookups of a list filter from the cache or compute them.
+    The cached lookups are dropped when objects of the models change
+    in the department of the user or after settings.FACET_CACHE_TIMEOUT
+    seconds.
+    """
+    department_id = get_facet_scope(request)[0]
+    version_keys = [
+        key for model in models
+        for key in get_version_keys(model, department_id)
+    ]
+    versions = cache.get_many(version_keys)
+    key_data = repr((
+        name,
+        [(key, versions.get(key, 0)) for key in version_keys],
+        get_facet_scope(request),
+        params
+    ))
+    key = f'{KEY_PREFIX}_{hashlib.md5(key_data.encode()).hexdigest()}'
+    facet = cache.get(key)
+    if facet is None:
+        facet = compute()
+        cache.set(key, facet, FACET_CACHE_TIMEOUT)
+    return facet
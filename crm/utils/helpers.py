@@ -1,4 +1,5 @@
 import re
+from contextlib import contextmanager
 from datetime import datetime
 from datetime import timezone as tz
 from email.header import decode_header
@@ -67,8 +68,20 @@ def get_counterparty_header() -> SafeString:
 
 
 def get_crmimap(ea: EmailAccount, box: Optional[str] = None) -> Optional[CrmIMAP]:
+    """Check out a connection from the pool. Release it after use."""
     app_config = apps.get_app_config('crm')
     return app_config.mci.get_crmimap(ea, box)    
+
+
+@contextmanager
+def crmimap_connection(ea: EmailAccount, box: Optional[str] = None):
+    """Check out a connection from the pool and return it on exit."""
+    crmimap = get_crmimap(ea, box)
+    try:
+        yield crmimap
+    finally:
+        if crmimap:
+            crmimap.release()
     
 
 def get_email_date(msg: Message) -> datetime:
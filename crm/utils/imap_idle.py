@@ -0,0 +1,248 @@
+import imaplib
+import selectors
+import threading
+from random import random
+from time import monotonic
+from time import sleep
+from django.conf import settings
+from django.core.mail import mail_admins
+from django.db import connection as db_connection
+
+from crm.settings import IMAP_IDLE
+from crm.settings import IMAP_NOOP_PERIOD
+from crm.settings import IMAP_SENT_IMPORT_PERIOD
+from crm.utils.import_emails import control_period
+from massmail.models import EmailAccount
+
+# RFC 2177: the client should re-issue IDLE at least every 29 minutes
+idle_renew_period = 25 * 60     # seconds
+new_email_responses = (b'EXISTS', b'RECENT')
+
+
+class ImapIdleListener(threading.Thread):
+    """
+    Listen to the INBOX of the email accounts and put the account
+    to the import queue only when the server reports new emails.
+    The servers without IDLE support are polled with NOOP.
+    The accounts the listener failed to connect to are put to the queue
+    every IMAP_NOOP_PERIOD, and all accounts are put to the queue every
+    IMAP_SENT_IMPORT_PERIOD to import their Sent box.
+    """
+
+    def __init__(self, ea_queue):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.ea_queue = ea_queue
+        self.polled_eas = {}
+        self.retries = {}
+        self.selector = None
+        self.sessions = {}
+
+    def run(self) -> None:
+        if IMAP_IDLE and not settings.TESTING:
+            sleep(int(random() * 10))
+            self.selector = selectors.DefaultSelector()
+            self._listen()
+
+    def _listen(self) -> None:
+        next_poll = next_sent_import = 0
+        while True:
+            now = monotonic()
+            if now >= next_poll:
+                self._sync_sessions()
+                self._poll()
+                next_poll = now + IMAP_NOOP_PERIOD
+            if now >= next_sent_import:
+                # only the INBOX is listened to
+                for session in self.sessions.values():
+                    self.ea_queue.put(session.ea)
+                next_sent_import = now + IMAP_SENT_IMPORT_PERIOD
+            self._renew_idle()
+            self._retry_imports()
+            due_time = min(next_poll, next_sent_import, *self.retries.values())
+            for key, _ in self.selector.select(timeout=max(due_time - now, 1)):
+                session = key.data
+                try:
+                    if session.read_events():
+                        self._import_emails(session.ea)
+                except (OSError, imaplib.IMAP4.error):
+                    self._close_session(session)
+
+    def _close_session(self, session) -> None:
+        if session.idle_tag:
+            self.selector.unregister(session.connection.sock)
+        session.close()
+        del self.sessions[session.ea.id]
+        self.retries.pop(session.ea.id, None)
+
+    def _import_emails(self, ea: EmailAccount) -> None:
+        self.ea_queue.put(ea)
+        # The import may be skipped if the account was imported
+        # within the control period, so repeat it after the period.
+        self.retries[ea.id] = monotonic() + control_period.total_seconds()
+
+    def _poll(self) -> None:
+        for ea in self.polled_eas.values():
+            self.ea_queue.put(ea)
+        for session in list(self.sessions.values()):
+            if session.idle_tag:
+                continue
+            try:
+                if session.noop():
+                    self._import_emails(session.ea)
+            except (OSError, imaplib.IMAP4.error):
+                self._close_session(session)
+
+    def _renew_idle(self) -> None:
+        now = monotonic()
+        for session in list(self.sessions.values()):
+            if session.idle_tag and now - session.idle_start > idle_renew_period:
+                self.selector.unregister(session.connection.sock)
+                try:
+                    if session.stop_idle():
+                        self._import_emails(session.ea)
+                    session.start_idle()
+                    self.selector.register(
+                        session.connection.sock, selectors.EVENT_READ, session
+                    )
+                except (OSError, imaplib.IMAP4.error):
+                    session.idle_tag = None
+                    self._close_session(session)
+
+    def _retry_imports(self) -> None:
+        now = monotonic()
+        for ea_id, due_time in list(self.retries.items()):
+            if due_time <= now:
+                del self.retries[ea_id]
+                session = self.sessions.get(ea_id)
+                if session:
+                    self.ea_queue.put(session.ea)
+
+    def _sync_sessions(self) -> None:
+        eas = {
+            ea.id: ea for ea in
+            EmailAccount.objects.filter(do_import=True).exclude(imap_host='')
+        }
+        for ea_id in set(self.sessions) - set(eas):
+            self._close_session(self.sessions[ea_id])
+        failed_eas = {}
+        for ea_id, ea in eas.items():
+            if ea_id in self.sessions:
+                self.sessions[ea_id].ea = ea
+                continue
+            session = ImapIdleSession(ea)
+            try:
+                session.connect()
+                if session.supports_idle:
+                    session.start_idle()
+                    self.selector.register(
+                        session.connection.sock, selectors.EVENT_READ, session
+                    )
+            except (OSError, imaplib.IMAP4.error) as err:
+                session.close()
+                # the account is imported periodically until it is connected
+                failed_eas[ea_id] = ea
+                if settings.IMAP_DEBUG_LEVEL:
+                    mail_admins(
+                        'Exception at ImapIdleListener._sync_sessions',
+                        f'\nEmail account: {ea}\nException: {err}',
+                        fail_silently=True,
+                    )
+                continue
+            self.sessions[ea_id] = session
+        self.polled_eas = failed_eas
+        db_connection.close()
+
+
+class ImapIdleSession:
+    """A separate IMAP connection waiting for new emails in the INBOX."""
+
+    def __init__(self, ea: EmailAccount):
+        self.buffer = b''
+        self.connection = None
+        self.counter = 0
+        self.ea = ea
+        self.idle_start = None
+        self.idle_tag = None
+        self.supports_idle = False
+
+    def close(self) -> None:
+        if self.connection:
+            try:
+                if self.idle_tag:
+                    self.stop_idle()
+                self.connection.logout()
+            except (OSError, imaplib.IMAP4.error):
+                pass
+            self.connection = None
+
+    def connect(self) -> None:
+        self.connection = imaplib.IMAP4_SSL(self.ea.imap_host)
+        self.connection.login(
+            self.ea.email_host_user,
+            self.ea.email_app_password or self.ea.email_host_password
+        )
+        self.supports_idle = 'IDLE' in self.connection.capabilities
+        self.connection.select('INBOX', readonly=True)
+        self._pop_new_email_responses()
+
+    def noop(self) -> bool:
+        """Return True if the server reported new emails."""
+        self.connection.noop()
+        return self._pop_new_email_responses()
+
+    def read_events(self) -> bool:
+        """
+        Read the untagged responses the server pushed while idling.
+        Return True if the server reported new emails.
+        """
+        sock = self.connection.sock
+        data = sock.recv(4096)
+        if not data:
+            raise imaplib.IMAP4.abort('socket closed')
+        self.buffer += data
+        while sock.pending():
+            self.buffer += sock.recv(4096)
+        *lines, self.buffer = self.buffer.split(b'\r\n')
+        return any(line.endswith(new_email_responses) for line in lines)
+
+    def start_idle(self) -> None:
+        self.counter += 1
+        tag = f'IDLE{self.counter}'.encode()
+        self.connection.send(tag + b' IDLE\r\n')
+        line = self._read_line()
+        if not line.startswith(b'+'):
+            raise imaplib.IMAP4.error(f'IDLE rejected: {line}')
+        self.idle_tag = tag
+        self.idle_start = monotonic()
+
+    def stop_idle(self) -> bool:
+        """
+        Finish IDLE and read the responses up to its completion.
+        Return True if the server reported new emails.
+        """
+        self.connection.send(b'DONE\r\n')
+        new_emails = False
+        while True:
+            line = self._read_line()
+            if line.startswith(self.idle_tag):
+                break
+            new_emails |= line.endswith(new_email_responses)
+        self.idle_tag = None
+        return new_emails
+
+    def _pop_new_email_responses(self) -> bool:
+        new_emails = False
+        for name in ('EXISTS', 'RECENT'):
+            _, data = self.connection.response(name)
+            new_emails |= data != [None]
+        return new_emails
+
+    def _read_line(self) -> bytes:
+        while b'\r\n' not in self.buffer:
+            data = self.connection.sock.recv(4096)
+            if not data:
+                raise imaplib.IMAP4.abort('socket closed')
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b'\r\n', 1)
+        return line
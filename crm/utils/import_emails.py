@@ -1,9 +1,11 @@
 import email
+import re
 import time
 import threading
 from datetime import timedelta
 from email.parser import BytesHeaderParser
 from pathlib import Path
+from queue import Queue
 from typing import Optional
 from django.apps import apps
 from django.conf import settings
@@ -18,7 +20,10 @@ from django.urls import reverse
 
 from common.utils.helpers import popup_window
 from crm.models import CrmEmail
+from crm.settings import IMAP_IMPORT_BATCH_SIZE
+from crm.settings import IMAP_IMPORT_WORKERS
 from crm.utils.crm_imap import CrmIMAP
+from crm.utils.helpers import crmimap_connection
 from crm.utils.helpers import ensure_decoding
 from crm.utils.helpers import get_crmimap
 from crm.utils.helpers import get_email_date
@@ -27,17 +32,20 @@ from massmail.models import EmailAccount
 
 app_config = apps.get_app_config('crm')
 control_period = timedelta(seconds=120)
+uid_pattern = re.compile(rb'UID (\d+)')
 
 
 class ImportEmails(threading.Thread):
+    """Distribute email accounts between import workers."""
 
     def __init__(self, ea_queue, eml_queue): 
         threading.Thread.__init__(self)
         self.daemon = True
         self.close = False
-        self.crmimap_storage = app_config.mci.crmimap_storage
+        self.pools = app_config.mci.pools
         self.ea_queue = ea_queue
         self.eml_queue = eml_queue
+        self.workers = []
 
     def send(self, user):
         eas = EmailAccount.objects.filter(
@@ -45,7 +53,7 @@ class ImportEmails(threading.Thread):
         )
         for ea in eas:
             if not settings.REUSE_IMAP_CONNECTION or \
-                    ea.email_host_user not in self.crmimap_storage:
+                    ea.email_host_user not in self.pools:
                 if ea not in list(self.ea_queue.queue):
                     self.ea_queue.put(ea)
 
@@ -57,89 +65,136 @@ class ImportEmails(threading.Thread):
             except FileExistsError:
                 for child in path.glob('*'):
                     child.unlink()
-        crmimap = ea = None
+        self.workers = [
+            ImportWorker(self.eml_queue)
+            for _ in range(max(IMAP_IMPORT_WORKERS, 1))
+        ]
+        for worker in self.workers:
+            worker.start()
         while True:
-            try:
-                if crmimap:
-                    crmimap.release()
-                    crmimap = None
-                ea = self.ea_queue.get()
-                if not settings.TESTING:
-                    # To prevent hit the db until the apps.ready() is completed.
-                    time.sleep(1)
-                    ea.refresh_from_db(fields=['last_import_dt'])
-                    now = timezone.now()
-                    if ea.last_import_dt > now - control_period:
-                        continue
+            ea = self.ea_queue.get()
+            # the same account is always served by the same worker
+            worker = self.workers[ea.id % len(self.workers)]
+            if ea not in list(worker.ea_queue.queue):
+                worker.ea_queue.put(ea)
 
-                    ea.last_import_dt = now
-                    ea.save(update_fields=['last_import_dt'])
-                    crmimap = get_crmimap(ea)
-                    if not crmimap or crmimap.error:
-                        continue
 
-                    upd_fields = []
-                    uid_data = get_uid_data(ea)
+class ImportWorker(threading.Thread):
+    """Import emails of the email accounts assigned to this worker."""
 
-                    for t in ('incoming', 'sent'):
-                        box = 'Sent' if t == 'sent' else 'INBOX'
-                        result = crmimap.select_box(box)
-                        if result != 'OK':
-                            continue
+    def __init__(self, eml_queue):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.ea_queue = Queue()
+        self.eml_queue = eml_queue
 
-                        changed, uid_validity = crmimap.check_box_status(box, upd_fields)
-                        if not changed:
-                            continue
-                        if not uid_validity:
-                            set_new_start_uid(crmimap, t)
+    def run(self):
+        while True:
+            ea = self.ea_queue.get()
+            if settings.TESTING:
+                continue
+            try:
+                # To prevent hit the db until the apps.ready() is completed.
+                time.sleep(1)
+                self.import_emails(ea)
+            except Exception as e:
+                mail_admins(
+                    'ImportEmails Exception',
+                    f'\nEmail account: {ea}\nException: {e}',
+                    fail_silently=True,
+                )
 
-                        result, data, e = crmimap.search(uid_data[t]['search_params'])
-                        if result != 'OK':
-                            continue
+    def import_emails(self, ea: EmailAccount) -> None:
+        ea.refresh_from_db(fields=['last_import_dt'])
+        now = timezone.now()
+        if ea.last_import_dt > now - control_period:
+            return
 
-                        # result <class 'list'>: [b'[CANNOT] Unsupported search criterion:
-                        # SENTSINCE 08-MAY-2020 FLAGGED']
-                        uids = data[0].split()
-                        if not uids:
-                            continue
+        ea.last_import_dt = now
+        ea.save(update_fields=['last_import_dt'])
+        crmimap = get_crmimap(ea)
+        if not crmimap:
+            return
+        try:
+            if crmimap.error:
+                return
+            upd_fields = []
+            uid_data = get_uid_data(ea)
 
-                        for i, uid in enumerate(uids):
-                            result, data, e = crmimap.uid_fetch(uid)
-                            if result != 'OK' or not data[0]:
-                                continue
+            for t in ('incoming', 'sent'):
+                box = 'Sent' if t == 'sent' else 'INBOX'
+                result = crmimap.select_box(box)
+                if result != 'OK':
+                    continue
 
-                            b_msg = parse_message_bytes(uid, data)
-                            if not b_msg:
-                                result, data, err = crmimap.uid_fetch(uid)
-                                if result != 'OK' or not data[0]:
-                                    continue
-                                b_msg = parse_message_bytes(uid, data)
-                                if not b_msg:
-                                    continue
+                changed, uid_validity = crmimap.check_box_status(box, upd_fields)
+                if not changed:
+                    continue
+                if not uid_validity:
+                    set_new_start_uid(crmimap, t)
 
-                            if not uid_validity:
-                                email_message = email.message_from_bytes(
-                                    b_msg, policy=email.policy.default)
-                                if CrmEmail.objects.filter(
-                                    message_id=email_message['Message-ID'],
-                                    creation_date=get_email_date(email_message)
-                                ).exists():
-                                    continue
+                result, data, e = crmimap.search(uid_data[t]['search_params'])
+                if result != 'OK':
+                    continue
 
-                            self.eml_queue.put((b_msg, ea, t, uid, '', None))
-                            if i == 50:
-                                break
+                # result <class 'list'>: [b'[CANNOT] Unsupported search criterion:
+                # SENTSINCE 08-MAY-2020 FLAGGED']
+                uids = data[0].split()
+                for i in range(0, len(uids), IMAP_IMPORT_BATCH_SIZE):
+                    self.import_batch(
+                        crmimap, ea, t, uids[i:i + IMAP_IMPORT_BATCH_SIZE]
+                    )
 
-                    ea.last_import_dt = timezone.now()
-                    upd_fields.append('last_import_dt')
-                    ea.save(update_fields=upd_fields)
+            ea.last_import_dt = timezone.now()
+            upd_fields.append('last_import_dt')
+            ea.save(update_fields=upd_fields)
+        finally:
+            crmimap.release()
 
-            except Exception as e:
-                mail_admins(
-                    'ImportEmails Exception',
-                    f'\nEmail account: {ea}\nException: {e}',
-                    fail_silently=True,
-                )
+    def import_batch(self, crmimap: CrmIMAP, ea: EmailAccount,
+                     t: str, uids: list) -> None:
+        """
+        Fetch the headers of the batch of emails first
+        and then the bodies of the emails not yet imported only.
+        If the last emails of the batch are skipped, the start uid
+        is moved past them once the queued emails are restored.
+        """
+        result, data, e = crmimap.uid_fetch(
+            b','.join(uids), '(BODY.PEEK[HEADER])'
+        )
+        if result != 'OK' or not data:
+            return
+        parser = BytesHeaderParser(policy=email.policy.compat32)
+        message_ids = {
+            uid: (parser.parsebytes(header)['Message-ID'] or '').strip()
+            for uid, header in parse_fetch_data(data).items()
+        }
+        # an email sent to several mailboxes is imported only once
+        existing_ids = set(CrmEmail.objects.filter(
+            message_id__in=[x for x in message_ids.values() if x]
+        ).values_list('message_id', flat=True))
+        new_uids = [
+            uid for uid in uids
+            if message_ids.get(uid, '') not in existing_ids
+        ]
+        messages = {}
+        if new_uids:
+            result, data, e = crmimap.uid_fetch(b','.join(new_uids))
+            if result == 'OK' and data:
+                messages = parse_fetch_data(data)
+        for uid in new_uids:
+            b_msg = messages.get(uid)
+            if not b_msg:
+                result, data, e = crmimap.uid_fetch(uid)
+                if result != 'OK' or not data[0]:
+                    continue
+                b_msg = parse_message_bytes(uid, data)
+                if not b_msg:
+                    continue
+            self.eml_queue.put((b_msg, ea, t, uid, '', None))
+        if uids[-1:] != new_uids[-1:]:
+            # no message, just the uid to move the start uid past
+            self.eml_queue.put((None, ea, t, uids[-1], '', None))
 
 
 def get_email_headers_page(ea: EmailAccount, page_num) -> tuple:
@@ -147,73 +202,68 @@ def get_email_headers_page(ea: EmailAccount, page_num) -> tuple:
     page = paginator = None
     per_page = 40
     if not settings.TESTING:
-        crmimap = get_crmimap(ea, 'INBOX')
-        if crmimap.error:
-            crmimap.release()
-            return page, crmimap.error
+        with crmimap_connection(ea, 'INBOX') as crmimap:
+            if crmimap.error:
+                return page, crmimap.error
 
-        # Unfortunately, the SORT command is not supported by all servers
-        # result, data = imap.uid('SORT', '(REVERSE ARRIVAL)', 'UTF-8', 'All')
-        result, data, err = crmimap.search('UNSEEN')
-        if result != 'OK':
-            crmimap.release()
-            return data, err
-        if data:
-            unseen_list = data[0].split()
-        result, data, err = crmimap.search('All')
+            # Unfortunately, the SORT command is not supported by all servers
+            # result, data = imap.uid('SORT', '(REVERSE ARRIVAL)', 'UTF-8', 'All')
+            result, data, err = crmimap.search('UNSEEN')
+            if result != 'OK':
+                return data, err
+            if data:
+                unseen_list = data[0].split()
+            result, data, err = crmimap.search('All')
 
-        if result != 'OK':
-            crmimap.release()
-            return data, err
-        if data:
-            if data != [b'']:
-                uid_list = data[0].split()
-                uid_list.sort(key=lambda x: int(x), reverse=True)
-            else:
-                uid_list = []
-            paginator = Paginator(uid_list, per_page)
-            try:
-                page = paginator.get_page(page_num + 1)  # uids
-            except (EmptyPage, InvalidPage):
-                page = paginator.page(paginator.num_pages)
-            uids_str = b','.join(page)
+            if result != 'OK':
+                return data, err
+            if data:
+                if data != [b'']:
+                    uid_list = data[0].split()
+                    uid_list.sort(key=lambda x: int(x), reverse=True)
+                else:
+                    uid_list = []
+                paginator = Paginator(uid_list, per_page)
+                try:
+                    page = paginator.get_page(page_num + 1)  # uids
+                except (EmptyPage, InvalidPage):
+                    page = paginator.page(paginator.num_pages)
+                uids_str = b','.join(page)
 
-        if uids_str:
-            result, data, err = crmimap.uid_fetch(uids_str, '(BODY.PEEK[HEADER])')
-            crmimap.release()
-            if result == 'OK' and data:
-                # emails = []
-                parser = BytesHeaderParser(policy=email.policy.compat32)
-                for item in data:
-                    if isinstance(item, tuple):
-                        uid = item[0].split(b'UID ')[1].split()[0]
-                        msg = parser.parsebytes(item[1])
-                        subject = ensure_decoding(msg["Subject"])
-                        subject = subject if subject else gettext('No subject')
-                        date = get_email_date(msg)
-                        url = reverse('view_original_email_uid', args=(ea.id, int(uid)))
-                        win_id = 'Window' + uid.decode()
-                        onclick = popup_window(url, win_id)
-                        subject_str = mark_safe(
-                            f'<a href="#" onClick="{onclick}">{subject}</a>'
-                        )
-                        is_exists = CrmEmail.objects.filter(
-                            incoming=True,
-                            creation_date=date,
-                            email_host_user=ea.email_host_user
-                        ).exists()
-                        emails.append({
-                            'subject': subject_str,
-                            'from': ensure_decoding(msg['From']),
-                            'to': ensure_decoding(msg['To']),
-                            'date': date,
-                            'uid': int(uid),
-                            'is_exists': is_exists,
-                            'unseen': uid in unseen_list
-                        })
-                    emails.sort(key=lambda x: x['uid'], reverse=True)
-            else:
-                crmimap.release()
+            if uids_str:
+                result, data, err = crmimap.uid_fetch(uids_str, '(BODY.PEEK[HEADER])')
+
+        if uids_str and result == 'OK' and data:
+            parser = BytesHeaderParser(policy=email.policy.compat32)
+            headers = {
+                uid: parser.parsebytes(header)
+                for uid, header in parse_fetch_data(data).items()
+            }
+            existing_ids = CrmEmail.get_existing_message_ids(
+                ea.email_host_user,
+                [msg['Message-ID'] for msg in headers.values()]
+            )
+            for uid, msg in headers.items():
+                subject = ensure_decoding(msg["Subject"])
+                subject = subject if subject else gettext('No subject')
+                date = get_email_date(msg)
+                url = reverse('view_original_email_uid', args=(ea.id, int(uid)))
+                win_id = 'Window' + uid.decode()
+                onclick = popup_window(url, win_id)
+                subject_str = mark_safe(
+                    f'<a href="#" onClick="{onclick}">{subject}</a>'
+                )
+                is_exists = msg['Message-ID'] in existing_ids
+                emails.append({
+                    'subject': subject_str,
+                    'from': ensure_decoding(msg['From']),
+                    'to': ensure_decoding(msg['To']),
+                    'date': date,
+                    'uid': int(uid),
+                    'is_exists': is_exists,
+                    'unseen': uid in unseen_list
+                })
+            emails.sort(key=lambda x: x['uid'], reverse=True)
     else:
         paginator = Paginator([], per_page)
         page = paginator.get_page(page_num + 1)
@@ -264,3 +314,14 @@ def parse_message_bytes(uid: bytes, data: list) -> Optional[bytes]:
         )
         b_msg = None
     return b_msg
+
+
+def parse_fetch_data(data: list) -> dict:
+    """Map the UIDs of a FETCH response to the fetched content."""
+    result = {}
+    for item in data:
+        if type(item) is tuple and type(item[1]) is bytes:
+            match = uid_pattern.search(item[0])
+            if match:
+                result[match.group(1)] = item[1]
+    return result
@@ -0,0 +1,122 @@
+import re
+from email.utils import getaddresses
+from email.utils import parseaddr
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model
+from django.db.models import Q
+
+from crm.models.match_key import MatchKey
+from crm.settings import PHONE_MATCH_DIGITS
+
+EMAIL_FIELDS = ('email', 'secondary_email')
+PHONE_FIELDS = ('phone', 'other_phone', 'mobile')
+phone_separators = re.compile(r'[,;]')
+
+
+def get_email_key(email: str) -> str:
+    _, addr = parseaddr(email)
+    addr = addr.strip().lower()
+    return addr if '@' in addr else ''
+
+
+def get_email_keys(value: str) -> set:
+    """Get lowercased addresses from a comma-separated list of emails."""
+    return {
+        addr.strip().lower()
+        for _, addr in getaddresses([value.replace(';', ',')])
+        if '@' in addr
+    }
+
+
+def get_match_keys(obj: Model) -> set:
+    """Get (kind, value) pairs of the match keys of an object."""
+    keys = set()
+    for field in EMAIL_FIELDS:
+        for email in get_email_keys(getattr(obj, field, '') or ''):
+            keys.add((MatchKey.EMAIL, email))
+            keys.add((MatchKey.DOMAIN, email.split('@')[-1]))
+    for field in PHONE_FIELDS:
+        for phone in phone_separators.split(getattr(obj, field, '') or ''):
+            key = get_phone_key(phone)
+            if key:
+                keys.add((MatchKey.PHONE, key))
+    return keys
+
+
+def get_match_q_params(model, email: str = '', phone: str = '',
+                       domain: str = '') -> Q:
+    """
+    Get Q object to find objects of the model by match keys
+    of the email, the phone or the email domain.
+    Returns empty Q object if there is nothing to search for.
+    """
+    keys = Q()
+    email = get_email_key(email) if email else ''
+    if email:
+        keys |= Q(kind=MatchKey.EMAIL, value=email)
+    phone = get_phone_key(phone) if phone else ''
+    if phone:
+        keys |= Q(kind=MatchKey.PHONE, value=phone)
+        if len(phone) < PHONE_MATCH_DIGITS:
+            # a short number (without an area code) matches
+            # the stored numbers by their last digits
+            keys |= Q(kind=MatchKey.PHONE, value__startswith=phone)
+    if domain:
+        keys |= Q(kind=MatchKey.DOMAIN, value=domain.strip().lower())
+    if not keys:
+        return keys
+    content_type = ContentType.objects.get_for_model(model)
+    return Q(id__in=MatchKey.objects.filter(
+        keys, content_type=content_type
+    ).values('object_id'))
+
+
+def get_phone_key(phone: str) -> str:
+    """
+    Get last PHONE_MATCH_DIGITS digits of the phone number in reverse
+    order, so numbers written with and without a country code match
+    and short numbers can be found by the prefix of the key.
+    """
+    digits = ''.join(i for i in phone if i.isdigit())
+    return digits[-PHONE_MATCH_DIGITS:][::-1] if len(digits) > 4 else ''
+
+
+def match_keys_handler(sender, instance, created: bool,
+                       update_fields=None, **kwargs) -> None:
+    """Update the match keys of a saved Company, Contact or Lead."""
+    if update_fields and not set(update_fields) & {*EMAIL_FIELDS, *PHONE_FIELDS}:
+        return
+    update_match_keys([instance], created)
+
+
+def update_match_keys(objs: list, created: bool = False) -> None:
+    """
+    Bring match keys of saved objects of the same model
+    into line with their emails and phones.
+    Should be called after bulk creating (created=True)
+    or updating the objects.
+    """
+    if not objs:
+        return
+    content_type = ContentType.objects.get_for_model(objs[0])
+    existing_keys = {}
+    if not created:
+        existing_keys = {
+            (object_id, kind, value): key_id
+            for key_id, object_id, kind, value in MatchKey.objects.filter(
+                content_type=content_type,
+                object_id__in=[obj.id for obj in objs]
+            ).values_list('id', 'object_id', 'kind', 'value')
+        }
+    new_keys = [
+        MatchKey(
+            content_type=content_type, object_id=obj.id,
+            kind=kind, value=value
+        )
+        for obj in objs
+        for kind, value in get_match_keys(obj)
+        if existing_keys.pop((obj.id, kind, value), None) is None
+    ]
+    if existing_keys:
+        MatchKey.objects.filter(id__in=existing_keys.values()).delete()
+    MatchKey.objects.bulk_create(new_keys)
@@ -1,12 +1,16 @@
 import time
 import threading
+from collections import defaultdict
+from datetime import date
 from datetime import timedelta
 from tendo.singleton import SingleInstance
 from django.conf import settings
 from django.core.mail import mail_admins
 from django.db import connection
+from django.db import transaction
 from django.db.models import Exists
 from django.db.models import OuterRef
+from django.dispatch import Signal
 from django.utils import timezone
 from django.utils.module_loading import import_string
 
@@ -15,10 +19,17 @@ from crm.models import Payment
 from crm.models import Rate
 
 
+# Number of loaded rates saved at once
+RATES_BATCH_SIZE = 500
+
 BACKEND = ""
 if settings.LOAD_RATE_BACKEND:
     BACKEND = import_string(settings.LOAD_RATE_BACKEND)
 
+# Sent after official rates are bulk saved
+# with the list of their (currency_id, payment_date) pairs.
+rates_loaded = Signal()
+
 
 class RatesLoader(threading.Thread, SingleInstance):
     
@@ -83,43 +94,102 @@ def get_rates(marketing_currency: Currency, backend=BACKEND) -> None:
             currency.save()
         time.sleep(0.5)
 
+    backfill_rates(marketing_currency, now.date(), backend)
+
+
+def backfill_rates(marketing_currency: Currency, before: date,
+                   backend=BACKEND) -> None:
+    """
+    Load official rates for received payments made before the date.
+    The table of rates of each date is fetched once for all currencies,
+    the rates are saved in bulk by batches, the errors are mailed at the end.
+    """
+    loaded, errors = {}, []
+    for rate_date, currencies in get_missing_rates(before).items():
+        be = backend(marketing_currency.name, marketing_currency.name, rate_date)
+        if be.error:
+            errors.append(f'{rate_date}: {be.error}')
+            continue
+        for currency_id, name in currencies.items():
+            rate_to_state_currency, rate_to_marketing_currency, error = be.get_rates(
+                name, notify=False
+            )
+            if error:
+                errors.append(f'{rate_date} {name}: {error}')
+                break
+            loaded[(currency_id, rate_date)] = (
+                rate_to_state_currency, rate_to_marketing_currency
+            )
+        if len(loaded) >= RATES_BATCH_SIZE:
+            save_rates(loaded)
+            loaded = {}
+        if not be.from_cache:
+            time.sleep(0.5)
+    save_rates(loaded)
+    if errors:
+        mail_admins(
+            "Error getting currency rates",
+            "\n".join(errors),
+            fail_silently=True,
+        )
+
+
+def get_missing_rates(before: date) -> dict:
+    """
+    Get currencies ({id: name}) of received payments without
+    an official rate by payment date. Makes one query.
+    """
     rates = Rate.objects.filter(
         currency=OuterRef('currency'),
         payment_date=OuterRef('payment_date'),
         rate_type=Rate.OFFICIAL
     )
-    while True:
-        payment = Payment.objects.filter(
-            payment_date__lt=now.date(),
-            status=Payment.RECEIVED
-        ).annotate(
-            rate=Exists(rates)
-        ).filter(rate=False).first()
-        if not payment:
-            break
-        currency = payment.currency
-        payment_date = payment.payment_date
-        be = backend(
-            currency.name,
-            marketing_currency.name,
-            payment_date
-        )
-        rate_to_state_currency, rate_to_marketing_currency, error = be.get_rates()
-        if error:
-            break
-        try:
-            r = Rate.objects.get(
-                currency=currency,
-                payment_date=payment_date,
-            )
-        except Rate.DoesNotExist:
-            r = Rate(
-                currency=currency,
+    missing = defaultdict(dict)
+    for payment_date, currency_id, name in Payment.objects.filter(
+        payment_date__lt=before,
+        status=Payment.RECEIVED
+    ).annotate(
+        rate=Exists(rates)
+    ).filter(rate=False).values_list(
+        'payment_date', 'currency_id', 'currency__name'
+    ).distinct().order_by('payment_date'):
+        missing[payment_date][currency_id] = name
+    return missing
+
+
+def save_rates(loaded: dict) -> None:
+    """
+    Save official rates {(currency_id, payment_date): (rate_to_state_currency,
+    rate_to_marketing_currency)}, updating existing approximate rates.
+    """
+    if not loaded:
+        return
+    fields = ('rate_to_state_currency', 'rate_to_marketing_currency', 'rate_type')
+    existing = Rate.objects.filter(
+        currency_id__in={currency_id for currency_id, _ in loaded},
+        payment_date__in={payment_date for _, payment_date in loaded}
+    ).only('currency_id', 'payment_date', *fields)
+    updated, saved = [], set()
+    for rate in existing:
+        key = (rate.currency_id, rate.payment_date)
+        if key in loaded:
+            rate.rate_to_state_currency, rate.rate_to_marketing_currency = loaded[key]
+            rate.rate_type = Rate.OFFICIAL
+            updated.append(rate)
+            saved.add(key)
+    with transaction.atomic():
+        Rate.objects.bulk_update(updated, fields, batch_size=500)
+        Rate.objects.bulk_create([
+            Rate(
+                currency_id=currency_id,
                 payment_date=payment_date,
+                rate_to_state_currency=rate_to_state_currency,
+                rate_to_marketing_currency=rate_to_marketing_currency,
+                rate_type=Rate.OFFICIAL
             )
-        r.rate_to_state_currency = rate_to_state_currency
-        r.rate_to_marketing_currency = rate_to_marketing_currency
-        r.rate_type = Rate.OFFICIAL
-        r.save()
-
-        time.sleep(0.5)
+            for (currency_id, payment_date), (
+                rate_to_state_currency, rate_to_marketing_currency
+            ) in loaded.items()
+            if (currency_id, payment_date) not in saved
+        ], batch_size=500)
+    rates_loaded.send(sender=Rate, keys=list(loaded))
@@ -53,6 +53,14 @@ class RestoreImapEmails(threading.Thread):
             raw_content = ea = t = uid = ''
             try:
                 item, ea, t, uid, ticket, request = self.eml_queue.get()
+                if item is None:
+                    # the emails up to the uid are already imported
+                    uid_data = get_uid_data(ea)
+                    if int(uid) >= getattr(ea, uid_data[t]['start_uid']):
+                        update_ea(ea, uid_data, t, uid)
+                    connection.close()
+                    self.eml_queue.task_done()
+                    continue
                 email_message = email.message_from_bytes(
                     item, policy=email.policy.default)
                 uid_data = get_uid_data(ea)
@@ -117,6 +125,7 @@ class RestoreImapEmails(threading.Thread):
                 if email_message['Message-ID'] is not None:
                     crm_eml.message_id = email_message['Message-ID']
                 if eml_already_exists(email_message, uid):
+                    self.eml_queue.task_done()
                     continue
                 try:
                     self.crm_eml_save(crm_eml, t, uid_data, uid, ea, email_message)
@@ -270,6 +279,7 @@ def attach_files(email_message: email.message.Message, crm_eml: CrmEmail) -> Non
 
 
 def eml_already_exists(email_message, uid) -> bool:
+    # an email sent to several mailboxes is imported only once
     if email_message['Message-ID']:
         return CrmEmail.objects.filter(
             message_id=email_message['Message-ID']).exists()
@@ -20,6 +20,7 @@ from crm.models import CrmEmail
 from crm.models.country import City
 from crm.site.crmadminsite import crm_site
 from massmail.models import MailingOut
+from massmail.models import MailingOutRecipient
 from massmail.models import MassContact
 
 
@@ -102,7 +103,16 @@ class DeleteDuplicateObject(View):
             ids = re.sub(fr",{self.duplicate_id},", f",{self.original_id},", ids)
             ids = re.sub(fr",{self.duplicate_id}$", f",{self.original_id}", ids)
             mo.recipient_ids = ids
-            mo.save()
+            mo.save(update_fields=['recipient_ids'])
+
+        recipients = MailingOutRecipient.objects.filter(
+            mailing_out__content_type=self.content_type,
+            object_id=self.duplicate_id
+        )
+        recipients.exclude(
+            mailing_out__recipients__object_id=self.original_id
+        ).update(object_id=self.original_id)
+        recipients.delete()
 
         TheFile.objects.filter(
             content_type=self.content_type,
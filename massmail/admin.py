@@ -66,14 +66,16 @@ class SignatureAdmin(signatureadmin.SignatureAdmin):
 
 class MailingOutAdmin(mailingoutadmin.MailingOutAdmin):
     exclude = []
-    readonly_fields = list()  # ('recipients_number',)
+    # the recipients are kept in MailingOutRecipient rows,
+    # an edited list of ids would not reach them
+    readonly_fields = ('recipient_ids',)
     fieldsets = (
         (None, {
             'fields': (
                 ('name', 'status'),
                 ('content_type', 'recipients_number'),
                 'message', 'report',
-                'recipient_ids', 'successful_ids', 'failed_ids',
+                'recipient_ids',
                 ('owner', 'modified_by'),
             )
         }),
@@ -13,6 +13,7 @@ from django.utils.translation import gettext_lazy as _
 from common.utils.helpers import FRIDAY_SATURDAY_SUNDAY_MSG
 from massmail.models import EmailAccount
 from massmail.models import MailingOut
+from massmail.models import MailingOutRecipient
 from massmail.models import MassContact
 
 MULTIPLE_OWNERS_MSG = _("Please select recipients only with the same owner.")
@@ -66,19 +67,13 @@ def merge_mailing_outs(modeladmin, request, queryset) -> HttpResponseRedirect:
             multiple_content_types(request, queryset),
             multiple_messages(request, queryset))):
         return HttpResponseRedirect(request.path)
-    recipient_ids, successful_ids, failed_ids = [], [], []
+    recipient_ids = set()
     report, recipients_number = '', 0
     for mo in queryset:
-        r_ids = mo.get_recipient_ids()
-        recipient_ids.extend(r_ids)
-        s_ids = mo.get_successful_ids()
-        successful_ids.extend(s_ids)
-        f_ids = mo.get_failed_ids()
-        failed_ids.extend(f_ids)
+        recipient_ids.update(mo.get_ids(mo.recipient_ids))
         recipients_number += mo.recipients_number
         if mo.report:
             report += f"\n\n<+>\n\n{mo.report}\n\n"
-    recipient_ids = list(set(recipient_ids))
     m_o = queryset.first()
     united = _("united")
     name = m_o.name + f' ({united})'
@@ -88,12 +83,11 @@ def merge_mailing_outs(modeladmin, request, queryset) -> HttpResponseRedirect:
         name = truncatechars(m_o.name, 100 - delta) + f' ({_("united")})'
     m_o.id = None
     m_o.name = name
-    m_o.recipient_ids = ",".join([str(x) for x in recipient_ids])
-    m_o.successful_ids = ",".join([str(x) for x in successful_ids])
-    m_o.failed_ids = ",".join([str(x) for x in failed_ids])
+    m_o.recipient_ids = ",".join([str(x) for x in sorted(recipient_ids)])
     m_o.recipients_number = recipients_number
     m_o.report = report
     m_o.save()
+    merge_recipient_states(m_o, queryset)
     messages.success(
         request,
         f' {queryset.count()} mailing outs have been merged.'
@@ -102,6 +96,30 @@ def merge_mailing_outs(modeladmin, request, queryset) -> HttpResponseRedirect:
     return HttpResponseRedirect(reverse('site:massmail_mailingout_change', args=(m_o.id,)))
 
 
+def merge_recipient_states(mailing_out: MailingOut, queryset) -> None:
+    """Copies delivery states of the merged mailing outs recipients.
+    A successful state takes precedence over a failed one."""
+    fields = ('status', 'attempts', 'last_error', 'sent_at')
+    rows = MailingOutRecipient.objects.filter(
+        mailing_out__in=queryset
+    ).exclude(
+        status=MailingOutRecipient.PENDING
+    ).order_by('status')    # failed first, then successful
+    states = {
+        row['object_id']: row
+        for row in rows.values('object_id', *fields)
+    }
+    recipients = list(mailing_out.recipients.filter(
+        object_id__in=rows.values('object_id')
+    ))
+    for recipient in recipients:
+        for field in fields:
+            setattr(recipient, field, states[recipient.object_id][field])
+    MailingOutRecipient.objects.bulk_update(
+        recipients, fields, batch_size=1000
+    )
+
+
 @admin.action(description=_("Specify VIP recipients"))
 def specify_vip_recipients(modeladmin, request, queryset) -> HttpResponseRedirect:
     if multiple_owners(request, queryset):
@@ -1,5 +1,6 @@
 from tendo.singleton import SingleInstanceException
 from django.apps import AppConfig
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 
@@ -10,6 +11,8 @@ class MassmailConfig(AppConfig):
 
     def ready(self):
         from massmail.utils.sendmassmail import SendMassmail
+        if not settings.BACKGROUND_THREADS:
+            return
         try:
             self.smm = SendMassmail()       # NOQA
             self.smm.start()
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def get_ids(field):
+    if field:
+        return [int(r_id) for r_id in field.split(',')]
+    return []
+
+
+def fill_recipients(apps, schema_editor):
+    MailingOut = apps.get_model('massmail', 'MailingOut')
+    MailingOutRecipient = apps.get_model('massmail', 'MailingOutRecipient')
+    for mo in MailingOut.objects.iterator():
+        states = {}
+        for status, field in (
+                ('P', mo.recipient_ids),
+                ('F', mo.failed_ids),
+                ('S', mo.successful_ids)):
+            for r_id in get_ids(field):
+                states[r_id] = status
+        MailingOutRecipient.objects.bulk_create(
+            (
+                MailingOutRecipient(
+                    mailing_out_id=mo.id, object_id=r_id,
+                    status=status, attempts=int(status != 'P')
+                )
+                for r_id, status in states.items()
+            ),
+            batch_size=1000
+        )
+        mo.recipient_ids = ",".join(map(str, states))
+        mo.save(update_fields=['recipient_ids'])
+
+
+def fill_ids(apps, schema_editor):
+    MailingOut = apps.get_model('massmail', 'MailingOut')
+    for mo in MailingOut.objects.iterator():
+        ids = {'P': [], 'S': [], 'F': []}
+        for object_id, status in mo.recipients.values_list('object_id', 'status'):
+            ids[status].append(object_id)
+        mo.recipient_ids = ",".join(map(str, ids['P']))
+        mo.successful_ids = ",".join(map(str, ids['S']))
+        mo.failed_ids = ",".join(map(str, ids['F']))
+        mo.save(update_fields=['recipient_ids', 'successful_ids', 'failed_ids'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('massmail', '0002_alter_emlmessage_content_alter_signature_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailingOutRecipient',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(db_index=True)),
+                ('status', models.CharField(choices=[('P', 'Pending'), ('S', 'Successful'), ('F', 'Failed')], default='P', max_length=1, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('mailing_out', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='massmail.mailingout')),
+            ],
+            options={
+                'verbose_name': 'Mailing Out recipient',
+                'verbose_name_plural': 'Mailing Out recipients',
+                'indexes': [models.Index(fields=['mailing_out', 'status'], name='massmail_ma_mailing_2e911a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('mailing_out', 'object_id'), name='unique_mailing_out_recipient')],
+            },
+        ),
+        migrations.RunPython(fill_recipients, fill_ids),
+        migrations.RemoveField(
+            model_name='mailingout',
+            name='failed_ids',
+        ),
+        migrations.RemoveField(
+            model_name='mailingout',
+            name='successful_ids',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('massmail', '0003_mailingoutrecipient'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='masscontact',
+            index=models.Index(fields=['content_type', 'object_id'], name='massmail_ma_content_6de383_idx'),
+        ),
+    ]
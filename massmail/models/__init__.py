@@ -1,5 +1,6 @@
 from .signature import Signature
 from .email_message import EmlMessage
+from .mailing_out_recipient import MailingOutRecipient
 from .mailing_out import MailingOut
 from .email_account import EmailAccount
 from .mass_contact import MassContact
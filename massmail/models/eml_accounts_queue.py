@@ -31,15 +31,23 @@ class EmlAccountsQueue(models.Model):
         return len(queue)
 
     def get_next(self):
+        account_ids = self.get_next_ids(1)
+        return account_ids[0] if account_ids else None
+
+    def get_next_ids(self, number):
+        """
+        Returns the next `number` account ids in the round-robin order.
+        The queue is rotated and saved once.
+        """
         queue = self.get_queue()
-        if queue:
-            account_id = queue.pop(0)
-            queue.append(account_id)
-            self.queue = json.dumps(queue)
-            self.save()
-        else:
-            account_id = None
-        return account_id
+        if not queue or not number:
+            return []
+        length = len(queue)
+        account_ids = [queue[i % length] for i in range(number)]
+        shift = number % length
+        self.queue = json.dumps(queue[shift:] + queue[:shift])
+        self.save(update_fields=['queue'])
+        return account_ids
 
     def add_id(self, account_id):
         queue = self.get_queue()
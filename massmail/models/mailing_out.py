@@ -1,9 +1,12 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from common.models import Base1
 from massmail.models import EmlMessage
+from massmail.models.mailing_out_recipient import MailingOutRecipient
 
 
 class MailingOut(Base1):
@@ -45,8 +48,6 @@ class MailingOut(Base1):
         help_text=_("Number of recipients")
     )
     recipient_ids = models.TextField()
-    successful_ids = models.TextField(blank=True, default='')
-    failed_ids = models.TextField(blank=True, default='')
 
     content_type = models.ForeignKey(
         ContentType, blank=True, null=True,
@@ -65,14 +66,38 @@ class MailingOut(Base1):
     today_count = models.PositiveIntegerField(default=0, blank=True)
     sending_date = models.DateField(blank=True, null=True)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding or self.pk is None
+        super().save(*args, **kwargs)
+        if adding:
+            self.add_recipients(self.get_ids(self.recipient_ids))
+
     def get_successful_ids(self):
-        return self.get_ids(self.successful_ids)
+        return self.get_state_ids(MailingOutRecipient.SUCCESSFUL)
 
     def get_failed_ids(self):
-        return self.get_ids(self.failed_ids)
+        return self.get_state_ids(MailingOutRecipient.FAILED)
 
     def get_recipient_ids(self):
-        return self.get_ids(self.recipient_ids)
+        """Returns IDs of recipients who have not yet received the message."""
+        return self.get_state_ids(MailingOutRecipient.PENDING)
+
+    def has_successful_recipients(self):
+        return self.recipients.filter(
+            status=MailingOutRecipient.SUCCESSFUL
+        ).exists()
+
+    def has_failed_recipients(self):
+        return self.recipients.filter(
+            status=MailingOutRecipient.FAILED
+        ).exists()
+
+    def get_state_ids(self, status):
+        return list(
+            self.recipients.filter(
+                status=status
+            ).values_list('object_id', flat=True)
+        )
 
     @staticmethod
     def get_ids(field):
@@ -80,32 +105,38 @@ class MailingOut(Base1):
             return [int(r_id) for r_id in field.split(',')]
         return []
 
+    def add_recipients(self, recipient_ids):
+        MailingOutRecipient.objects.bulk_create(
+            (
+                MailingOutRecipient(mailing_out=self, object_id=r_id)
+                for r_id in recipient_ids
+            ),
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+
     def remove_recipient_ids(self, recipient_id):
-        recipient_ids = self.get_recipient_ids()
-        recipient_ids.remove(recipient_id)
-        self.recipient_ids = ",".join(map(str, recipient_ids))
+        self.recipients.filter(object_id=recipient_id).delete()
 
     def move_to_successful_ids(self, recipient_id):
-        self.remove_recipient_ids(recipient_id)
-        successful_ids = self.get_successful_ids()
-        successful_ids.append(recipient_id)
-        self.successful_ids = ",".join(map(str, successful_ids))
-        self.save()
-
-    def move_to_failed_ids(self, recipient_id):
-        self.remove_recipient_ids(recipient_id)
-        failed_ids = self.get_failed_ids()
-        failed_ids.append(recipient_id)
-        self.failed_ids = ",".join(map(str, failed_ids))
-        self.save()
+        self.recipients.filter(object_id=recipient_id).update(
+            status=MailingOutRecipient.SUCCESSFUL,
+            attempts=F('attempts') + 1,
+            last_error='',
+            sent_at=timezone.now()
+        )
+
+    def move_to_failed_ids(self, recipient_id, error=''):
+        self.recipients.filter(object_id=recipient_id).update(
+            status=MailingOutRecipient.FAILED,
+            attempts=F('attempts') + 1,
+            last_error=str(error)
+        )
 
     def move_to_recipient_ids(self):
-        recipient_ids = self.get_recipient_ids()
-        failed_ids = self.get_failed_ids()
-        recipient_ids.extend(failed_ids)
-        self.recipient_ids = ",".join(map(str, recipient_ids))
-        self.failed_ids = ''
-        self.save()
+        self.recipients.filter(
+            status=MailingOutRecipient.FAILED
+        ).update(status=MailingOutRecipient.PENDING)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class MailingOutRecipient(models.Model):
+    """Delivery state of a single mailing out recipient."""
+
+    class Meta:
+        verbose_name = _('Mailing Out recipient')
+        verbose_name_plural = _('Mailing Out recipients')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['mailing_out', 'object_id'],
+                name='unique_mailing_out_recipient'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['mailing_out', 'status']),
+        ]
+
+    PENDING = 'P'
+    SUCCESSFUL = 'S'
+    FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (SUCCESSFUL, _('Successful')),
+        (FAILED, _('Failed')),
+    )
+    mailing_out = models.ForeignKey(
+        'MailingOut', on_delete=models.CASCADE,
+        related_name="recipients",
+    )
+    object_id = models.PositiveIntegerField(db_index=True)
+    status = models.CharField(
+        max_length=1, choices=STATUS_CHOICES, default=PENDING,
+        verbose_name=_("Status"),
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.mailing_out_id}: {self.object_id} ({self.status})'
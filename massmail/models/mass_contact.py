@@ -5,6 +5,11 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 
 
 class MassContact(models.Model):
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField(db_index=True)
     content_object = GenericForeignKey('content_type', 'object_id')
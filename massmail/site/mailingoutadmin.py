@@ -14,6 +14,7 @@ from crm.site.crmmodeladmin import CrmModelAdmin
 from crm.utils.admfilters import ByOwnerFilter
 from massmail.admin_actions import merge_mailing_outs
 from massmail.models import EmailAccount
+from massmail.models import MailingOutRecipient
 from massmail.utils.adminfilters import StatusMailingFilter
 from massmail.utils.helpers import get_rendered_msg
 from settings.models import MassmailSettings
@@ -49,7 +50,7 @@ class MailingOutAdmin(CrmModelAdmin):
     list_filter = (StatusMailingFilter, ByOwnerFilter)
     save_on_top = True
     exclude = (
-        'recipient_ids', 'successful_ids', 'failed_ids', 'department',
+        'recipient_ids', 'department',
     )
     readonly_fields = (
         'recipients_number', 'owner', 'modified_by',
@@ -213,8 +214,9 @@ class MailingOutAdmin(CrmModelAdmin):
     @staticmethod
     @admin.display(description=progress_safe_str)
     def progress(instance):
-        rt_ids = instance.get_recipient_ids()
-        tn = len(rt_ids)
+        tn = instance.recipients.filter(
+            status=MailingOutRecipient.PENDING
+        ).count()
         rn = instance.recipients_number
         if rn == 0:
             return '0 %'
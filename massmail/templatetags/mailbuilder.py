@@ -1,3 +1,6 @@
+import threading
+from collections import OrderedDict
+from email import encoders
 from pathlib import Path
 from email.mime.image import MIMEImage
 from urllib.parse import quote
@@ -7,6 +10,11 @@ from django.conf import settings
 
 register = Library()
 
+# Base64 encoded images by (path, mtime, size), least recently used first
+_images = OrderedDict()
+_images_lock = threading.Lock()
+_images_size = 0
+
 
 @register.simple_tag(takes_context=True)
 def cid_static(context, file_name):
@@ -14,10 +22,9 @@ def cid_static(context, file_name):
     Embed a file from static files.
     """
     file_path = settings.STATIC_ROOT / (file_name + "")
-    file_obj = open(file_path, 'rb')
     return _embed_cid(
         context,
-        file_obj,
+        file_path,
         file_name,
         settings.STATIC_URL
     )
@@ -29,17 +36,15 @@ def cid_media(context, file_name):
     Embed a file from a media files
     """
     file_path = settings.MEDIA_ROOT / (file_name + "")
-    file_obj = open(file_path, 'rb')
-
     return _embed_cid(
         context,
-        file_obj,
+        file_path,
         file_name,
         settings.MEDIA_URL
     )
 
 
-def _embed_cid(context, file_obj, file_name, url):
+def _embed_cid(context, file_path, file_name, url):
     """
     Generates a CID URI, and stores the MIME attachment
     in the context.request_context
@@ -47,8 +52,7 @@ def _embed_cid(context, file_obj, file_name, url):
     cid = uuid4()
     if 'cid' not in context:
         context['cid'] = []
-    img = MIMEImage(file_obj.read(), name=file_name)
-    file_obj.close()
+    img = get_image(Path(file_path), file_name)
     img.add_header(
         'Content-ID',
         '<{}>'.format(quote(str(cid)))
@@ -57,3 +61,33 @@ def _embed_cid(context, file_obj, file_name, url):
     if context.get('preview', False):
         return Path(url) / (file_name + "")
     return 'cid:{}'.format(cid)
+
+
+def get_image(file_path: Path, file_name: str) -> MIMEImage:
+    """
+    Get a new MIME part of the image. The file is read and encoded once
+    while it is not changed; the encoded images are kept in memory
+    up to settings.INLINE_IMAGE_CACHE_SIZE bytes.
+    """
+    global _images_size
+    stat = file_path.stat()
+    key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+    with _images_lock:
+        image = _images.get(key)
+        if image:
+            _images.move_to_end(key)
+    if not image:
+        img = MIMEImage(file_path.read_bytes())
+        image = (img.get_content_subtype(), img.get_payload())
+        size = len(image[1])
+        with _images_lock:
+            if key not in _images and size <= settings.INLINE_IMAGE_CACHE_SIZE:
+                _images[key] = image
+                _images_size += size
+                while _images_size > settings.INLINE_IMAGE_CACHE_SIZE:
+                    _, (_, payload) = _images.popitem(last=False)
+                    _images_size -= len(payload)
+    subtype, payload = image
+    img = MIMEImage(payload, subtype, encoders.encode_noop, name=file_name)
+    img['Content-Transfer-Encoding'] = 'base64'
+    return img
@@ -1,3 +1,5 @@
+import threading
+from collections import OrderedDict
 from typing import Union
 from django.conf import settings
 from django.core.handlers.wsgi import WSGIRequest
@@ -18,30 +20,27 @@ from massmail.models.email_account import EmailAccount
 prev_corr_blockquote = '<blockquote style="padding-left:1ex; border-left:#ccc 1px' \
                 ' solid; margin:0px 0px 0px 0.8ex">{}</blockquote>'
 
+# The number of mass mailing messages whose compiled templates are kept.
+TEMPLATE_CACHE_SIZE = 100
+
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
 
 def email_creator(eml_message: Union[CrmEmail, EmlMessage],
                   email_account: EmailAccount,
                   to: list, cc: list = None, bcc: list = None,
                   extra_context: dict = None, force_multipart: bool = False,
-                  inline_images: bool = False
+                  inline_images: bool = False, connection=None,
+                  files: list = None
                   ) -> Union[EmailMultiAlternatives, EmailMessage]:
     extra_context = extra_context or {}
     extra_context = Context(extra_context)
-    tmpl = Template(eml_message.subject)
-    subject = tmpl.render(extra_context)
-    signature = eml_message.signature.content if eml_message.signature else ''
-    tmpl = Template(
-        "{% load mailbuilder %}"
-        + linebreaks(eml_message.content)
-        + "<p> </p>"
-        + signature
-        + "<p> </p>" + "<p> </p>"
-        + "<p>-----------------</p>"
-        + prev_corr_blockquote.format(linebreaks(eml_message.prev_corr))
-    )
+    subject_tmpl, tmpl = get_templates(eml_message)
+    subject = subject_tmpl.render(extra_context)
     # extra_context.bind_template(tmpl)    # it doesn't work
     html_content = tmpl.render(extra_context)
-    data = _get_data(html_content, to, email_account, subject)
+    data = _get_data(html_content, to, email_account, subject, connection)
     if cc:
         data['cc'] = cc
     if bcc:
@@ -52,7 +51,48 @@ def email_creator(eml_message: Union[CrmEmail, EmlMessage],
         }
 
     return _get_msg(force_multipart, html_content, data, 
-             inline_images, extra_context, eml_message)
+             inline_images, extra_context, eml_message, files)
+
+
+def get_templates(eml_message: Union[CrmEmail, EmlMessage]) -> tuple:
+    """
+    Returns the compiled subject and body templates of the message.
+    Templates of EmlMessage are cached by its id and modification date.
+    """
+    if not isinstance(eml_message, EmlMessage) or not eml_message.id:
+        return _compile_templates(eml_message)
+    signature = eml_message.signature
+    version = (
+        eml_message.update_date,
+        signature.id if signature else None,
+        signature.update_date if signature else None
+    )
+    with _templates_lock:
+        cached = _templates.get(eml_message.id)
+        if cached and cached[0] == version:
+            _templates.move_to_end(eml_message.id)
+            return cached[1]
+    templates = _compile_templates(eml_message)
+    with _templates_lock:
+        _templates[eml_message.id] = (version, templates)
+        _templates.move_to_end(eml_message.id)
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+    return templates
+
+
+def _compile_templates(eml_message: Union[CrmEmail, EmlMessage]) -> tuple:
+    signature = eml_message.signature.content if eml_message.signature else ''
+    tmpl = Template(
+        "{% load mailbuilder %}"
+        + linebreaks(eml_message.content)
+        + "<p> </p>"
+        + signature
+        + "<p> </p>" + "<p> </p>"
+        + "<p>-----------------</p>"
+        + prev_corr_blockquote.format(linebreaks(eml_message.prev_corr))
+    )
+    return Template(eml_message.subject), tmpl
 
 
 def create_test_email(request: WSGIRequest, message_id: int,
@@ -77,40 +117,45 @@ def create_test_email(request: WSGIRequest, message_id: int,
              inline_images, extra_context, eml_message)
 
 
-def _get_data(html_content, to, email_account, subject) -> dict:
+def _get_data(html_content, to, email_account, subject,
+              connection=None) -> dict:
     body = strip_tags(html_content)
     return {
         'to': to,
         'from_email': email_account.from_email,
         'subject': subject,
         'body': body,
-        'connection': email_connection(email_account)
+        'connection': connection or email_connection(email_account)
     }    
 
 
 def _get_msg(force_multipart, html_content, data, 
-             inline_images, extra_context, eml_message) -> EmailMessage:
+             inline_images, extra_context, eml_message,
+             files=None) -> EmailMessage:
     if force_multipart or html_content:
         msg = EmailMultiAlternatives(**data)
         if html_content:
             msg.attach_alternative(html_content, 'text/html')
+        inline_files = []
         if inline_images:
-            inline_files = []
             for att in extra_context.get('cid', []):
                 msg.attach(att)
                 inline_files.append(att.get_filename())
-        files = eml_message.files.all()
-        if files and inline_files:
-            for f in inline_files:
-                files = files.exclude(file=f)
-        if files:
-            for f in files:
-                msg.attach_file(settings.MEDIA_ROOT / f.file.name)
+        if files is None:
+            files = get_file_names(eml_message)
+        for file_name in files:
+            if file_name not in inline_files:
+                msg.attach_file(settings.MEDIA_ROOT / file_name)
     else:
         msg = EmailMessage(**data)
     return msg
 
 
+def get_file_names(eml_message: Union[CrmEmail, EmlMessage]) -> list:
+    """Returns names of the files attached to the message."""
+    return [f.file.name for f in eml_message.files.all()]
+
+
 def email_connection(email_account: EmailAccount):
     if email_account.refresh_token:
         connection = OAuth2EmailBackend(refresh_token=email_account.refresh_token)
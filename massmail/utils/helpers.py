@@ -1,7 +1,13 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import OuterRef
 from django.template import Context
 from django.template import Template
 
 from common.utils.get_signature_preview import get_rendered_context
+from massmail.models import EmlAccountsQueue
+from massmail.models import MassContact
 from massmail.models.email_message import EmlMessage
 
 
@@ -19,3 +25,59 @@ def get_rendered_msg(message: EmlMessage, show_signature: bool = True) -> str:
     context = Context({'preview': True})
     
     return get_rendered_context(template, context)
+
+
+def assign_email_accounts(owner, masscontacts=(),
+                          content_type: ContentType = None,
+                          object_ids=()) -> bool:
+    """
+    Distributes the owner's email accounts between mass contacts
+    in the round-robin order. The `masscontacts` are updated and
+    new mass contacts are created for `object_ids`.
+    Returns False if the owner has no email accounts in the queue.
+    """
+    masscontacts = list(masscontacts)
+    object_ids = list(object_ids)
+    with transaction.atomic():
+        queue_obj = EmlAccountsQueue.objects.select_for_update().filter(
+            owner=owner
+        ).first()
+        if not queue_obj:
+            return False
+        account_ids = queue_obj.get_next_ids(
+            len(masscontacts) + len(object_ids)
+        )
+        if not account_ids:
+            return False
+        for mc, account_id in zip(masscontacts, account_ids):
+            mc.email_account_id = account_id
+        MassContact.objects.bulk_update(
+            masscontacts, ['email_account'], batch_size=1000
+        )
+        MassContact.objects.bulk_create(
+            (
+                MassContact(
+                    content_type=content_type,
+                    object_id=object_id,
+                    email_account_id=account_id
+                )
+                for object_id, account_id in zip(
+                    object_ids, account_ids[len(masscontacts):]
+                )
+            ),
+            batch_size=1000
+        )
+    return True
+
+
+def vip_status_exists(model, vip: bool = True) -> Exists:
+    """
+    Expression of whether the recipient (company, contact or lead) has
+    a mass contact with the main email account (VIP) or another one.
+    Filter recipients with it instead of lists of their ids.
+    """
+    return Exists(MassContact.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id=OuterRef('pk'),
+        email_account__main=vip
+    ))
@@ -1,6 +1,7 @@
 import random
 import threading
 import time
+import uuid
 from datetime import datetime
 from datetime import timedelta
 from email.errors import HeaderParseError
@@ -10,7 +11,6 @@ from smtplib import SMTPRecipientsRefused
 from smtplib import SMTPServerDisconnected
 from smtplib import SMTPSenderRefused
 from tendo.singleton import SingleInstance
-from typing import Optional
 from typing import Union
 from django.apps import apps
 from django.conf import settings
@@ -33,13 +33,19 @@ from crm.models import Company
 from crm.models import Contact
 from crm.models import Lead
 from massmail.models import EmailAccount
-from massmail.models import EmlAccountsQueue
 from massmail.models import MailingOut
+from massmail.models import MailingOutRecipient
 from massmail.models import MassContact
+from massmail.utils.email_creators import email_connection
 from massmail.utils.email_creators import email_creator
+from massmail.utils.email_creators import get_file_names
+from massmail.utils.helpers import assign_email_accounts
 from settings.models import MassmailSettings
 
 USER_MODEL = get_user_model()
+RECIPIENT_BATCH_SIZE = 100
+WORKER_PASS_TIME = 5 * 60     # seconds an account worker sends in one pass
+
 
 class SendMassmail(threading.Thread, SingleInstance):
 
@@ -65,6 +71,7 @@ class SendMassmail(threading.Thread, SingleInstance):
         if not settings.MAILING or settings.TESTING:
             return
 
+        dispatcher = MassmailDispatcher()
         while True:
             massmail_settings.refresh_from_db()
             if massmail_settings.use_business_time:
@@ -73,90 +80,318 @@ class SendMassmail(threading.Thread, SingleInstance):
                     connection.close()
                     time.sleep(s + random.randint(120, 300))
 
-            send_massmail(massmail_settings)
+            dispatcher.dispatch(massmail_settings)
             time.sleep(30)
 
 
 def send_massmail(massmail_settings: MassmailSettings) -> None:
-    try:
+    MassmailDispatcher().dispatch(massmail_settings)
+
+
+class TokenBucket:
+    """
+    Rate limiter for a single email account.
+    Tokens are refilled at `rate` per second up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.timestamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self) -> float:
+        """
+        Takes a token and returns the number of seconds
+        to wait before it may be used.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.timestamp) * self.rate
+            )
+            self.timestamp = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+
+class MassmailDispatcher:
+    """
+    Sends active mailing outs with one worker per email account.
+    The token buckets live as long as the dispatcher so that
+    the sending rate is kept between passes.
+    Each worker sends for at most WORKER_PASS_TIME per pass, so
+    new mailing outs and accounts do not wait for the slowest one.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+
+    def dispatch(self, massmail_settings: MassmailSettings) -> None:
+        try:
+            workers = self.get_workers(massmail_settings)
+            if settings.TESTING:
+                # worker threads would not see the test transaction
+                for worker in workers:
+                    worker.run()
+                return
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        except Exception as err:
+            msg = f"Exception at send_massmail"
+            mail_admins(
+                msg,
+                f'''{msg}\n
+                \nException:____{err}
+                ''',
+            )
+
+    def get_bucket(self, email_account: EmailAccount,
+                   massmail_settings: MassmailSettings) -> TokenBucket:
+        rate = max(massmail_settings.emails_per_hour, 1) / 3600
+        bucket = self.buckets.get(email_account.id)
+        if not bucket or bucket.rate != rate:
+            bucket = TokenBucket(rate)
+            self.buckets[email_account.id] = bucket
+        return bucket
+
+    def get_workers(self, massmail_settings: MassmailSettings) -> list:
         mailing_outs = MailingOut.objects.filter(
             status__in=['A', 'E']
         ).order_by('?')
         if not mailing_outs:
-            return
-        
-        now = get_now()
-        today = now.date()
-        mailing_outs = check_owners(mailing_outs)
+            return []
 
-        while mailing_outs:
-            mailing_out = mailing_outs.pop(0)
+        today = get_now().date()
+        workers = []
+        for mailing_out in check_owners(mailing_outs):
             if mailing_out.sending_date != today:
                 mailing_out.today_count = 0
             recipient_ids = get_recipient_ids(mailing_out)
             if not recipient_ids:
                 continue
             fix_masscontacts(mailing_out, recipient_ids)
+            # all workers of the owner share the mailing out instance
+            lock = threading.Lock()
             email_accounts = EmailAccount.objects.filter(
                 owner=mailing_out.owner,
                 massmail=True
             )
             for ea in email_accounts:
-                if ea.today_date == today:
-                    if ea.today_count > massmail_settings.emails_per_day:
-                        continue
-                else:
-                    ea.today_count = 0
-                mc = _get_masscontact(
-                    mailing_out, recipient_ids, ea)
-                if not mc:
-                    continue
-
-                recipient = get_recipient(mailing_out, mc)
-                if not recipient:
-                    continue
-
-                extra_context = get_extra_context(mc)
-                to = extra_context['to'].split(',')
-                try:
-                    msg = email_creator(
-                        mailing_out.message, ea, to=to,
-                        extra_context=extra_context,
-                        force_multipart=True, inline_images=True
-                    )
-                    if settings.MAILING or not settings.MAILING and settings.TESTING:
-                        msg.send(fail_silently=False)
-                    mailing_out.move_to_successful_ids(mc.object_id)
-                except (SMTPAuthenticationError, SMTPSenderRefused) as e:
-                    off = True
-                    report(ea, mailing_out, mc, now, e, off)
-                    continue
-
-                except (
-                        SMTPDataError, BadHeaderError, SMTPRecipientsRefused,
-                        SMTPServerDisconnected, IndexError, HeaderParseError,
-                        FileNotFoundError
-                ) as e:
-                    report(ea, mailing_out, mc, now, e)
-                    continue
-
-                except Exception as e:
-                    report(ea, mailing_out, mc, now, e)
-                    continue
-
-                counter_increment(ea, mailing_out, today)
-
-                if not settings.TESTING:
-                    time.sleep(random.randint(15, 35))
-    except Exception as err:
-        msg = f"Exception at send_massmail"
-        mail_admins(
-            msg,
-            f'''{msg}\n
-            \nException:____{err}
-            ''',
+                workers.append(AccountWorker(
+                    ea, mailing_out, lock,
+                    self.get_bucket(ea, massmail_settings),
+                    massmail_settings
+                ))
+        return workers
+
+
+class RecipientLoader:
+    """
+    Loads mass contacts in batches together with their recipients
+    and builds the recipient context of the message.
+    """
+    # Fields loaded from the database for each recipient model
+    # and the fields passed to the message context
+    # (the first one is the recipient address).
+    fields = {
+        Contact: (
+            ('email', 'first_name', 'middle_name', 'last_name',
+             'title', 'company__full_name'),
+            ('email', 'first_name', 'first_middle_name',
+             'last_name', 'full_name', 'title', 'company')
+        ),
+        Company: (
+            ('email', 'full_name'),
+            ('email', 'full_name')
+        ),
+        Lead: (
+            ('email', 'first_name', 'middle_name', 'last_name',
+             'title', 'company_name', 'disqualified'),
+            ('email', 'first_name', 'first_middle_name',
+             'last_name', 'full_name', 'title', 'company_name')
+        ),
+    }
+
+    def __init__(self, content_type: ContentType):
+        self.model = content_type.model_class()
+        self.only_fields, self.context_fields = self.fields[self.model]
+        self.domain = Site.objects.get_current().domain
+        self.placeholder = str(uuid.UUID(int=0))
+        self.unsubscribe_url = reverse(
+            'unsubscribe', args=[self.placeholder]
         )
 
+    def get_batches(self, masscontacts):
+        """
+        Yields lists of (mass contact, recipient) pairs.
+        The recipient is None if it no longer exists.
+        """
+        last_id = 0
+        while True:
+            mcs = list(
+                masscontacts.filter(id__gt=last_id).order_by('id')[:RECIPIENT_BATCH_SIZE]
+            )
+            if not mcs:
+                return
+            last_id = mcs[-1].id
+            recipients = self.model.objects.filter(
+                id__in=[mc.object_id for mc in mcs]
+            ).only(*self.only_fields)
+            if self.model is Contact:
+                recipients = recipients.select_related('company')
+            recipients = {r.id: r for r in recipients}
+            yield [(mc, recipients.get(mc.object_id)) for mc in mcs]
+
+    def get_extra_context(self, mc: MassContact,
+                          recipient: Union[Company, Contact, Lead]) -> dict:
+        url = self.unsubscribe_url.replace(self.placeholder, str(mc.uuid))
+        extra_context = {
+            'unsubscribe_url': self.domain + url
+        }
+        fields = list(self.context_fields)
+        field = fields.pop(0)
+        extra_context['to'] = getattr(recipient, field)
+        for field in fields:
+            extra_context[field] = getattr(recipient, field)
+        return extra_context
+
+
+class AccountWorker(threading.Thread):
+    """
+    Sends the messages of a mailing out assigned to one email account
+    over a single SMTP connection.
+    """
+
+    def __init__(self, email_account: EmailAccount, mailing_out: MailingOut,
+                 lock: threading.Lock,
+                 bucket: TokenBucket, massmail_settings: MassmailSettings):
+        super().__init__(daemon=True)
+        self.ea = email_account
+        self.mailing_out = mailing_out
+        self.lock = lock
+        self.bucket = bucket
+        self.massmail_settings = massmail_settings
+        self.connection = email_connection(email_account)
+        self.opened = False
+        self.files = None
+        self.deadline = None
+
+    def run(self):
+        try:
+            self.send()
+        except Exception as err:
+            msg = f"Exception at send_massmail ({self.ea})"
+            mail_admins(
+                msg,
+                f'''{msg}\n
+                \nException:____{err}
+                ''',
+            )
+        finally:
+            self.connection.close()
+            if not settings.TESTING:
+                connection.close()
+
+    def send(self) -> None:
+        self.deadline = time.monotonic() + WORKER_PASS_TIME
+        message = self.mailing_out.message
+        self.files = get_file_names(message) if message else []
+        pending_ids = self.mailing_out.recipients.filter(
+            status=MailingOutRecipient.PENDING
+        ).values('object_id')
+        masscontacts = MassContact.objects.filter(
+            content_type=self.mailing_out.content_type,
+            object_id__in=pending_ids,
+            email_account=self.ea,
+            massmail=True
+        )
+        loader = RecipientLoader(self.mailing_out.content_type)
+        for batch in loader.get_batches(masscontacts):
+            for mc, recipient in batch:
+                if not self.can_send():
+                    return
+                wait = self.bucket.consume()
+                if wait and not settings.TESTING:
+                    time.sleep(wait)
+                with self.lock:
+                    if not check_recipient(self.mailing_out, mc, recipient):
+                        continue
+                extra_context = loader.get_extra_context(mc, recipient)
+                if not self.send_one(mc, extra_context):
+                    return
+
+    def can_send(self) -> bool:
+        if time.monotonic() >= self.deadline:
+            return False    # the rest is sent in the next pass
+        today = get_now().date()
+        if self.ea.today_date != today:
+            self.ea.today_count = 0
+        if self.ea.today_count >= self.massmail_settings.emails_per_day:
+            return False
+        if self.massmail_settings.use_business_time:
+            if get_seconds_to_business_time(self.massmail_settings) > 0:
+                return False
+        return MailingOut.objects.filter(
+            id=self.mailing_out.id,
+            status__in=['A', 'E']
+        ).exists()
+
+    def send_one(self, mc: MassContact, extra_context: dict) -> bool:
+        """
+        Sends a message to the mass contact.
+        Returns False if the email account can no longer be used.
+        """
+        now = get_now()
+        to = extra_context['to'].split(',')
+        try:
+            msg = email_creator(
+                self.mailing_out.message, self.ea, to=to,
+                extra_context=extra_context,
+                force_multipart=True, inline_images=True,
+                connection=self.connection, files=self.files
+            )
+            if settings.MAILING or not settings.MAILING and settings.TESTING:
+                if not self.opened:
+                    self.connection.open()
+                    self.opened = True
+                msg.send(fail_silently=False)
+        except (SMTPAuthenticationError, SMTPSenderRefused) as e:
+            with self.lock:
+                report(self.ea, self.mailing_out, mc, now, e, off=True)
+            return False
+
+        except SMTPServerDisconnected as e:
+            self.connection.close()
+            self.opened = False
+            with self.lock:
+                report(self.ea, self.mailing_out, mc, now, e)
+            return True
+
+        except (
+                SMTPDataError, BadHeaderError, SMTPRecipientsRefused,
+                IndexError, HeaderParseError, FileNotFoundError
+        ) as e:
+            with self.lock:
+                report(self.ea, self.mailing_out, mc, now, e)
+            return True
+
+        except Exception as e:
+            with self.lock:
+                report(self.ea, self.mailing_out, mc, now, e)
+            return True
+
+        with self.lock:
+            self.mailing_out.move_to_successful_ids(mc.object_id)
+            counter_increment(self.ea, self.mailing_out, now.date())
+        return True
+
 
 def check_owners(mailing_outs) -> list:
     owner_list = []
@@ -178,22 +413,26 @@ def counter_increment(
 ) -> None:
     email_account.today_count += 1
     email_account.today_date = today
-    email_account.save()
+    email_account.save(update_fields=['today_count', 'today_date'])
     mailing_out.today_count += 1
     mailing_out.sending_date = today
-    mailing_out.save()
+    mailing_out.save(update_fields=['today_count', 'sending_date'])
 
 
-def get_recipient(
-        mailing_out: MailingOut, mc: MassContact
-) -> Union[Company, Contact, Lead]:
-    recipient = mc.content_object
-    if not recipient:
-        mailing_out.remove_recipient_ids(mc.object_id)
-        mailing_out.recipients_number -= 1
-        mailing_out.save()
-        mc.delete()
-    return recipient
+def check_recipient(
+        mailing_out: MailingOut, mc: MassContact,
+        recipient: Union[Company, Contact, Lead, None]
+) -> bool:
+    """Removes the mass contact from the mailing out
+    if its recipient no longer exists."""
+    if recipient:
+        mc.content_object = recipient
+        return True
+    mailing_out.remove_recipient_ids(mc.object_id)
+    mailing_out.recipients_number -= 1
+    mailing_out.save(update_fields=['recipients_number'])
+    mc.delete()
+    return False
 
 
 def get_recipient_ids(mailing_out: MailingOut) -> list:
@@ -205,33 +444,20 @@ def get_recipient_ids(mailing_out: MailingOut) -> list:
 
 
 def fix_masscontacts(mailing_out: MailingOut, recipient_ids: list) -> None:
-    wrong_masscontacts = MassContact.objects.filter(
+    masscontacts = MassContact.objects.filter(
         content_type=mailing_out.content_type,
         object_id__in=recipient_ids,
-    ).exclude(email_account__owner=mailing_out.owner)
-    if wrong_masscontacts:
-        queue_obj = EmlAccountsQueue.objects.get(owner=mailing_out.owner)
-        for masscontact in wrong_masscontacts:
-            email_account_id = queue_obj.get_next()
-            if email_account_id:
-                masscontact.email_account_id = email_account_id
-                masscontact.save(update_fields=["email_account_id"])
-    # set masscontact
-    recipient_ids_with = MassContact.objects.filter(
-        content_type=mailing_out.content_type,
-        object_id__in=recipient_ids
-    ).values_list('object_id', flat=True)
-    recipient_ids_without = list(set(recipient_ids) - set(recipient_ids_with))
-    if recipient_ids_without:
-        queue_obj = EmlAccountsQueue.objects.get(owner=mailing_out.owner)
-        for recipient_id in recipient_ids_without:
-            email_account_id = queue_obj.get_next()
-            if email_account_id:
-                MassContact.objects.create(
-                    content_type=mailing_out.content_type,
-                    object_id=recipient_id,
-                    email_account_id=email_account_id
-                )
+    )
+    wrong_masscontacts = masscontacts.exclude(
+        email_account__owner=mailing_out.owner
+    )
+    recipient_ids_with = masscontacts.values_list('object_id', flat=True)
+    recipient_ids_without = set(recipient_ids) - set(recipient_ids_with)
+    if wrong_masscontacts or recipient_ids_without:
+        assign_email_accounts(
+            mailing_out.owner, wrong_masscontacts,
+            mailing_out.content_type, sorted(recipient_ids_without)
+        )
 
 
 def get_seconds_to_business_time(massmail_settings: MassmailSettings) -> float:
@@ -283,57 +509,12 @@ def report(
         email_account.save()
     mailing_out.report = report_str + mailing_out.report
     mailing_out.status = 'E'
+    mailing_out.save(update_fields=['report', 'status'])
     if off:
-        mailing_out.save()
         subj = 'Massmail error: ' + f'{mc.content_object}'
         mail_admins(subj, mailing_out.report, fail_silently=True)
     else:
-        mailing_out.move_to_failed_ids(mc.object_id)
-
-
-def get_extra_context(mc: MassContact) -> dict:
-    data = {
-        ContentType.objects.get_for_model(Contact): [
-            'email', 'first_name', 'first_middle_name',
-            'last_name', 'full_name',
-            'title', 'company'
-        ],
-        ContentType.objects.get_for_model(Company): [
-            'email', 'full_name'
-        ],
-        ContentType.objects.get_for_model(Lead): [
-            'email', 'first_name', 'first_middle_name',
-            'last_name', 'full_name',
-            'title', 'company_name'
-        ]
-    }
-    url = reverse(
-            'unsubscribe', args=[mc.uuid]
-    )
-    extra_context = {
-        'unsubscribe_url': Site.objects.get(
-            pk=settings.SITE_ID
-        ).domain + url
-    }
-    fields = data[mc.content_type].copy()
-    field = fields.pop(0)
-    extra_context['to'] = getattr(mc.content_object, field)
-    for field in fields:
-        extra_context[field] = getattr(mc.content_object, field)
-    return extra_context
-
-
-def _get_masscontact(
-        mailing_out: MailingOut,
-        recipient_ids: list,
-        email_account: EmailAccount) -> Optional[MassContact]:
-
-    return MassContact.objects.filter(
-        content_type=mailing_out.content_type,
-        object_id__in=recipient_ids,
-        email_account=email_account,
-        massmail=True
-    ).first()
+        mailing_out.move_to_failed_ids(mc.object_id, error)
 
 
 def _success_report(mailing_out: MailingOut) -> None:
@@ -8,6 +8,7 @@ from django.utils.translation import gettext_lazy as _
 def send_failed_recipients(request, object_id):
     mo = MailingOut.objects.get(id=object_id)
     mo.status = 'A'
+    mo.save(update_fields=['status'])
     mo.move_to_recipient_ids()
     messages.success(
             request, 
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
 
 
 class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'menu'
+
+    def ready(self):
+        from .models import MenuGroup, MenuItem
+        from .navigation import bump_navigation_version
+
+        for model in (MenuGroup, MenuItem):
+            post_save.connect(bump_navigation_version, sender=model)
+            post_delete.connect(bump_navigation_version, sender=model)
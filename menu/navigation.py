@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import threading
+from time import monotonic
+from typing import Any
+
+from django.core.cache import cache
+
+from .models import MenuGroup
+
+VERSION_KEY = "menu_navigation_version"
+# The version is kept in the cache of the process, so changes made
+# in other processes are picked up after this number of seconds.
+NAVIGATION_TIMEOUT = 60
+
+_lock = threading.Lock()
+# (version, build time, navigation) - replaced as a whole, never mutated
+_navigation: tuple[Any, float, tuple] = (None, 0.0, ())
+
+
+def bump_navigation_version(**kwargs) -> None:
+    """Signal receiver: the menu has changed, rebuild the navigation."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def get_navigation(request=None) -> tuple:
+    """
+    Return the sidebar navigation for UNFOLD['SIDEBAR']['navigation'].
+
+    The navigation is built from the menu groups and items only when
+    the version stored in the cache differs from the built one
+    or the built one is older than NAVIGATION_TIMEOUT seconds.
+    Unfold deep-copies the navigation before using it.
+    """
+    global _navigation
+
+    version = cache.get(VERSION_KEY, 0)
+    if not is_fresh(version):
+        with _lock:
+            if not is_fresh(version):
+                _navigation = (version, monotonic(), build_navigation())
+    return _navigation[2]
+
+
+def is_fresh(version) -> bool:
+    built_version, built_at, _ = _navigation
+    return built_version == version and monotonic() - built_at < NAVIGATION_TIMEOUT
+
+
+def build_navigation() -> tuple:
+    navigation = []
+    for group in MenuGroup.objects.prefetch_related("items"):
+        items = tuple(
+            {
+                "title": item.title,
+                "icon": item.icon,
+                "link": item.link,
+            }
+            for item in group.items.all()
+        )
+        # only show groups that have at least 1 item
+        if items:
+            navigation.append({
+                "title": group.title,
+                "separator": group.separator,
+                "collapsible": group.collapsible,
+                "items": items,
+            })
+    return tuple(navigation)
@@ -34,6 +34,7 @@ class MassmailSettingsAdmin(ModelAdmin):
             {
                 "fields": (
                     "emails_per_day",
+                    "emails_per_hour",
                     "use_business_time",
                     "business_time_start",
                     "business_time_end",
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('settings', '0003_massmailsettings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='massmailsettings',
+            name='emails_per_hour',
+            field=models.PositiveIntegerField(default=120, help_text='Hourly sending rate for each email account.'),
+        ),
+    ]
@@ -44,6 +44,10 @@ class MassmailSettings(models.Model):
         default=94,
         help_text="Daily message limit for email accounts."
     )
+    emails_per_hour = models.PositiveIntegerField(
+        default=120,
+        help_text="Hourly sending rate for each email account."
+    )
     use_business_time = models.BooleanField(
         default=False,
         help_text="Send only during business hours."
@@ -0,0 +1,97 @@
+from datetime import date
+from decimal import Decimal
+from django.conf import settings
+from django.test import TestCase
+
+from analytics.models import IncomeFact
+from analytics.utils.helpers import get_income_over_time
+from common.models import Department
+from common.utils.helpers import get_delta_date
+from crm.models import Currency
+from crm.models import Deal
+from crm.models import Payment
+from crm.models import Rate
+from crm.utils.ticketproc import new_ticket
+from tests.utils.helpers import get_user
+
+# manage.py test tests.analytics.test_income_facts --keepdb
+
+
+class TestIncomeFacts(TestCase):
+    fixtures = ('groups.json',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = get_user()
+        cls.currency = Currency.objects.create(
+            name='EUR',
+            rate_to_state_currency=2,
+            rate_to_marketing_currency=Decimal('1.5')
+        )
+        cls.deal = Deal.objects.create(
+            name="Test deal",
+            next_step=settings.FIRST_STEP,
+            next_step_date=get_delta_date(1),
+            owner=cls.owner,
+            department_id=Department.objects.create(name='Test income').id
+        )
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+
+    def create_payment(self, amount, payment_date, status=Payment.RECEIVED):
+        return Payment.objects.create(
+            deal=self.deal, amount=amount, currency=self.currency,
+            payment_date=payment_date, status=status
+        )
+
+    def test_facts_follow_payments_and_rates(self):
+        self.create_payment(100, date(2026, 3, 5))
+        self.create_payment(50, date(2026, 3, 20))
+        self.create_payment(70, date(2026, 4, 1), Payment.GUARANTEED)
+        fact = IncomeFact.objects.get(month=date(2026, 3, 1))
+        # the received payments got the rates of the currency
+        self.assertEqual(fact.amount_state, 300)
+        self.assertEqual(fact.unrated_amount, 0)
+        fact = IncomeFact.objects.get(status=Payment.GUARANTEED)
+        self.assertEqual((fact.amount_state, fact.unrated_amount), (0, 70))
+
+        rate = Rate.objects.get(payment_date=date(2026, 3, 20))
+        rate.rate_to_state_currency = 3
+        rate.save()
+        fact = IncomeFact.objects.get(month=date(2026, 3, 1))
+        self.assertEqual(fact.amount_state, 350)
+
+        self.deal.payment_set.filter(status=Payment.GUARANTEED).delete()
+        self.assertEqual(IncomeFact.objects.count(), 1)
+
+    def test_moved_payment(self):
+        payment = self.create_payment(100, date(2026, 3, 5))
+        other_deal = Deal.objects.create(
+            name="Other deal",
+            next_step=settings.FIRST_STEP,
+            next_step_date=get_delta_date(1),
+            owner=self.owner,
+            department_id=self.deal.department_id,
+            ticket=new_ticket()
+        )
+        payment.deal = other_deal
+        payment.save()
+        fact = IncomeFact.objects.get()
+        self.assertEqual(fact.deal_id, other_deal.id)
+
+    def test_get_income_over_time(self):
+        self.create_payment(100, date(2026, 3, 5))
+        self.create_payment(70, date(2026, 4, 1), Payment.GUARANTEED)
+        self.currency.rate_to_marketing_currency = 2
+        self.currency.save()
+        facts = IncomeFact.objects.filter(deal=self.deal)
+        values, maximum = get_income_over_time(
+            facts, 'rate_to_marketing_currency', date(2026, 4, 10)
+        )
+        totals = {x['period']: x['total'] for x in values}
+        self.assertEqual(len(totals), 12)
+        self.assertEqual(totals[date(2026, 3, 1)], 150)
+        # not received payments are converted at the current rate
+        self.assertEqual(totals[date(2026, 4, 1)], 140)
+        self.assertEqual(maximum, 150)
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+from django.http import HttpResponseRedirect
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import RequestFactory
+from django.test import SimpleTestCase
+
+from analytics.models import IncomeStat
+from analytics.site.incomestatadmin import IncomeStatAdmin
+from crm.site.crmadminsite import crm_site
+
+# manage.py test tests.analytics.test_income_snapshot --keepdb
+
+
+def changelist_view(request, extra_context=None):
+    template = engines['django'].from_string(
+        '{{ request.method }} {{ request.path }} {{ request.GET.owner }}'
+    )
+    return TemplateResponse(request, template, {'request': request})
+
+
+class TestIncomeSnapshot(SimpleTestCase):
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+        self.model_admin = IncomeStatAdmin(IncomeStat, crm_site)
+        self.request = RequestFactory().post(
+            '/analytics/incomestat/save-snapshot/',
+            {'next': 'http://testserver/analytics/incomestat/?owner=all'}
+        )
+
+    def test_render_snapshot(self):
+        """The page is rendered for the url the snapshot is saved from."""
+        with patch.object(self.model_admin, 'changelist_view', changelist_view):
+            webpage = self.model_admin.render_snapshot(
+                self.request, self.request.POST['next']
+            )
+        self.assertEqual(webpage, 'GET /analytics/incomestat/ all')
+        self.assertEqual(self.request.method, 'POST')
+
+    def test_render_snapshot_redirect(self):
+        with patch.object(
+                self.model_admin, 'changelist_view',
+                lambda request: HttpResponseRedirect('/')
+        ):
+            webpage = self.model_admin.render_snapshot(
+                self.request, self.request.POST['next']
+            )
+        self.assertEqual(webpage, '')
@@ -0,0 +1,118 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from analytics.models import IncomeStatSnapshot
+from analytics.site.incomestatadmin import IncomeStatAdmin
+from analytics.utils.income_snapshots import save_income_snapshots
+from analytics.utils.snapshot_worker import init_worker
+from common.models import Department
+from common.utils.helpers import USER_MODEL
+
+# manage.py test tests.analytics.test_income_snapshots --keepdb
+
+
+def get_thread_names() -> set:
+    return {type(thread).__name__ for thread in threading.enumerate()}
+
+
+class InProcessExecutor:
+    """Runs the tasks of the pool in the test process (and its database)."""
+    kwargs = {}
+
+    def __init__(self, **kwargs):
+        InProcessExecutor.kwargs = kwargs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    @staticmethod
+    def map(func, *iterables):
+        return map(func, *iterables)
+
+
+class TestIncomeSnapshots(TestCase):
+    fixtures = ('groups.json',)
+
+    @classmethod
+    def setUpTestData(cls):
+        USER_MODEL.objects.create(username='Super', is_superuser=True)
+        cls.departments = [
+            Department.objects.create(name=f'Test snapshots {i}')
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+
+    def test_save_income_snapshots(self):
+        pages = []
+
+        def render_snapshot(model_admin, request, url):
+            pages.append((request.user.department_id, url))
+            return f'<html><head></head>{request.user.department_id}</html>'
+
+        department_ids = [d.id for d in self.departments]
+        with patch.object(IncomeStatAdmin, 'render_snapshot', render_snapshot):
+            snapshot_ids = save_income_snapshots(department_ids, workers=1)
+        url = reverse('site:analytics_incomestat_changelist')
+        self.assertEqual(pages, [
+            (i, f'{url}?department={i}') for i in department_ids
+        ])
+        for snapshot in IncomeStatSnapshot.objects.filter(id__in=snapshot_ids):
+            self.assertIsNone(snapshot.owner)
+            self.assertIn(str(snapshot.department_id), snapshot.webpage)
+
+    def test_command(self):
+        out = StringIO()
+        with patch.object(IncomeStatAdmin, 'render_snapshot', return_value=''):
+            call_command(
+                'save_income_snapshots', department=[self.departments[0].id],
+                stdout=out
+            )
+        self.assertIn('Saved snapshots: 0', out.getvalue())
+        self.assertFalse(IncomeStatSnapshot.objects.exists())
+
+
+    def test_save_income_snapshots_in_pool(self):
+        department_ids = [d.id for d in self.departments]
+        with patch.object(
+                IncomeStatAdmin, 'render_snapshot', return_value='<html></html>'
+        ), patch(
+            'analytics.utils.income_snapshots.ProcessPoolExecutor',
+            InProcessExecutor
+        ):
+            snapshot_ids = save_income_snapshots(department_ids, workers=4)
+        kwargs = InProcessExecutor.kwargs
+        self.assertEqual(kwargs['max_workers'], 2)
+        self.assertEqual(kwargs['mp_context'].get_start_method(), 'spawn')
+        self.assertIs(kwargs['initializer'], init_worker)
+        self.assertEqual(
+            set(IncomeStatSnapshot.objects.filter(
+                id__in=snapshot_ids
+            ).values_list('department_id', flat=True)),
+            set(department_ids)
+        )
+
+    def test_worker_process(self):
+        """The spawned worker does not run the background threads of the apps."""
+        with ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker
+        ) as executor:
+            thread_names = executor.submit(get_thread_names).result()
+        self.assertIn('ImportEmails', get_thread_names())
+        self.assertFalse(thread_names & {
+            'CrmImapManager', 'ImportEmails', 'ImapIdleListener',
+            'RestoreImapEmails', 'CreateEmailInquiry', 'NotifEmailSender',
+            'SendMassmail'
+        })
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+
+from chat.models import ChatMessage
+from chat.models import UnreadChat
+from chat.utils.unread_chat import get_unread_counts
+from common.utils.helpers import USER_MODEL
+from crm.models import Deal
+
+# manage.py test tests.chat.test_unread_chat --keepdb
+
+
+class TestUnreadChat(TestCase):
+    fixtures = ('groups.json',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = USER_MODEL.objects.create(username="Chat.Owner")
+        cls.andrew = USER_MODEL.objects.create(username="Chat.Andrew")
+        cls.darian = USER_MODEL.objects.create(username="Chat.Darian")
+        cls.content_type = ContentType.objects.get_for_model(Deal)
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+
+    def send(self, object_id, *recipients):
+        msg = ChatMessage.objects.create(
+            content='Test message',
+            content_type=self.content_type,
+            object_id=object_id,
+            owner=self.owner
+        )
+        msg.recipients.add(*recipients)
+        return msg
+
+    def get_counts(self, user, object_ids=(1, 2)):
+        return get_unread_counts(user, self.content_type, object_ids)
+
+    def test_unread_counts(self):
+        msg = self.send(1, self.andrew, self.darian)
+        self.send(1, self.andrew)
+        self.send(2, self.andrew)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_counts(self.andrew), {1: 2, 2: 1})
+        self.assertEqual(self.get_counts(self.darian), {1: 1})
+
+        msg.recipients.remove(self.andrew)
+        self.assertEqual(self.get_counts(self.andrew), {1: 1, 2: 1})
+
+        # the messages are read on the chat page
+        msg_ids = ChatMessage.objects.filter(object_id=1).values_list('id', flat=True)
+        self.andrew.chat_chatmessage_recipients_related.remove(*msg_ids)
+        self.assertEqual(self.get_counts(self.andrew), {2: 1})
+
+        msg.delete()
+        self.assertEqual(self.get_counts(self.darian), {})
+
+        self.andrew.chat_chatmessage_recipients_related.clear()
+        self.assertFalse(UnreadChat.objects.exists())
+
+    def test_unread_counts_without_upsert_on_fields(self):
+        """The backends like MySQL cannot upsert on the given fields."""
+        with patch.object(
+                connection.features,
+                'supports_update_conflicts_with_target', False
+        ):
+            msg = self.send(1, self.andrew)
+            self.send(1, self.andrew)
+            self.assertEqual(self.get_counts(self.andrew), {1: 2})
+            msg.recipients.remove(self.andrew)
+            self.assertEqual(self.get_counts(self.andrew), {1: 1})
+        self.assertEqual(UnreadChat.objects.count(), 1)
@@ -1,5 +1,7 @@
 import time
+from datetime import timedelta
 from random import random
+from unittest.mock import patch
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.template import loader
@@ -10,7 +12,11 @@ from django.utils.formats import date_format
 from django.utils.formats import time_format
 from django.utils import timezone
 
+from common.models import Reminder
 from common.utils.helpers import USER_MODEL
+from common.utils.helpers import save_message
+from common.utils.reminders_sender import get_content_objects
+from common.utils.reminders_sender import get_next_reminder_date
 from common.utils.reminders_sender import send_remainders
 from tasks.models import Task
 from tasks.models import TaskStage
@@ -71,3 +77,69 @@ class TestReminder(BaseTestCase):
         self.assertIn(data['subject'], mail.outbox[0].subject)
         self.assertIn(str(content), mail.outbox[0].body)
         mail.outbox = []
+
+    def test_send_reminders_in_batch(self):
+        sergey = USER_MODEL.objects.get(username="Sergey.Co-worker.Head.Bookkeeping")
+        stage = TaskStage.objects.get(default=True)
+        tasks = [
+            Task.objects.create(
+                name=f"Test task {i}", priority='2', stage=stage,
+                owner=sergey, remind_me=True
+            )
+            for i in range(3)
+        ]
+        past_date = timezone.now() - timedelta(minutes=1)
+        for task in tasks:
+            Reminder.objects.create(
+                content_object=task, subject=f"Reminder for {task.name}",
+                reminder_date=past_date, owner=sergey
+            )
+        Reminder.objects.create(
+            content_object=tasks[0], subject="Future reminder",
+            reminder_date=timezone.now() + timedelta(days=1), owner=sergey
+        )
+        # the due reminders with the owner profiles, the site, the tasks,
+        # the locked read and update of the profile in a savepoint,
+        # the updates of the tasks and reminders, the empty batch
+        Site.objects.clear_cache()
+        with self.assertNumQueries(11):
+            send_remainders()
+        self.assertFalse(Task.objects.filter(remind_me=True).exists())
+        self.assertEqual(
+            Reminder.objects.filter(active=True).get().subject, "Future reminder"
+        )
+        self.assertFalse(Reminder.objects.filter(
+            active=False, send_notification_email=True
+        ).exists())
+        sergey.profile.refresh_from_db()
+        self.assertEqual(len(sergey.profile.messages), 6)
+        self.assertEqual(
+            get_next_reminder_date(),
+            Reminder.objects.get(active=True).reminder_date
+        )
+
+    def test_messages_saved_during_batch(self):
+        """The messages added while a batch is sent are kept."""
+        sergey = USER_MODEL.objects.get(username="Sergey.Co-worker.Head.Bookkeeping")
+        task = Task.objects.create(
+            name="Test task", priority='2', owner=sergey,
+            stage=TaskStage.objects.get(default=True)
+        )
+        Reminder.objects.create(
+            content_object=task, subject="Reminder for the task",
+            reminder_date=timezone.now() - timedelta(minutes=1), owner=sergey
+        )
+
+        def add_message(reminders):
+            # another process saves a message after the profile is loaded
+            save_message(USER_MODEL.objects.get(id=sergey.id), 'Import finished')
+            return get_content_objects(reminders)
+
+        with patch(
+            'common.utils.reminders_sender.get_content_objects',
+            side_effect=add_message
+        ):
+            send_remainders()
+        sergey.profile.refresh_from_db()
+        self.assertEqual(sergey.profile.messages[:2], ['Import finished', 'INFO'])
+        self.assertEqual(len(sergey.profile.messages), 4)
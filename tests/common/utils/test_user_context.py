@@ -0,0 +1,47 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase
+
+from common.models import Department
+from common.utils.helpers import USER_MODEL
+from common.utils.user_context import get_user_context
+
+
+# manage.py test tests.common.utils.test_user_context --keepdb
+
+
+class TestUserContext(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='co-workers')
+        cls.managers = Group.objects.create(name='managers')
+        cls.department = Department.objects.create(name='Global sales')
+        cls.user = USER_MODEL.objects.create_user('john', 'john@example.com', 'pass')
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+
+    def test_get_user_context(self):
+        self.user.groups.add(self.managers, self.department)
+        with self.assertNumQueries(1):
+            context = get_user_context(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(context, get_user_context(self.user))
+        self.assertCountEqual(
+            context['group_names'], ['co-workers', 'managers', 'Global sales']
+        )
+        self.assertEqual(context['department_ids'], [self.department.id])
+
+    def test_context_is_cleared_on_change(self):
+        context = get_user_context(self.user)
+        self.assertNotIn('managers', context['group_names'])
+        self.user.groups.add(self.managers)
+        self.assertIn('managers', get_user_context(self.user)['group_names'])
+
+        self.managers.user_set.clear()
+        self.assertNotIn('managers', get_user_context(self.user)['group_names'])
+
+        profile = self.user.profile
+        profile.utc_timezone = 'Etc/GMT-3'
+        profile.save()
+        self.assertEqual(get_user_context(self.user)['utc_timezone'], 'Etc/GMT-3')
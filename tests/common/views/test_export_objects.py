@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from common.models import Department
+from common.views.export_objects import ExportPlan
+from common.views.export_objects import get_csv_response
+from crm.models import Company
+from crm.models import Country
+from crm.models import Industry
+from tests.utils.helpers import get_user
+
+# manage.py test tests.common.views.test_export_objects --keepdb
+
+
+class TestExportObjects(TestCase):
+    fixtures = ('groups.json',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = get_user()
+        cls.department_id = Department.objects.create(name='Test sales').id
+        cls.country = Country.objects.create(name='Ukraine', url_name='Ukraine')
+        cls.industries = [
+            Industry.objects.create(name=name, department_id=cls.department_id)
+            for name in ('Agro', 'Food')
+        ]
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+
+    def create_companies(self, number: int) -> None:
+        for i in range(number):
+            company = Company.objects.create(
+                full_name=f"Company {Company.objects.count()}",
+                country=self.country,
+                owner=self.owner,
+                department_id=self.department_id
+            )
+            company.industry.add(*self.industries)
+
+    def export(self) -> tuple:
+        plan = ExportPlan(Company, settings.COMPANY_COLUMNS)
+        with CaptureQueriesContext(connection) as context:
+            rows = list(plan.iter_rows(Company.objects.order_by('id')))
+        return rows, len(context.captured_queries)
+
+    def test_export_rows(self):
+        self.create_companies(2)
+        rows, number_of_queries = self.export()
+        self.assertEqual(len(rows), 2)
+        row = dict(zip(settings.COMPANY_COLUMNS, rows[0]))
+        self.assertEqual(row['full_name'], 'Company 0')
+        self.assertEqual(row['country'], 'Ukraine')
+        self.assertEqual(row['owner'], self.owner.username)
+        self.assertEqual(row['industry'], 'Agro,Food')
+        self.assertEqual(row['lead_source'], '')
+
+        self.create_companies(3)
+        rows, more_queries = self.export()
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(more_queries, number_of_queries)
+
+    def test_csv_response(self):
+        self.create_companies(1)
+        plan = ExportPlan(Company, settings.COMPANY_COLUMNS)
+        response = get_csv_response(plan, Company.objects.all(), 'companies.csv')
+        content = b''.join(response.streaming_content).decode()
+        lines = content.splitlines()
+        self.assertEqual(lines[0], ','.join(settings.COMPANY_COLUMNS))
+        self.assertIn('Company 0', lines[1])
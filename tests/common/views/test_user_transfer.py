@@ -2,6 +2,9 @@ from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
 from django.test import tag
 from django.urls import reverse
+from common.models import Department
+from common.utils.user_transfer import get_report_lines
+from common.utils.user_transfer import transfer_user
 from common.views.copy_department import MODELS
 from crm.models import Company
 from crm.models import Contact
@@ -111,3 +114,39 @@ class TestUserTransfer(BaseTestCase):
                 model.objects.filter(department=new_department).exists(),
                 f"The {model.__name__} is not copied to another department."
             )
+
+    def test_transfer_user_dry_run(self):
+        new_department = Department.objects.create(name="Test transfer")
+        new_product = copy_to_department(
+            Product.objects.get(id=self.product.id), new_department
+        )
+        closing_reason = self.deal.closing_reason
+        new_closing_reason = copy_to_department(
+            ClosingReason.objects.get(id=closing_reason.id), new_department
+        )
+
+        report = transfer_user(self.owner, new_department, dry_run=True)
+        changes = dict(report)
+        self.assertTrue(changes[Deal]['department'])
+        self.assertEqual(changes[Deal]['closing_reason'], 1)
+        self.assertEqual(changes[Request]['products'], 1)
+        self.assertTrue(get_report_lines(report))
+        self.deal.refresh_from_db()
+        self.assertEqual(self.deal.department_id, self.department.id)
+        self.assertEqual(self.deal.closing_reason, closing_reason)
+
+        transfer_user(self.owner, new_department)
+        self.deal.refresh_from_db()
+        self.assertEqual(self.deal.department_id, new_department.id)
+        self.assertEqual(self.deal.closing_reason, new_closing_reason)
+        self.assertEqual(
+            list(self.contact_request.products.all()), [new_product]
+        )
+        self.assertEqual(get_department_id(self.owner), new_department.id)
+
+
+def copy_to_department(obj, department):
+    obj.id = None
+    obj.department = department
+    obj.save()
+    return obj
@@ -1,5 +1,7 @@
 
 from datetime import datetime as dt
+from datetime import timedelta
+from tempfile import TemporaryDirectory
 from unittest.mock import patch, MagicMock
 from django.conf import settings
 from django.test import TestCase
@@ -7,6 +9,8 @@ from django.utils.module_loading import import_string
 import requests
 from requests.exceptions import JSONDecodeError, HTTPError, RequestException
 
+from crm.backends.bank_gov_ua_backend import BankGovUaBackend
+
 # manage.py test tests.crm.backends.test_currency_rate_backend
 MARKETING_CURRENCY = 'USD'
 
@@ -100,3 +104,43 @@ class TestCurrencyRateBackend(TestCase):
         self.assertIn("Connection timed out", error)
         self.assertEqual(rate_to_state_currency, 1)
         self.assertEqual(rate_to_marketing_currency, 1)
+
+
+class TestBankGovUaBackend(TestCase):
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+
+    @patch('crm.backends.bank_gov_ua_backend.requests.get')
+    def test_date_table_is_fetched_once(self, mock_get):
+        mock_response = MagicMock(spec=requests.Response)
+        mock_response.json.return_value = [
+            {'cc': 'USD', 'rate': 40}, {'cc': 'EUR', 'rate': 44}
+        ]
+        mock_get.return_value = mock_response
+        rate_date = dt.now().date() - timedelta(days=3)
+        with TemporaryDirectory() as tmp, self.settings(RATES_CACHE_PATH=tmp):
+            backend = BankGovUaBackend('EUR', MARKETING_CURRENCY, rate_date)
+            self.assertEqual(backend.get_rates(), (44, 1.1, ''))
+            self.assertEqual(backend.get_rates('USD'), (40, 1, ''))
+            self.assertEqual(mock_get.call_count, 1)
+            self.assertNotIn('valcode', mock_get.call_args.kwargs['params'])
+
+            # the table of the past date is read from the disk
+            backend = BankGovUaBackend('USD', MARKETING_CURRENCY, rate_date)
+            self.assertTrue(backend.from_cache)
+            self.assertEqual(mock_get.call_count, 1)
+
+    @patch('crm.backends.bank_gov_ua_backend.requests.get')
+    def test_incomplete_table_is_not_cached(self, mock_get):
+        mock_response = MagicMock(spec=requests.Response)
+        mock_response.json.return_value = [{'cc': 'EUR', 'rate': 44}]
+        mock_get.return_value = mock_response
+        rate_date = dt.now().date() - timedelta(days=3)
+        with TemporaryDirectory() as tmp, self.settings(RATES_CACHE_PATH=tmp):
+            backend = BankGovUaBackend('EUR', MARKETING_CURRENCY, rate_date)
+            self.assertTrue(backend.error)
+            # the table without the marketing currency is fetched again
+            backend = BankGovUaBackend('EUR', MARKETING_CURRENCY, rate_date)
+            self.assertFalse(backend.from_cache)
+            self.assertEqual(mock_get.call_count, 2)
@@ -0,0 +1,158 @@
+from datetime import date
+from unittest.mock import patch
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from common.models import Department
+from common.utils.helpers import get_delta_date
+from crm.models import CrmEmail
+from crm.models import Currency
+from crm.models import Deal
+from crm.models import DealStatus
+from crm.models import Output
+from crm.models import Payment
+from crm.models import Product
+from crm.models import Request
+from crm.utils.ticketproc import new_ticket
+from tests.utils.helpers import get_user
+
+# manage.py test tests.crm.test_deal_status --keepdb
+
+
+class TestDealStatus(TestCase):
+    fixtures = ('groups.json',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = get_user()
+        cls.department = Department.objects.create(name='Test deal status')
+        cls.currency = Currency.objects.create(name='EUR')
+        cls.product = Product.objects.create(
+            name="Product for deal status",
+            department=cls.department,
+        )
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+        self.deal = Deal.objects.create(
+            name="Test deal",
+            next_step=settings.FIRST_STEP,
+            next_step_date=get_delta_date(1),
+            owner=self.owner,
+            department=self.department
+        )
+
+    def create_email(self, **kwargs):
+        return CrmEmail.objects.create(
+            to="andrew@example.com",
+            from_field="michael@testcompany.com",
+            subject='Status',
+            owner=self.owner,
+            department=self.department,
+            ticket=new_ticket(),
+            deal=self.deal,
+            **kwargs
+        )
+
+    def get_status(self):
+        return DealStatus.objects.get(deal=self.deal)
+
+    def test_status_follows_emails(self):
+        self.assertFalse(self.get_status().unanswered_email)
+        request = Request.objects.create(
+            request_for="Deal status",
+            department=self.department,
+            ticket=new_ticket(),
+        )
+        inquiry = self.create_email(incoming=True, inquiry=True, request=request)
+        status = self.get_status()
+        self.assertTrue(status.unanswered_inquiry)
+        self.assertEqual(status.inquiry_date, inquiry.creation_date)
+        self.assertFalse(status.inquiry_subsequent)
+
+        request.subsequent = True
+        request.save()
+        self.assertTrue(self.get_status().inquiry_subsequent)
+
+        answer = self.create_email()
+        status = self.get_status()
+        self.assertFalse(status.unanswered_email)
+        self.assertFalse(status.unanswered_inquiry)
+
+        answer.delete()
+        self.assertTrue(self.get_status().unanswered_email)
+
+    def test_status_follows_payments_and_outputs(self):
+        Payment.objects.create(
+            deal=self.deal, amount=100, currency=self.currency,
+            status=Payment.RECEIVED
+        )
+        output = Output.objects.create(
+            deal=self.deal, product=self.product, currency=self.currency
+        )
+        status = self.get_status()
+        self.assertTrue(status.received_payment)
+        self.assertTrue(status.has_product)
+        self.assertTrue(status.empty_shipping_date)
+
+        output.shipping_date = date(2026, 3, 5)
+        output.save()
+        status = self.get_status()
+        self.assertFalse(status.empty_shipping_date)
+        self.assertEqual(status.first_shipping_date, date(2026, 3, 5))
+
+        output.delete()
+        self.assertFalse(self.get_status().has_product)
+
+    def test_moved_objects_update_both_deals(self):
+        email = self.create_email(incoming=True)
+        output = Output.objects.create(
+            deal=self.deal, product=self.product, currency=self.currency
+        )
+        other_deal = Deal.objects.create(
+            name="Other deal",
+            ticket=new_ticket(),
+            next_step=settings.FIRST_STEP,
+            next_step_date=get_delta_date(1),
+            owner=self.owner,
+            department=self.department
+        )
+        email.deal = other_deal
+        email.save()
+        output.deal = other_deal
+        output.save()
+        status = self.get_status()
+        self.assertFalse(status.unanswered_email)
+        self.assertFalse(status.has_product)
+        other_status = DealStatus.objects.get(deal=other_deal)
+        self.assertTrue(other_status.unanswered_email)
+        self.assertTrue(other_status.has_product)
+
+    def test_status_without_upsert_on_fields(self):
+        """The backends like MySQL cannot upsert on the given fields."""
+        with patch.object(
+                connection.features,
+                'supports_update_conflicts_with_target', False
+        ):
+            self.create_email(incoming=True)
+            self.assertTrue(self.get_status().unanswered_email)
+            self.create_email()
+            self.assertFalse(self.get_status().unanswered_email)
+        self.assertEqual(DealStatus.objects.count(), 1)
+
+    def test_deal_deletion(self):
+        self.create_email(incoming=True)
+        Payment.objects.create(deal=self.deal, amount=100, currency=self.currency)
+        Output.objects.create(
+            deal=self.deal, product=self.product, currency=self.currency
+        )
+        self.deal.delete()
+        self.assertFalse(DealStatus.objects.exists())
+
+    def test_rebuild_deal_statuses(self):
+        self.create_email(incoming=True)
+        DealStatus.objects.all().delete()
+        call_command('rebuild_deal_statuses', stdout=open('/dev/null', 'w'))
+        self.assertTrue(self.get_status().unanswered_email)
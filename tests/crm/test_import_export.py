@@ -1,9 +1,7 @@
 import os
-import queue
+import time
 from random import random
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from django.test import TransactionTestCase
 from django.urls import reverse
 
@@ -16,8 +14,6 @@ from tests.utils.helpers import get_user
 
 # manage.py test tests.crm.test_import_export --keepdb
 
-company_queue = queue.Queue()
-contact_queue = queue.Queue()
 description = str(int(random() * 1E5))
 
 
@@ -113,12 +109,6 @@ class TestImportExport(TransactionTestCase):
         obj1.delete()
         obj2.delete()
 
-        @receiver(post_save, sender=sender)
-        def get_saved_instance(sender, instance, created, **kwargs):
-            if created:
-                if description == instance.description:
-                    contact_queue.put(instance)
-
         file_path = get_file_path(self.owner.username, model=sender)
         response = self.client.get(import_url, follow=True)
         self.assertEqual(response.status_code, 200, response.reason_phrase)
@@ -132,8 +122,10 @@ class TestImportExport(TransactionTestCase):
         self.assertEqual(response.status_code, 200, response.reason_phrase)
         self.assertEqual(response.redirect_chain[0][0], changelist_url)
         os.remove(file_path)
-        for _ in range(2):
-            try:
-                contact_queue.get(timeout=4)
-            except queue.Empty:
-                self.fail("The contact is not imported")
+        # Objects are created with bulk_create, which sends no post_save signal.
+        for _ in range(40):
+            if sender.objects.filter(description=description).count() == 2:
+                break
+            time.sleep(0.1)
+        else:
+            self.fail(msg)
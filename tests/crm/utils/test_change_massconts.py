@@ -82,6 +82,34 @@ class TesttestChangeMassconts(BaseTestCase):
         self.mc2.refresh_from_db()
         self.assertEqual(ea, self.mc2.email_account)
 
+    def test_round_robin_massconts(self):
+        ea_ids = []
+        for n in range(2):
+            ea = EmailAccount.objects.create(
+                name=f'Email Account {n}',
+                email_host='smtp.example.com',
+                email_host_user=f'andrew{n}@example.com',
+                email_host_password='password',
+                email_port=587,
+                from_email='andrew@example.com',
+                massmail=True,
+                owner=self.owner,
+            )
+            ea_ids.append(ea.id)
+        queue_obj = EmlAccountsQueue.objects.create(
+            owner=self.owner,
+            queue=f'[{ea_ids[0]}, {ea_ids[1]}]'
+        )
+        change_massconts(self.company)
+        account_ids = [
+            mc.email_account_id for mc in MassContact.objects.filter(
+                id__in=(self.mc.id, self.mc1.id, self.mc2.id)
+            ).order_by('id')
+        ]
+        self.assertEqual([ea_ids[0], ea_ids[1], ea_ids[0]], account_ids)
+        queue_obj.refresh_from_db()
+        self.assertEqual([ea_ids[1], ea_ids[0]], queue_obj.get_queue())
+
     def test_delete_massconts(self):
         change_massconts(self.company)
         self.assertFalse(
@@ -0,0 +1,114 @@
+import pandas as pd
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+from common.models import Department
+from crm.models import Company
+from crm.models import Contact
+from crm.models import Country
+from crm.models import Industry
+from crm.utils.create_objects import get_import_result
+from crm.utils.create_objects import ObjectImporter
+from tests.utils.helpers import get_user
+
+# manage.py test tests.crm.utils.test_create_objects --keepdb
+
+
+class TestCreateObjects(TestCase):
+    fixtures = ('groups.json',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = get_user()
+        cls.department = Department.objects.create(name='Test import')
+        cls.country = Country.objects.create(name='Ukraine', url_name='Ukraine')
+        cls.industry = Industry.objects.create(
+            name='Agro', department_id=cls.department.id
+        )
+        cls.company = Company.objects.create(
+            full_name='Existing Company',
+            country=cls.country,
+            owner=cls.owner,
+            department_id=cls.department.id
+        )
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+        self.request = SimpleNamespace(user=self.owner)
+
+    def test_import_companies(self):
+        df = pd.DataFrame({
+            'full_name': ['Existing Company', 'New Company', 'New Company', 'Bad Company'],
+            'email': ['a@example.com', 'b@example.com', 'c@example.com', ''],
+            'country': ['Ukraine', 'Ukraine', 'Ukraine', ''],
+            'industry': ['Agro', 'Agro, Unknown', '', ''],
+            'owner': [self.owner.username] * 4,
+            'department': [self.department.name] * 4,
+        })
+        importer = ObjectImporter(
+            self.request, attr='company', object=Company,
+            columns=settings.COMPANY_COLUMNS, uniq1='full_name', uniq2='country'
+        )
+        result = importer.run(df)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            [(row, level) for row, level, _ in result.rows],
+            [(2, 'INFO'), (4, 'INFO'), (5, 'ERROR')]
+        )
+        company = Company.objects.get(full_name='New Company')
+        self.assertEqual(company.country, self.country)
+        self.assertEqual(company.department_id, self.department.id)
+        self.assertEqual(list(company.industry.all()), [self.industry])
+        cached_result = get_import_result(self.owner.id)
+        self.assertTrue(cached_result.finished)
+        self.assertEqual(cached_result.processed, 4)
+
+    def test_import_without_returned_ids(self):
+        """The backends like MySQL do not return ids of bulk created rows."""
+        df = pd.DataFrame({
+            'full_name': ['First Company', 'Second Company'],
+            'email': ['a@example.com', 'b@example.com'],
+            'country': ['Ukraine', 'Ukraine'],
+            'industry': ['Agro', 'Agro'],
+            'owner': [self.owner.username] * 2,
+            'department': [self.department.name] * 2,
+        })
+        importer = ObjectImporter(
+            self.request, attr='company', object=Company,
+            columns=settings.COMPANY_COLUMNS, uniq1='full_name', uniq2='country'
+        )
+        with patch.object(
+                type(connection.features), 'can_return_rows_from_bulk_insert', False
+        ), patch.object(Company, 'save') as save:
+            result = importer.run(df)
+        save.assert_not_called()    # no row-by-row fallback
+        self.assertEqual(result.created, 2)
+        for company in Company.objects.filter(full_name__in=df['full_name']):
+            self.assertEqual(list(company.industry.all()), [self.industry])
+            self.assertEqual(company.match_keys.count(), 2)
+
+    def test_queries_do_not_depend_on_rows(self):
+        """The lookups are resolved once per import, not per row."""
+        def import_contacts(number: int):
+            df = pd.DataFrame({
+                'first_name': [f'Name{number}_{i}' for i in range(number)],
+                'email': [f'{number}_{i}@example.com' for i in range(number)],
+                'country': ['Ukraine'] * number,
+                'company': ['Existing Company'] * number,
+                'owner': [self.owner.username] * number,
+            })
+            importer = ObjectImporter(
+                self.request, attr='contact', object=Contact,
+                columns=settings.CONTACT_COLUMNS, uniq1='first_name', uniq2='email'
+            )
+            with self.assertNumQueries(num_queries):
+                result = importer.run(df)
+            self.assertEqual(result.created, number)
+
+        num_queries = 8     # 3 lookups, duplicate check, 2 inserts in a savepoint
+        import_contacts(2)
+        import_contacts(20)
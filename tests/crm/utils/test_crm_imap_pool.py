@@ -0,0 +1,57 @@
+import threading
+from datetime import datetime as dt
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from django.test import override_settings
+
+from crm.utils.crm_imap import CrmIMAP
+from crm.utils.crm_imap_pool import CrmImapPool
+
+# manage.py test tests.crm.utils.test_crm_imap_pool
+
+
+class FakeCrmIMAP(CrmIMAP):
+
+    def __init__(self, email_host_user: str):
+        super().__init__(email_host_user)
+        self.closed = False
+        self.error = None
+        self.noop_time = None
+        self.last_request_time = dt.now()
+
+    def close_and_logout(self) -> None:
+        self.closed = True
+
+
+class TestCrmImapPool(SimpleTestCase):
+
+    def setUp(self):
+        self.ea = SimpleNamespace(email_host_user='andrew@example.com')
+        self.pool = CrmImapPool(self.ea, size=1)
+        self.pool._create_crmimap = lambda ea: FakeCrmIMAP(ea.email_host_user)
+
+    @override_settings(REUSE_IMAP_CONNECTION=True)
+    def test_checkout_waits_for_checkin(self):
+        crmimap = self.pool.checkout(self.ea)
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(self.pool.checkout(self.ea))
+        )
+        thread.start()
+        thread.join(0.1)
+        self.assertTrue(thread.is_alive())
+
+        crmimap.release()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertIs(result[0], crmimap)
+        self.assertEqual(self.pool.total, 1)
+
+    @override_settings(REUSE_IMAP_CONNECTION=False)
+    def test_release_closes_connection(self):
+        crmimap = self.pool.checkout(self.ea)
+        crmimap.release()
+        crmimap.release()
+        self.assertTrue(crmimap.closed)
+        self.assertEqual(self.pool.total, 0)
+        self.assertEqual(self.pool.idle, [])
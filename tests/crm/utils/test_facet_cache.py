@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.test import TestCase
+
+from common.models import Department
+from common.utils.usermiddleware import set_group_flags
+from crm.models import City
+from crm.models import Company
+from crm.models import Country
+from crm.site.crmadminsite import crm_site
+from crm.utils.admfilters import ByCityFilter
+from tests.utils.helpers import get_user
+
+# manage.py test tests.crm.utils.test_facet_cache --keepdb
+
+
+class TestFacetCache(TestCase):
+    fixtures = ('groups.json',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = get_user()
+        cls.department = Department.objects.create(name='Test facets')
+        cls.country = Country.objects.create(name='Ukraine', url_name='Ukraine')
+        cls.kyiv = City.objects.create(name='Kyiv', country=cls.country)
+        cls.lviv = City.objects.create(name='Lviv', country=cls.country)
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+        cache.clear()
+        self.create_company('Kyiv company', self.kyiv)
+        self.create_company('No city company', None)
+
+    def create_company(self, name, city):
+        return Company.objects.create(
+            full_name=name,
+            email='office@company.com',
+            city=city,
+            country=self.country,
+            owner=self.owner,
+            department=self.department
+        )
+
+    def get_lookups(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.owner
+        set_group_flags(self.owner, ['chiefs'], 0)
+        self.owner.department_id = self.department.id
+        model_admin = crm_site._registry[Company]     # NOQA
+        return ByCityFilter(request, {}, Company, model_admin).lookup_choices
+
+    def test_city_lookups_are_cached(self):
+        with self.assertNumQueries(1):
+            lookups = self.get_lookups()
+        self.assertEqual(lookups[0], (self.kyiv.id, 'Kyiv'))
+        self.assertEqual(lookups[-1][0], 'IsNull')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_lookups(), lookups)
+
+        # the cache is dropped when the companies change
+        self.create_company('Lviv company', self.lviv)
+        self.assertIn((self.lviv.id, 'Lviv'), self.get_lookups())
+
+        # the selected city goes first
+        lookups = self.get_lookups(city__id__exact=self.lviv.id)
+        self.assertEqual(lookups[0], (self.lviv.id, 'Lviv'))
+
+    def test_other_department_keeps_cache(self):
+        lookups = self.get_lookups()
+        other_department = Department.objects.create(name='Other facets')
+        Company.objects.create(
+            full_name='Other company',
+            email='office@other.com',
+            city=self.lviv,
+            country=self.country,
+            owner=self.owner,
+            department=other_department
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_lookups(), lookups)
+
+        # the cities are shared by all departments
+        self.lviv.name = 'Lemberg'
+        self.lviv.save()
+        with self.assertNumQueries(1):
+            self.get_lookups()
@@ -0,0 +1,85 @@
+from queue import Queue
+from unittest.mock import patch
+from django.test import SimpleTestCase
+from django.test import TestCase
+
+from crm.utils.imap_idle import ImapIdleListener
+from crm.utils.imap_idle import ImapIdleSession
+from massmail.models.email_account import EmailAccount
+from tests.utils.helpers import get_user
+
+# manage.py test tests.crm.utils.test_imap_idle
+
+
+class FakeSocket:
+
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+        self.sent = []
+
+    def pending(self):
+        return 0
+
+    def recv(self, size):
+        return self.chunks.pop(0)
+
+
+class FakeConnection:
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def send(self, data):
+        self.sock.sent.append(data)
+
+
+class TestImapIdleSession(SimpleTestCase):
+
+    def get_session(self, *chunks) -> ImapIdleSession:
+        session = ImapIdleSession(None)
+        session.connection = FakeConnection(FakeSocket(*chunks))
+        return session
+
+    def test_read_events(self):
+        session = self.get_session(
+            b'+ idling\r\n',
+            b'* OK Still here\r\n',
+            b'* 12 EXI',
+            b'STS\r\n* 1 RECENT\r\n',
+            b'* 12 EXISTS\r\nIDLE1 OK IDLE terminated\r\n',
+        )
+        session.start_idle()
+        self.assertEqual(session.idle_tag, b'IDLE1')
+        self.assertFalse(session.read_events())
+        self.assertFalse(session.read_events())
+        self.assertTrue(session.read_events())
+        self.assertTrue(session.stop_idle())
+        self.assertIsNone(session.idle_tag)
+        self.assertEqual(
+            session.connection.sock.sent, [b'IDLE1 IDLE\r\n', b'DONE\r\n']
+        )
+
+
+class TestImapIdleListener(TestCase):
+    fixtures = ('groups.json',)
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+
+    def test_failed_account_is_polled(self):
+        ea = EmailAccount.objects.create(
+            name='CRM Email Account',
+            email_host='smtp.example.com',
+            email_host_user='andrew@example.com',
+            email_host_password='password',
+            from_email='andrew@example.com',
+            imap_host='imap.example.com',
+            do_import=True,
+            owner=get_user(),
+        )
+        listener = ImapIdleListener(Queue())
+        with patch.object(ImapIdleSession, 'connect', side_effect=OSError):
+            listener._sync_sessions()       # NOQA
+        self.assertEqual(listener.sessions, {})
+        listener._poll()                    # NOQA
+        self.assertEqual(listener.ea_queue.get_nowait(), ea)
@@ -0,0 +1,107 @@
+from queue import Queue
+from types import SimpleNamespace
+from django.test import TestCase
+
+from crm.models import CrmEmail
+from crm.utils.import_emails import ImportWorker
+from crm.utils.import_emails import parse_fetch_data
+from tests.utils.helpers import get_email_message
+
+# manage.py test tests.crm.utils.test_import_emails --keepdb
+
+
+class FakeCrmIMAP:
+    """Serve FETCH commands from a dict of messages."""
+
+    def __init__(self, messages: dict):
+        self.messages = messages
+        self.fetches = []
+
+    def uid_fetch(self, uids_str: bytes, param: str = '(RFC822)') -> tuple:
+        self.fetches.append((uids_str, param))
+        data = []
+        for i, uid in enumerate(uids_str.split(b',')):
+            msg = self.messages[uid]
+            if param == '(BODY.PEEK[HEADER])':
+                header = f"{i + 1} (UID {uid.decode()} BODY[HEADER] {{1}}"
+                content = bytes(msg)[:bytes(msg).index(b'\n\n') + 2]
+            else:
+                header = f"{i + 1} (UID {uid.decode()} RFC822 {{1}}"
+                content = msg.as_bytes()
+            data.extend(((header.encode(), content), b')'))
+        return 'OK', data, None
+
+
+class TestImportEmails(TestCase):
+
+    def test_import_batch(self):
+        """Only the bodies of not yet imported emails should be fetched."""
+        msgs = {uid: get_email_message()[0] for uid in (b'11', b'12', b'13')}
+        # already imported from another mailbox
+        CrmEmail.objects.create(
+            message_id=msgs[b'12']['Message-ID'],
+            email_host_user='eve@example.com'
+        )
+        ea = SimpleNamespace(email_host_user='andrew@example.com')
+        crmimap = FakeCrmIMAP(msgs)
+        worker = ImportWorker(Queue())
+        worker.import_batch(crmimap, ea, 'incoming', list(msgs))
+
+        self.assertEqual(crmimap.fetches, [
+            (b'11,12,13', '(BODY.PEEK[HEADER])'),
+            (b'11,13', '(RFC822)'),
+        ])
+        uids = []
+        while not worker.eml_queue.empty():
+            b_msg, _, t, uid, _, _ = worker.eml_queue.get()
+            self.assertEqual(b_msg, msgs[uid].as_bytes())
+            uids.append(uid)
+        self.assertEqual(uids, [b'11', b'13'])
+
+    def test_skipped_uids_advance_start_uid(self):
+        """The uid of the last skipped email is queued without a message."""
+        msgs = {uid: get_email_message()[0] for uid in (b'11', b'12')}
+        CrmEmail.objects.create(
+            message_id=msgs[b'12']['Message-ID'],
+            email_host_user='eve@example.com'
+        )
+        ea = SimpleNamespace(email_host_user='andrew@example.com')
+        crmimap = FakeCrmIMAP(msgs)
+        worker = ImportWorker(Queue())
+        worker.import_batch(crmimap, ea, 'incoming', list(msgs))
+        queued = []
+        while not worker.eml_queue.empty():
+            b_msg, _, t, uid, _, _ = worker.eml_queue.get()
+            queued.append((b_msg is None, uid))
+        self.assertEqual(queued, [(False, b'11'), (True, b'12')])
+
+        # nothing new in the batch
+        worker.import_batch(crmimap, ea, 'incoming', [b'12'])
+        self.assertEqual(worker.eml_queue.get()[::3], (None, b'12'))
+        self.assertEqual(crmimap.fetches[-1], (b'12', '(BODY.PEEK[HEADER])'))
+
+    def test_get_existing_message_ids(self):
+        """Message-IDs should be looked up within the mailbox only."""
+        CrmEmail.objects.create(
+            message_id='<1@example.com>',
+            email_host_user='andrew@example.com'
+        )
+        CrmEmail.objects.create(
+            message_id='<2@example.com>',
+            email_host_user='eve@example.com'
+        )
+        message_ids = ['<1@example.com>', '<2@example.com>', '', None]
+        with self.assertNumQueries(1):
+            existing_ids = CrmEmail.get_existing_message_ids(
+                'andrew@example.com', message_ids
+            )
+        self.assertEqual(existing_ids, {'<1@example.com>'})
+
+    def test_parse_fetch_data(self):
+        data = [
+            (b'1 (UID 7 RFC822 {3}', b'abc'), b')',
+            (b'2 (UID 9 RFC822 {3}', b'def'), b')',
+        ]
+        self.assertEqual(
+            parse_fetch_data(data), {b'7': b'abc', b'9': b'def'}
+        )
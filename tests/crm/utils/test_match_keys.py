@@ -0,0 +1,63 @@
+from django.test import TestCase
+
+from crm.models import Company
+from crm.models import Contact
+from crm.models import MatchKey
+from crm.utils.match_keys import get_match_keys
+from crm.utils.match_keys import get_match_q_params
+
+# manage.py test tests.crm.utils.test_match_keys --keepdb
+
+
+class TestMatchKeys(TestCase):
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+        self.company = Company.objects.create(
+            full_name='Test Company',
+            email='Office@Company.com; Sales <sales@company.com>',
+            phone='+1 (234) 567-89-01, 12-34'
+        )
+
+    def test_get_match_keys(self):
+        self.assertEqual(get_match_keys(self.company), {
+            (MatchKey.EMAIL, 'office@company.com'),
+            (MatchKey.EMAIL, 'sales@company.com'),
+            (MatchKey.DOMAIN, 'company.com'),
+            (MatchKey.PHONE, '109876543'),    # reversed last digits
+        })
+
+    def test_keys_follow_changes(self):
+        contact = Contact.objects.create(
+            first_name='Tom',
+            email='Tom@company.com',
+            mobile='8(43)123-45-67',
+            company=self.company
+        )
+        self.assertEqual(contact.match_keys.count(), 3)
+        params = get_match_q_params(Contact, phone='+38 043 123 45 67')
+        self.assertEqual(list(Contact.objects.filter(params)), [contact])
+        # a short number without the area code
+        params = get_match_q_params(Contact, phone='123-45-67')
+        self.assertEqual(list(Contact.objects.filter(params)), [contact])
+        params = get_match_q_params(Contact, phone='312-45-67')
+        self.assertFalse(Contact.objects.filter(params).exists())
+
+        contact.email = 'tom@example.com'
+        contact.save(update_fields=['email'])
+        params = get_match_q_params(Contact, email='TOM@company.com')
+        self.assertFalse(Contact.objects.filter(params).exists())
+        params = get_match_q_params(Contact, email='"Tom" <tom@example.com>')
+        self.assertEqual(list(Contact.objects.filter(params)), [contact])
+        self.assertEqual(
+            list(Company.objects.filter(
+                get_match_q_params(Company, domain='company.com')
+            )),
+            [self.company]
+        )
+
+        contact.delete()
+        self.assertEqual(MatchKey.objects.count(), 4)   # the company keys
+
+    def test_empty_params(self):
+        self.assertFalse(get_match_q_params(Contact, email='no address', phone='123'))
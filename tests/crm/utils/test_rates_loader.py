@@ -1,7 +1,10 @@
 from datetime import datetime as dt
 from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
 from django.conf import settings
 from django.test import tag
+from django.test import TestCase
 from django.test import TransactionTestCase
 
 from crm.models import Country
@@ -11,6 +14,8 @@ from crm.models import Rate
 from crm.models import Payment
 from common.utils.helpers import get_delta_date
 from common.utils.helpers import get_department_id
+from crm.backends.basebackend import BaseBackend
+from crm.utils.rates_loader import backfill_rates
 from crm.utils.rates_loader import RatesLoader
 from tests.utils.helpers import get_user
 
@@ -173,3 +178,111 @@ class TestGetRates(TransactionTestCase):
         self.assertEqual(Rate.APPROXIMATE, rate4.rate_type)
         self.assertEqual(0.0, rate4.rate_to_state_currency)
         self.assertEqual(0.0, rate4.rate_to_marketing_currency)
+
+
+class FakeBackend(BaseBackend):
+    """Rates of the date: EUR is the state currency, USD = 2 EUR."""
+    instances = []
+
+    def __init__(self, currency, marketing_currency='USD', rate_date=None):
+        self.error = ''
+        self.state_currency = 'EUR'
+        self.currency = currency
+        self.marketing_currency = marketing_currency
+        self.rate_date = rate_date
+        self.data = self.get_data()
+        self.marketing_currency_rate = self.get_marketing_currency_rate()
+        self.instances.append(self)
+
+    def get_data(self):
+        return {'USD': 2}
+
+    def get_marketing_currency_rate(self):
+        return self.data[self.marketing_currency]
+
+    def get_rate_to_state_currency(self, currency='USD'):
+        return self.data[currency]
+
+
+class NoGbpBackend(FakeBackend):
+    """The tables of rates have no GBP."""
+
+    def get_rate_to_state_currency(self, currency='USD'):
+        if currency not in self.data:
+            self.error = f'No rate of {currency}'
+            return 1
+        return self.data[currency]
+
+
+class TestBackfillRates(TestCase):
+    fixtures = ('groups.json',)
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+        FakeBackend.instances = []
+
+    def test_backfill_rates(self):
+        usd = Currency.objects.create(name="USD", is_marketing_currency=True)
+        eur = Currency.objects.create(name="EUR", is_state_currency=True)
+        deal = Deal.objects.create(
+            name="Test deal",
+            next_step=settings.FIRST_STEP,
+            next_step_date=get_delta_date(1),
+            owner=get_user(),
+        )
+        date = dt.now().date() - timedelta(days=7)
+        for currency in (usd, eur, usd):
+            Payment.objects.create(
+                deal=deal, amount=100, currency=currency,
+                payment_date=date, status=Payment.RECEIVED
+            )
+        Payment.objects.create(
+            deal=deal, amount=100, currency=usd,
+            payment_date=date - timedelta(days=1), status=Payment.RECEIVED
+        )
+        self.assertEqual(Rate.objects.filter(rate_type=Rate.APPROXIMATE).count(), 3)
+        # the missing rates, the existing rates, the bulk update
+        # and the income facts of the deals are updated once
+        with patch('crm.utils.rates_loader.time.sleep'), \
+                self.assertNumQueries(11):
+            backfill_rates(usd, dt.now().date(), FakeBackend)
+        # one backend instance (table fetch) per date
+        self.assertEqual(len(FakeBackend.instances), 2)
+        self.assertFalse(Rate.objects.filter(rate_type=Rate.APPROXIMATE).exists())
+        rate = Rate.objects.get(currency=eur, payment_date=date)
+        self.assertEqual(rate.rate_to_marketing_currency, Decimal('0.5'))
+        fact = deal.income_facts.get(currency=eur)
+        self.assertEqual(fact.amount_marketing, 50)
+
+    def test_backfill_errors_are_mailed_once(self):
+        usd = Currency.objects.create(name="USD", is_marketing_currency=True)
+        gbp = Currency.objects.create(name="GBP")
+        deal = Deal.objects.create(
+            name="Test deal",
+            next_step=settings.FIRST_STEP,
+            next_step_date=get_delta_date(1),
+            owner=get_user(),
+        )
+        date = dt.now().date() - timedelta(days=7)
+        for days in (0, 1):
+            Payment.objects.create(
+                deal=deal, amount=100, currency=gbp,
+                payment_date=date - timedelta(days=days),
+                status=Payment.RECEIVED
+            )
+        usd_date = date - timedelta(days=2)
+        Payment.objects.create(
+            deal=deal, amount=100, currency=usd,
+            payment_date=usd_date, status=Payment.RECEIVED
+        )
+        with patch('crm.utils.rates_loader.time.sleep'), \
+                patch('crm.backends.basebackend.mail_admins') as backend_mail, \
+                patch('crm.utils.rates_loader.mail_admins') as loader_mail:
+            backfill_rates(usd, dt.now().date(), NoGbpBackend)
+        backend_mail.assert_not_called()
+        loader_mail.assert_called_once()
+        self.assertEqual(len(loader_mail.call_args.args[1].splitlines()), 2)
+        # the rates loaded despite the errors are saved
+        self.assertTrue(Rate.objects.filter(
+            currency=usd, payment_date=usd_date, rate_type=Rate.OFFICIAL
+        ).exists())
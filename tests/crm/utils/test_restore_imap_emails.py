@@ -92,6 +92,17 @@ class TestRestoreImapEmails(TransactionTestCase):
             self.fail("New Email not created in db")
         mail.outbox = []
 
+    def test_skipped_uid(self):
+        """The start uid is moved past the already imported emails"""
+        self.eml_queue.put((None, self.ea, 'incoming', b'12', '', None))
+        self.eml_queue.join()
+        self.ea.refresh_from_db()
+        self.assertEqual(self.ea.start_incoming_uid, 13)
+        self.eml_queue.put((None, self.ea, 'incoming', b'5', '', None))
+        self.eml_queue.join()
+        self.ea.refresh_from_db()
+        self.assertEqual(self.ea.start_incoming_uid, 13)
+
     def test_restore_incoming_email(self):
         """Test handle an incoming email without ticket"""
         self.eml_queue.put((self.msg.as_bytes(), self.ea, 'incoming', 1, '', None))
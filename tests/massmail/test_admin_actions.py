@@ -9,6 +9,7 @@ from django.utils.translation import gettext as _
 from common.utils.helpers import get_department_id
 from common.utils.helpers import USER_MODEL
 from crm.models import Lead
+from crm.utils.admfilters import ByVIPStatus
 from massmail.admin_actions import make_mailing_out
 from massmail.admin_actions import merge_mailing_outs
 from massmail.admin_actions import specify_vip_recipients
@@ -111,6 +112,23 @@ class TesttestAdminActions(BaseTestCase):
             ).count()
             self.assertEqual(3, mc_num)
 
+    def test_vip_status_filter(self):
+        MassContact.objects.create(
+            content_type=self.lead_content_type,
+            object_id=self.lead2.id,
+            email_account=self.ea2,
+            massmail=True
+        )
+        request = self.factory.get('/')
+        queryset = Lead.objects.filter(owner=self.owner)
+        for value, lead in (('yes', self.lead1), ('no', self.lead2)):
+            vip_filter = ByVIPStatus(request, {'vip_status': [value]}, Lead, None)
+            with self.assertNumQueries(1):
+                ids = list(vip_filter.queryset(
+                    request, queryset
+                ).values_list('id', flat=True))
+            self.assertEqual(ids, [lead.id])
+
     def test_merge_mailing_outs(self):
         mo, mo1 = self.create_mailing_outs()
         queryset = MailingOut.objects.filter(id__in=(mo.id, mo1.id))
@@ -139,6 +157,28 @@ class TesttestAdminActions(BaseTestCase):
                 "Mailing outs not deleted"
             )
 
+    def test_merge_recipient_states(self):
+        mo, mo1 = self.create_mailing_outs()
+        mo.move_to_successful_ids(2)
+        mo1.move_to_failed_ids(3, 'Error')
+        queryset = MailingOut.objects.filter(id__in=(mo.id, mo1.id))
+        with self.settings(
+                MESSAGE_STORAGE='django.contrib.messages.storage.cookie.CookieStorage'
+        ):
+            self.request = self.factory.get(
+                reverse('site:massmail_mailingout_changelist'))
+            self.request.user = self.owner
+            self.request.user.department_id = get_department_id(self.owner)
+            self.request._messages = default_storage(self.request)
+            merge_mailing_outs(None, self.request, queryset)
+        m_o = MailingOut.objects.get(recipient_ids='1,2,3,4')
+        self.assertEqual([1, 4], sorted(m_o.get_recipient_ids()))
+        self.assertEqual([2], m_o.get_successful_ids())
+        self.assertEqual([3], m_o.get_failed_ids())
+        self.assertEqual(
+            'Error', m_o.recipients.get(object_id=3).last_error
+        )
+
     def test_make_mailing_out(self):
         lead4 = Lead.objects.create(
             first_name='Michael',
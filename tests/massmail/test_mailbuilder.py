@@ -0,0 +1,66 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from django.template import Context
+from django.template import Template
+from django.test import SimpleTestCase
+
+from massmail.templatetags import mailbuilder
+
+# python manage.py test tests.massmail.test_mailbuilder
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'0' * 1000
+
+
+class TestMailbuilder(SimpleTestCase):
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+        self.tmp = TemporaryDirectory()
+        self.media_root = Path(self.tmp.name)
+        (self.media_root / 'pic.png').write_bytes(PNG)
+        mailbuilder._images.clear()
+        mailbuilder._images_size = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self):
+        context = Context()
+        with self.settings(MEDIA_ROOT=self.media_root):
+            html = Template(
+                "{% load mailbuilder %}<img src=\"{% cid_media 'pic.png' %}\">"
+            ).render(context)
+        return html, context['cid'][0]
+
+    def test_image_is_encoded_once(self):
+        with patch.object(Path, 'read_bytes', autospec=True,
+                          side_effect=Path.read_bytes) as read_bytes:
+            html, img = self.render()
+            html2, img2 = self.render()
+        self.assertEqual(read_bytes.call_count, 1)
+        self.assertEqual(img.get_payload(decode=True), PNG)
+        self.assertEqual(img2.get_payload(decode=True), PNG)
+        self.assertEqual(img2.get_filename(), 'pic.png')
+        self.assertNotEqual(img['Content-ID'], img2['Content-ID'])
+        self.assertIn(img['Content-ID'].strip('<>'), html)
+        self.assertEqual(img2.get_all('Content-ID'), [img2['Content-ID']])
+        self.assertIn('Content-Transfer-Encoding: base64', img2.as_string())
+
+        # the changed file is read again
+        file = self.media_root / 'pic.png'
+        file.write_bytes(PNG + b'1')
+        stat = file.stat()
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        _, img = self.render()
+        self.assertEqual(img.get_payload(decode=True), PNG + b'1')
+
+    def test_cache_size(self):
+        with self.settings(INLINE_IMAGE_CACHE_SIZE=3000):
+            self.render()
+            (self.media_root / 'pic.png').write_bytes(PNG * 2)
+            self.render()
+        # the first image is evicted
+        self.assertEqual(len(mailbuilder._images), 1)
+        self.assertLessEqual(mailbuilder._images_size, 3000)
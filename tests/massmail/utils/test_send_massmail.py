@@ -1,9 +1,13 @@
+from unittest.mock import patch
 from django.contrib.contenttypes.models import ContentType
 from django.core import mail
+from django.template import Context
 from django.test import tag
 from django.urls import reverse
 from django.utils.translation import gettext as _
 
+from crm.models import Company
+from crm.models import Contact
 from crm.models import Lead
 from common.utils.helpers import get_department_id
 from common.utils.helpers import USER_MODEL
@@ -13,7 +17,10 @@ from massmail.models.email_message import EmlMessage
 from massmail.models.mass_contact import MassContact
 from massmail.models.mailing_out import MailingOut
 from massmail.models.signature import Signature
+from massmail.utils.email_creators import get_templates
+from massmail.utils.sendmassmail import RecipientLoader
 from massmail.utils.sendmassmail import send_massmail
+from massmail.utils.sendmassmail import TokenBucket
 from settings.models import MassmailSettings
 from tests.base_test_classes import BaseTestCase
 from tests.utils.helpers import get_adminform_initials
@@ -109,6 +116,79 @@ class TestMassMil(BaseTestCase):
         self.assertEqual(2, len(mail.outbox))   # NOQA
         self.assertEqual(self.eml.subject, mail.outbox[0].subject)
         mail.outbox = []
+        self.assertEqual([], self.mo.get_recipient_ids())
+        self.assertCountEqual(
+            [self.lead1.id, self.lead2.id],
+            self.mo.get_successful_ids()
+        )
+
+    def test_emails_per_day_limit(self):
+        self.massmail_settings.emails_per_day = 0
+        send_massmail(self.massmail_settings)
+        self.assertEqual(0, len(mail.outbox))   # NOQA
+        self.mo.refresh_from_db()
+        self.assertEqual(2, len(self.mo.get_recipient_ids()))
+
+    def test_worker_pass_time(self):
+        with patch('massmail.utils.sendmassmail.WORKER_PASS_TIME', 0):
+            send_massmail(self.massmail_settings)
+        self.assertEqual(0, len(mail.outbox))   # NOQA
+        self.mo.refresh_from_db()
+        self.assertEqual(2, len(self.mo.get_recipient_ids()))
+        send_massmail(self.massmail_settings)
+        self.assertEqual(2, len(mail.outbox))   # NOQA
+        mail.outbox = []
+
+    def test_recipient_loader(self):
+        company = Company.objects.create(
+            full_name="Bruno Company LLC",
+            email='office@company.com',
+            owner=self.owner
+        )
+        contact = Contact.objects.create(
+            first_name='Bruno',
+            last_name='Smith',
+            email='Bruno@company.com',
+            company=company,
+            owner=self.owner
+        )
+        content_type = ContentType.objects.get_for_model(Contact)
+        mc = MassContact.objects.create(
+            content_type=content_type,
+            object_id=contact.id,
+            email_account=self.ea
+        )
+        loader = RecipientLoader(content_type)
+        masscontacts = MassContact.objects.filter(content_type=content_type)
+        with self.assertNumQueries(3):
+            batches = list(loader.get_batches(masscontacts))
+            extra_context = loader.get_extra_context(*batches[0][0])
+        self.assertEqual('Bruno@company.com', extra_context['to'])
+        self.assertEqual('Bruno Smith', extra_context['full_name'])
+        self.assertEqual(company, extra_context['company'])
+        self.assertTrue(
+            extra_context['unsubscribe_url'].endswith(
+                reverse('unsubscribe', args=[mc.uuid])
+            )
+        )
+
+    def test_template_cache(self):
+        templates = get_templates(self.eml)
+        self.assertIs(templates, get_templates(self.eml))
+        self.eml.content = "new content"
+        self.eml.save()
+        new_templates = get_templates(self.eml)
+        self.assertIsNot(templates, new_templates)
+        self.assertIn(
+            "new content",
+            new_templates[1].render(Context())
+        )
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=1)
+        self.assertEqual(0, bucket.consume())
+        wait = bucket.consume()
+        self.assertTrue(0 < wait <= 1)
 
     def test_send_without_message(self):
         self.client.force_login(self.owner)
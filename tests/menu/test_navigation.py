@@ -0,0 +1,51 @@
+from time import monotonic
+from unittest.mock import patch
+from django.test import TestCase
+
+from menu.models import MenuGroup
+from menu.models import MenuItem
+from menu.navigation import NAVIGATION_TIMEOUT
+from menu.navigation import get_navigation
+
+# manage.py test tests.menu.test_navigation --keepdb
+
+
+class TestNavigation(TestCase):
+
+    def setUp(self):
+        print("Run Test Method:", self._testMethodName)
+
+    def test_navigation_is_rebuilt_on_change(self):
+        group = MenuGroup.objects.create(title='Sales')
+        MenuItem.objects.create(
+            group=group, title='Deals', icon='work', link='/deals/'
+        )
+        navigation = get_navigation()
+        self.assertEqual(navigation[0]['title'], 'Sales')
+        self.assertEqual(navigation[0]['items'][0]['link'], '/deals/')
+        with self.assertNumQueries(0):
+            self.assertIs(get_navigation(), navigation)
+
+        MenuItem.objects.create(
+            group=group, title='Requests', icon='inbox', link='/requests/'
+        )
+        navigation = get_navigation()
+        self.assertEqual(len(navigation[0]['items']), 2)
+
+        group.delete()
+        self.assertEqual(get_navigation(), ())
+
+    def test_navigation_expires(self):
+        group = MenuGroup.objects.create(title='Sales')
+        navigation = get_navigation()
+        # changed in another process, so the version is not bumped here
+        MenuItem.objects.bulk_create([MenuItem(
+            group=group, title='Deals', icon='work', link='/deals/', order=1
+        )])
+        self.assertIs(get_navigation(), navigation)
+        with patch(
+                'menu.navigation.monotonic',
+                return_value=monotonic() + NAVIGATION_TIMEOUT
+        ):
+            navigation = get_navigation()
+        self.assertEqual(navigation[0]['items'][0]['link'], '/deals/')
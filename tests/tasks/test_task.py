@@ -14,7 +14,7 @@ from common.utils.helpers import get_active_users
 from common.utils.helpers import get_trans_for_lang
 from common.utils.helpers import USER_MODEL
 from common.utils.helpers import get_today
-from common.utils.usermiddleware import set_user_groups
+from common.utils.usermiddleware import set_group_flags
 from tasks.site.taskadmin import TaskAdmin
 from tasks.site.tasksbasemodeladmin import subscribers_subject
 from tasks.site.tasksbasemodeladmin import TASK_IS_CLOSED_str
@@ -785,7 +785,11 @@ class TestTask(BaseTestCase):
         user.department_id = department.id if department else None
         request.user = user
         groups = request.user.groups.all()
-        set_user_groups(request, groups)
+        set_group_flags(
+            user,
+            list(groups.values_list('name', flat=True)),
+            groups.filter(department__isnull=False).count()
+        )
         request.resolver_match = resolver_match
         response = resolver_match.func(request)
         form = response.context_data['adminform'].form
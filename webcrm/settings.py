@@ -5,6 +5,7 @@ from django.utils.translation import gettext_lazy as _
 import environ
 import os
 
+from analytics.settings import *    # NOQA
 from crm.settings import *          # NOQA
 from common.settings import *       # NOQA
 from tasks.settings import *        # NOQA
@@ -176,9 +177,6 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
-
-                # our dynamic sidebar (put it near the end so it overrides)
-                "menu.context_processors.unfold_dynamic_sidebar",
             ],
         },
     },
@@ -333,6 +331,7 @@ NO_NAME_STR = _("Untitled")
 LOAD_EXCHANGE_RATE = False
 LOADING_EXCHANGE_RATE_TIME = "6:30"
 LOAD_RATE_BACKEND = ""  # "crm.backends.<specify_backend>.<specify_class>"
+RATES_CACHE_PATH = MEDIA_ROOT / "rates"    # loaded tables of past dates
 
 # Ability to mark payments through a representation
 MARK_PAYMENTS_THROUGH_REP = False
@@ -346,12 +345,18 @@ INDEX_TITLE = _("Main Menu")
 # Allow mailing
 MAILING = True
 
+# Memory (in bytes) for the encoded images embedded in emails
+INLINE_IMAGE_CACHE_SIZE = 32 * 1024 * 1024
+
 # This is copyright information. Please don't change it!
 COPYRIGHT_STRING = f"Django-CRM. Copyright (c) {dt.now().year}"
 PROJECT_NAME = "Django-CRM"
 PROJECT_SITE = "https://djangocrm.github.io/info/"
 
 TESTING = sys.argv[1:2] == ["test"]
+# The background threads of the apps (email import, mailing, reminders...)
+# are not run in the helper processes, which set CRM_BACKGROUND_THREADS=0.
+BACKGROUND_THREADS = os.environ.get("CRM_BACKGROUND_THREADS", "1") != "0"
 if TESTING:
     SECURE_SSL_REDIRECT = False
     LANGUAGE_CODE = "en"
@@ -419,8 +424,9 @@ UNFOLD = {
         "show_search": True,
         "command_search": True,
         "show_all_applications": True,   # hide auto-generated Django sidebar
-        "navigation": [
-
+        # built from the menu groups and items of the menu app
+        "navigation": "menu.navigation.get_navigation",
+        # Examples of static navigation:
             # {
             #     "title": _("Shortcuts"),
             #     "items": [
@@ -690,7 +696,6 @@ UNFOLD = {
             #     ],
             # },
 
-        ],
     },
 
     # # TABS – keep it simple and matching docs